@@ -0,0 +1,136 @@
+"""
+Writes synthetic firefox sessionstore files (mozLz40) of configurable size.
+
+    python benchmarks/generate_session.py out.jsonlz4 --windows 20 --tabs 200 --entries 10
+"""
+import os
+import sys
+import json
+import random
+import string
+import uuid
+
+import lz4.block
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from getinista.parsinista import MAGIC_NUMBER
+
+DOMAINS = [
+    "github.com", "news.ycombinator.com", "en.wikipedia.org", "docs.python.org", "www.youtube.com",
+    "stackoverflow.com", "mail.google.com", "www.reddit.com", "developer.mozilla.org", "lwn.net",
+]
+WORDS = [
+    "session", "firefox", "python", "release", "notes", "issue", "pull", "request", "video", "guide",
+    "tutorial", "benchmark", "memory", "parser", "window", "tab", "history", "search", "index", "cache",
+]
+
+def _title(rng: random.Random, length: int) -> str:
+    words = []
+    while sum(len(word) + 1 for word in words) < length:
+        words.append(rng.choice(WORDS))
+    return " ".join(words).capitalize()[:length]
+
+def _url(rng: random.Random, length: int) -> str:
+    base = f"https://{rng.choice(DOMAINS)}/"
+    path_length = max(length - len(base), 1)
+    path = "/".join(
+        "".join(rng.choices(string.ascii_lowercase + string.digits, k=rng.randint(3, 12)))
+        for _ in range(path_length // 8 + 1)
+    )
+    return (base + path)[:max(length, len(base) + 1)]
+
+def _entry(rng: random.Random, title_length: int, url_length: int) -> dict:
+    return {
+        "url": _url(rng, url_length),
+        "title": _title(rng, title_length),
+        "cacheKey": 0,
+        "ID": rng.randint(1, 2**31),
+        "docshellUUID": "{" + str(uuid.UUID(int=rng.getrandbits(128))) + "}",
+        "referrerInfo": "BBoSnxDOS9qmDeAnom1e0AAAAAAAAAAAwAAAAAAAAEYAAAAAAAAQAQAAAAAAAAAA",
+        "resultPrincipalURI": None,
+        "hasUserInteraction": rng.random() < 0.5,
+        "triggeringPrincipal_base64": '{"3":{}}',
+        "docIdentifier": rng.randint(1, 2**31),
+        "persist": True,
+    }
+
+def generate_session(
+    windows: int=10,
+    tabs: int=100,
+    entries: int=5,
+    title_length: int=60,
+    url_length: int=80,
+    closed_windows: int=2,
+    seed: int=0,
+) -> dict:
+    """
+    A session shaped like firefox's, with tabs tabs of entries history entries in every window.
+    """
+    rng = random.Random(seed)
+
+    def window() -> dict:
+        window_tabs = []
+        for _ in range(tabs):
+            tab_entries = [_entry(rng, title_length, url_length) for _ in range(entries)]
+            window_tabs.append({
+                "entries": tab_entries,
+                "lastAccessed": 1700000000000 + rng.randint(0, 10**9),
+                "hidden": False,
+                "searchMode": None,
+                "userContextId": 0,
+                "attributes": {},
+                "index": rng.randint(1, entries) if entries else 0,
+                "requestedIndex": 0,
+                "image": f"https://{rng.choice(DOMAINS)}/favicon.ico",
+            })
+        return {
+            "tabs": window_tabs,
+            "selected": 1,
+            "_closedTabs": [],
+            "busy": False,
+            "width": 1920,
+            "height": 1080,
+            "screenX": 0,
+            "screenY": 0,
+            "sizemode": "maximized",
+        }
+
+    return {
+        "version": ["sessionrestore", 1],
+        "windows": [window() for _ in range(windows)],
+        "selectedWindow": 1,
+        "_closedWindows": [window() for _ in range(closed_windows)],
+        "session": {"lastUpdate": 1700000000000, "startTime": 1699990000000, "recentCrashes": 0},
+        "global": {},
+        "cookies": [],
+    }
+
+def write_session_file(session: dict, file_path: str) -> int:
+    """
+    Writes session the way firefox does and returns the file size.
+    """
+    json_data = json.dumps(session, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    with open(file_path, "wb") as f:
+        f.write(MAGIC_NUMBER)
+        # store_size prepends the decompressed size, as mozLz40 expects
+        f.write(lz4.block.compress(json_data, store_size=True))
+    return os.path.getsize(file_path)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate a synthetic firefox sessionstore file.")
+    parser.add_argument("output_file_path", help="Where to write the .jsonlz4 file")
+    parser.add_argument("--windows", type=int, default=10, help="Open windows")
+    parser.add_argument("--tabs", type=int, default=100, help="Tabs per window")
+    parser.add_argument("--entries", type=int, default=5, help="History entries per tab")
+    parser.add_argument("--title-length", type=int, default=60, help="Characters per title")
+    parser.add_argument("--url-length", type=int, default=80, help="Characters per url")
+    parser.add_argument("--closed-windows", type=int, default=2, help="Closed windows, same size as open ones")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed, the same seed gives the same file")
+    args = parser.parse_args()
+
+    session = generate_session(
+        args.windows, args.tabs, args.entries, args.title_length, args.url_length, args.closed_windows, args.seed
+    )
+    size = write_session_file(session, args.output_file_path)
+    print(f"Session is saved to {args.output_file_path} ({size / 2**20:.1f} MB)")
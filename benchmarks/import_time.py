@@ -0,0 +1,84 @@
+"""
+Checks how long the sessionista subcommands take to import and that they leave the heavy modules unloaded.
+Exits with 1 when a command goes over its budget.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 10 --budget-scale 2
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# code run in a fresh interpreter, budget of its own imports in ms, modules it must not import
+CHECKS = [
+    (
+        "cli",
+        "import getinista.cli",
+        60,
+        ["lz4", "sqlite3", "textual", "yaml", "asyncio", "concurrent.futures"],
+    ),
+    (
+        "list",
+        "from getinista.cli import build_parser; build_parser(); import getinista.pathionista",
+        120,
+        ["lz4", "sqlite3", "textual", "yaml", "asyncio", "concurrent.futures"],
+    ),
+    (
+        "export",
+        "from getinista.main import export; import getinista.parsinista",
+        200,
+        ["textual", "yaml", "sqlite3", "asyncio"],
+    ),
+]
+
+REPORT_MODULES = "import sys; print(' '.join(sys.modules))"
+
+def _import_time_us(code: str) -> tuple[int, set[str]]:
+    # -X importtime reports the cumulative time of every top level import on stderr
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"{code}; {REPORT_MODULES}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    baseline = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "pass"], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return _total_us(result.stderr) - _total_us(baseline.stderr), set(result.stdout.split())
+
+def _total_us(importtime_output: str) -> int:
+    total = 0
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # nested imports are indented and already counted by the top level import
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time budget of the sessionista entry points.")
+    parser.add_argument("--repeat", type=int, default=5, help="Best of this many runs is compared to the budget")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="Multiplies every budget, for slow machines")
+    args = parser.parse_args()
+
+    failed = False
+    for name, code, budget_ms, forbidden in CHECKS:
+        runs = [_import_time_us(code) for _ in range(args.repeat)]
+        best_ms = min(us for us, _ in runs) / 1000
+        median_ms = statistics.median(us for us, _ in runs) / 1000
+        loaded = runs[0][1]
+        leaked = [module for module in forbidden if module in loaded]
+        over = best_ms > budget_ms * args.budget_scale
+        status = "FAIL" if over or leaked else "ok"
+        print(f"{status:4} {name:8} best {best_ms:7.1f} ms  median {median_ms:7.1f} ms  budget {budget_ms * args.budget_scale:.0f} ms")
+        if leaked:
+            print(f"     {name} imports {', '.join(leaked)}")
+        failed = failed or over or bool(leaked)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Times the conversion and viewer hot paths on generated sessions and stores the results as json,
+so runs on different commits can be compared.
+
+    python benchmarks/run_benchmarks.py --windows 20 --tabs 200
+    python benchmarks/run_benchmarks.py --compare bench_results/old.json bench_results/new.json
+"""
+import os
+import sys
+import gc
+import json
+import time
+import asyncio
+import platform
+import tempfile
+import statistics
+import subprocess
+import tracemalloc
+from typing import Any, Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from generate_session import generate_session, write_session_file
+from getinista.parsinista import Parsinista, decompress_session_file, process_session_data, stream_session_windows
+from jsonista.jsonista import filter_mapping_by_regex
+from jsonista.indexista import LeafIndex
+from jsonista.fuzzista import FuzzyIndex
+
+DEFAULT_RESULTS_DIR = os.path.join(ROOT, "bench_results")
+SEARCH_PATTERN = "python.*release"
+FUZZY_QUERY = "pyrel"
+
+def measure(func: Callable[[], Any], repeat: int) -> dict:
+    """
+    Runs func repeat times for timing, then once more under tracemalloc for its peak allocation.
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    # tracemalloc slows allocations down a lot, so it gets a run of its own
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "min_seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        "peak_bytes": peak,
+    }
+
+def _measure_tree_view(data: Any, repeat: int) -> dict:
+    """
+    Mounts the viewer headless and times load_json_tree plus revealing every match of SEARCH_PATTERN.
+    """
+    from tui.tui import JsonTreeApp
+
+    results = {}
+
+    async def run() -> None:
+        app = JsonTreeApp(data)
+        async with app.run_test():
+            view = app.tree_view
+            paths = [view.json_manager.get_index().paths[i] for i in view.json_manager.get_index().search(SEARCH_PATTERN)]
+
+            def load() -> None:
+                view.root.remove_children()
+                view.load_json_tree()
+
+            def reveal() -> None:
+                view.root.remove_children()
+                for path in paths[:200]:
+                    view.reveal_path(path)
+
+            results["tree_load"] = measure(load, repeat)
+            results["tree_reveal_matches"] = measure(reveal, repeat)
+
+    asyncio.run(run())
+    return results
+
+def run_benchmarks(session_file: str, repeat: int, with_tui: bool=True) -> dict:
+    raw = decompress_session_file(session_file)
+    simplified = process_session_data(raw)
+    index = LeafIndex(simplified)
+    fuzzy_index = FuzzyIndex(simplified)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        def save(output_format: str) -> Callable[[], None]:
+            def run() -> None:
+                output_file = os.path.join(tmp_dir, f"out.{output_format}")
+                if os.path.exists(output_file):
+                    os.remove(output_file)
+                parsinista = Parsinista(session_file, output_file, verbose=False, output_format=output_format)
+                parsinista.session_data = simplified
+                parsinista.save_simplified_session()
+            return run
+
+        scenarios = {
+            "decompress_session_file": lambda: decompress_session_file(session_file),
+            "process_session_data": lambda: process_session_data(raw),
+            "process_streamed_session": lambda: process_session_data(stream_session_windows(session_file)),
+            "save_json": save("json"),
+            "save_packed": save("packed"),
+            "filter_mapping_by_regex": lambda: filter_mapping_by_regex(simplified, SEARCH_PATTERN),
+            "build_leaf_index": lambda: LeafIndex(simplified),
+            "indexed_search": lambda: index.search(SEARCH_PATTERN),
+            "indexed_filter": lambda: index.filter(SEARCH_PATTERN),
+            "fuzzy_rank": lambda: fuzzy_index.rank(FUZZY_QUERY),
+        }
+        for name, func in scenarios.items():
+            print(f"{name}...", file=sys.stderr)
+            results[name] = measure(func, repeat)
+
+    if with_tui:
+        print("tree view...", file=sys.stderr)
+        results.update(_measure_tree_view(simplified, repeat))
+    return results
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(old_file: str, new_file: str) -> None:
+    with open(old_file) as f:
+        old = json.load(f)
+    with open(new_file) as f:
+        new = json.load(f)
+    print(f"{'scenario':<28}{'old s':>10}{'new s':>10}{'speedup':>9}{'old MB':>9}{'new MB':>9}")
+    for name, result in new["results"].items():
+        if name not in old["results"]:
+            continue
+        before = old["results"][name]
+        speedup = before["median_seconds"] / result["median_seconds"] if result["median_seconds"] else float("inf")
+        print(
+            f"{name:<28}{before['median_seconds']:>10.4f}{result['median_seconds']:>10.4f}{speedup:>8.2f}x"
+            f"{before['peak_bytes'] / 2**20:>9.1f}{result['peak_bytes'] / 2**20:>9.1f}"
+        )
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark session conversion and the json viewer.")
+    parser.add_argument("--session", help="Benchmark this sessionstore file instead of a generated one")
+    parser.add_argument("--windows", type=int, default=10, help="Windows in the generated session")
+    parser.add_argument("--tabs", type=int, default=100, help="Tabs per window in the generated session")
+    parser.add_argument("--entries", type=int, default=5, help="History entries per tab in the generated session")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated session")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="Timed runs per scenario")
+    parser.add_argument("--no-tui", action="store_true", help="Skip the headless tree view scenarios")
+    parser.add_argument("-o", "--output", help="Results file, a new file in bench_results/ by default")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Print the difference of two results files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        session_file = args.session
+        params = {"session": session_file}
+        if session_file is None:
+            session_file = os.path.join(tmp_dir, "recovery.jsonlz4")
+            params = {"windows": args.windows, "tabs": args.tabs, "entries": args.entries, "seed": args.seed}
+            write_session_file(generate_session(args.windows, args.tabs, args.entries, seed=args.seed), session_file)
+        params["file_size"] = os.path.getsize(session_file)
+        results = run_benchmarks(session_file, args.repeat, with_tui=not args.no_tui)
+
+    commit = _git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "params": params,
+        "results": results,
+    }
+    output_file = args.output
+    if output_file is None:
+        os.makedirs(DEFAULT_RESULTS_DIR, exist_ok=True)
+        output_file = os.path.join(DEFAULT_RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{commit or 'nogit'}.json")
+    with open(output_file, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for name, result in results.items():
+        print(f"{name:<28}{result['median_seconds']:>10.4f}s{result['peak_bytes'] / 2**20:>9.1f} MB")
+    print(f"Results are saved to {output_file}")
@@ -0,0 +1,143 @@
+import os
+import time
+import sqlite3
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS windows (
+    id INTEGER PRIMARY KEY,
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    tab_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tabs (
+    id INTEGER PRIMARY KEY,
+    window_id INTEGER NOT NULL REFERENCES windows(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    tab_id INTEGER NOT NULL REFERENCES tabs(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    entry_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    url TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS windows_snapshot ON windows(snapshot_id);
+CREATE INDEX IF NOT EXISTS tabs_window ON tabs(window_id);
+CREATE INDEX IF NOT EXISTS entries_tab ON entries(tab_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    title, url, content='entries', content_rowid='id', tokenize='unicode61'
+);
+"""
+
+SEARCH_QUERY = """
+SELECT snapshots.id, snapshots.source, snapshots.created_at, entries.entry_id, entries.title, entries.url
+FROM entries_fts
+JOIN entries ON entries.id = entries_fts.rowid
+JOIN tabs ON tabs.id = entries.tab_id
+JOIN windows ON windows.id = tabs.window_id
+JOIN snapshots ON snapshots.id = windows.snapshot_id
+WHERE entries_fts MATCH ?
+ORDER BY bm25(entries_fts)
+LIMIT ?
+"""
+
+def to_fts_query(text: str) -> str:
+    """
+    Every word of text as a quoted prefix query, so user input can't be fts5 syntax.
+    """
+    terms = ['"' + word.replace('"', '""') + '"*' for word in text.split()]
+    return " ".join(terms)
+
+class SessionArchive():
+    """
+    SQLite database of simplified sessions with a full text index on titles and urls.
+
+    The connection is opened on first use, so archives can be handed to worker processes.
+    """
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._connection: sqlite3.Connection | None = None
+
+    def __getstate__(self) -> dict:
+        return {"db_path": self.db_path, "_connection": None}
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            # batch exports write from several processes
+            self._connection = sqlite3.connect(self.db_path, timeout=60)
+            self._connection.execute("PRAGMA foreign_keys = ON")
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def add_session(self, session_data: Sequence[Mapping], source: str) -> int:
+        """
+        Inserts a simplified session in a single transaction and returns its snapshot id.
+        """
+        connection = self.connection
+        windows, tabs, entries = [], [], []
+        with connection:
+            # ids are handed out up front so every table is inserted with one executemany
+            connection.execute("BEGIN IMMEDIATE")
+            snapshot_id = connection.execute(
+                "INSERT INTO snapshots (source, created_at) VALUES (?, ?)", (os.path.abspath(source), time.time())
+            ).lastrowid
+            window_id, tab_id, entry_id = (
+                connection.execute(f"SELECT coalesce(max(id), 0) FROM {table}").fetchone()[0]
+                for table in ("windows", "tabs", "entries")
+            )
+            first_entry_id = entry_id + 1
+            for window_idx, window in enumerate(session_data, start=1):
+                window_id += 1
+                windows.append((window_id, snapshot_id, window_idx, window["tab_count"]))
+                for tab_idx, tab_entries in enumerate(window["tabs"], start=1):
+                    tab_id += 1
+                    tabs.append((tab_id, window_id, tab_idx))
+                    for entry_idx, entry in enumerate(tab_entries, start=1):
+                        entry_id += 1
+                        entries.append((
+                            entry_id, tab_id, entry_idx, entry["id"], entry.get("title", ""), entry.get("url", "")
+                        ))
+            connection.executemany("INSERT INTO windows VALUES (?, ?, ?, ?)", windows)
+            connection.executemany("INSERT INTO tabs VALUES (?, ?, ?)", tabs)
+            connection.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)", entries)
+            connection.execute(
+                "INSERT INTO entries_fts (rowid, title, url) SELECT id, title, url FROM entries WHERE id >= ?",
+                (first_entry_id,)
+            )
+        return snapshot_id #pyright: ignore[reportReturnType]
+
+    def search(self, text: str, limit: int=1000, raw_query: bool=False) -> list[dict[str, Any]]:
+        """
+        Entries whose title or url match text, best matches first.
+        With raw_query text is passed to fts5 as is, e.g. 'title:firefox NOT url:mozilla'.
+        """
+        query = text if raw_query else to_fts_query(text)
+        if not query:
+            return []
+        rows = self.connection.execute(SEARCH_QUERY, (query, limit))
+        return [
+            {
+                "snapshot": snapshot_id,
+                "source": source,
+                "created_at": created_at,
+                "id": entry_id,
+                "title": title,
+                "url": url,
+            }
+            for snapshot_id, source, created_at, entry_id, title, url in rows
+        ]
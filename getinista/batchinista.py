@@ -0,0 +1,86 @@
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+from .parsinista import Parsinista, output_extension
+from .cachinista import SessionCache
+from .archivista import SessionArchive
+
+@dataclass
+class ConversionResult():
+    input_file: Path
+    output_file: Path
+    input_size: int = 0
+    elapsed: float = 0.0
+    error: str | None = None
+
+def output_file_for(session_file: Path, output_dir: Path, output_format: str) -> Path:
+    # every profile has its own recovery.jsonlz4, so the profile dir name goes into the output name
+    profile_name = session_file.parent.parent.name
+    return output_dir / f"{profile_name}_{session_file.name}.{output_extension(output_format)}"
+
+def _convert_session(
+    input_file: Path,
+    output_file: Path,
+    cache: SessionCache | None,
+    output_format: str,
+    archive: SessionArchive | None
+) -> ConversionResult:
+    result = ConversionResult(input_file, output_file)
+    start = time.perf_counter()
+    try:
+        result.input_size = os.path.getsize(input_file)
+        Parsinista(
+            str(input_file), str(output_file), verbose=False, cache=cache, output_format=output_format, archive=archive
+        ).convert_and_save_session()
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.elapsed = time.perf_counter() - start
+    return result
+
+def print_summary(results: list[ConversionResult], elapsed: float) -> None:
+    failed = [r for r in results if r.error]
+    total_mb = sum(r.input_size for r in results if not r.error) / 2**20
+    print(f"\nConverted {len(results) - len(failed)}/{len(results)} session files in {elapsed:.2f}s")
+    if elapsed > 0:
+        print(f"Throughput: {len(results) / elapsed:.1f} files/s, {total_mb / elapsed:.1f} MB/s of compressed input")
+    for result in failed:
+        print(f"Failed: {result.input_file}: {result.error}")
+
+def convert_sessions(
+    session_files: list[Path],
+    output_dir: Path,
+    max_workers: int | None=None,
+    cache: SessionCache | None=None,
+    output_format: str="json",
+    archive: SessionArchive | None=None
+) -> list[ConversionResult]:
+    """
+    Converts every session file into output_dir using at most max_workers processes.
+
+    Errors don't stop the sweep, they are reported per file in the returned results.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures: dict[Future, Path] = {
+            executor.submit(
+                _convert_session, session_file, output_file_for(session_file, output_dir, output_format), cache, output_format, archive
+            ): session_file
+            for session_file in session_files
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # the worker process itself died
+                session_file = futures[future]
+                result = ConversionResult(session_file, output_file_for(session_file, output_dir, output_format), error=f"{type(e).__name__}: {e}")
+            status = f"FAILED ({result.error})" if result.error else f"ok ({result.elapsed:.2f}s)"
+            print(f"[{len(results) + 1}/{len(futures)}] {result.input_file} -> {result.output_file}: {status}")
+            results.append(result)
+    print_summary(results, time.perf_counter() - start)
+    return results
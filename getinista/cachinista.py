@@ -0,0 +1,104 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import Any
+
+from .modelista import json_default
+
+DEFAULT_CACHE_DIR = Path(os.getenv("XDG_CACHE_HOME", Path.home() / ".cache")) / "sessionista"
+DEFAULT_MAX_SIZE = 512 * 2**20
+
+def _file_digest(session_file: Path | str) -> str:
+    with open(session_file, "rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "blake2b").hexdigest()
+        # hashlib.file_digest is new in python 3.11
+        digest = hashlib.blake2b()
+        while chunk := f.read(2**20):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+class SessionCache():
+    """
+    On-disk cache of simplified sessions keyed on session file path, mtime and size.
+
+    With hash_content entries are keyed on the size and a digest of the file instead,
+    so copies, moves and touches still hit. Hashing costs a read of the compressed file,
+    files that haven't changed since they were last hashed by this cache aren't read again.
+    Entries are evicted least recently used first once the cache outgrows max_size bytes.
+    Caches with different namespaces can share a directory without seeing each other's entries.
+
+    get and put take the entry_path of the session file when the caller already has it,
+    so that a miss followed by a put stats and hashes the file only once.
+    """
+    def __init__(
+        self,
+        cache_dir: Path | str=DEFAULT_CACHE_DIR,
+        max_size: int=DEFAULT_MAX_SIZE,
+        hash_content: bool=False,
+        namespace: str="simplified"
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+        self.hash_content = hash_content
+        self.namespace = namespace
+        # (path, mtime, size) -> digest of the files hashed so far
+        self._digests: dict[str, str] = {}
+
+    def entry_path(self, session_file: Path | str) -> Path:
+        stat = os.stat(session_file)
+        key = f"{os.path.abspath(session_file)}:{stat.st_mtime_ns}:{stat.st_size}"
+        if self.hash_content:
+            digest = self._digests.get(key)
+            if digest is None:
+                digest = self._digests[key] = _file_digest(session_file)
+            key = f"{self.namespace}:{stat.st_size}:{digest}"
+        elif self.namespace != "simplified":
+            key = f"{self.namespace}:{key}"
+        return self.cache_dir / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def __contains__(self, session_file: Path | str) -> bool:
+        return self.entry_path(session_file).exists()
+
+    def get(self, session_file: Path | str, entry_path: Path | None=None) -> Any:
+        entry_path = entry_path or self.entry_path(session_file)
+        try:
+            with open(entry_path, encoding="utf-8") as f:
+                session_data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except json.JSONDecodeError:
+            entry_path.unlink(missing_ok=True)
+            return None
+        # mtime of an entry is its last use
+        os.utime(entry_path)
+        return session_data
+
+    def put(self, session_file: Path | str, session_data: Any, entry_path: Path | None=None) -> None:
+        entry_path = entry_path or self.entry_path(session_file)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # write and rename so that parallel exports never see half written entries
+        tmp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(session_data, f, ensure_ascii=False, separators=(",", ":"), default=json_default)
+        os.replace(tmp_path, entry_path)
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total_size = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
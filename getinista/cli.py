@@ -0,0 +1,246 @@
+import argparse
+import datetime
+import sys
+from pathlib import Path
+
+# only argparse and the modules a subcommand needs are imported,
+# lz4, sqlite3 and textual stay unloaded unless the subcommand uses them
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+def _add_pattern_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "-p", "--profile-pattern",
+        type=str,
+        default=".*",
+        help="Profiles will be filtered by this pattern using python regex",
+    )
+    parser.add_argument(
+        "-s", "--session-pattern",
+        type=str,
+        default=".*",
+        help="Session files will be filtered by this pattern using python regex",
+    )
+    parser.add_argument(
+        "-r", "--raw-patterns",
+        action="store_true",
+        help="By default cli adds '.*' at the beginning and end of the patterns"
+    )
+
+def run_list(args: argparse.Namespace) -> None:
+    from . import pathionista
+
+    if args.discovery_index:
+        from .cachinista import DEFAULT_CACHE_DIR
+        pathionista.enable_persistent_index(DEFAULT_CACHE_DIR / "discovery.json")
+
+    listing = pathionista.list_sessions(args.profile_pattern, args.session_pattern, args.raw_patterns)
+    pathionista.directory_index.save()
+    for profile, sessions in listing:
+        if args.paths:
+            for session in sessions:
+                print(session.path)
+            continue
+        print(f"{profile.path.name} | {len(sessions)} sessions")
+        for session in sessions:
+            modified = datetime.datetime.fromtimestamp(session.mtime_ns / 1e9).strftime("%Y-%m-%d %H:%M")
+            print(f"    {session.path.name}  {modified}  {session.size // 1024} KB")
+
+def run_export(args: argparse.Namespace) -> None:
+    from .main import export
+
+    export(args)
+
+def run_view(args: argparse.Namespace) -> None:
+    try:
+        from tui.tui import main as view
+    except ImportError as e:
+        print(f"The viewer needs textual: {e}")
+        sys.exit(1)
+
+    view([args.path, *args.query])
+
+def run_tags(args: argparse.Namespace) -> None:
+    from .editinista import load_tag_index
+
+    for tag, ids in load_tag_index(args.session).items():
+        if args.tag is None or tag == args.tag:
+            print(f"{tag}: {' '.join(ids)}")
+
+def run_prune(args: argparse.Namespace) -> None:
+    from .parsinista import FileExistsError, choose_windows
+    from .restorinista import prune_session_file
+    from .selectinista import Selection
+
+    def select(session_data) -> Selection | None:
+        if not (args.pick_windows or args.keep_only or args.drop):
+            return None
+        selection = choose_windows(session_data) if args.pick_windows else Selection(session_data)
+        if selection is None:
+            print("Nothing saved")
+            sys.exit(0)
+        if args.keep_only:
+            selection.keep_only_matching(args.keep_only)
+        for pattern in args.drop:
+            selection.select_matching(pattern, keep=False)
+        return selection
+
+    try:
+        prune_stats, write_stats = prune_session_file(
+            args.input, args.output, select, args.max_history, args.drop_closed, not args.no_validate
+        )
+    except FileExistsError as e:
+        print(f"{args.output}: {e.message}")
+        sys.exit(1)
+    print(
+        f"Dropped {prune_stats.windows} windows, {prune_stats.tabs} tabs, {prune_stats.entries} history entries, "
+        f"{prune_stats.closed_windows} closed windows and {prune_stats.closed_tabs} closed tabs"
+    )
+    print(
+        f"{write_stats.input_bytes / 2**10:.1f} KB -> {write_stats.output_bytes / 2**10:.1f} KB "
+        f"({write_stats.json_bytes / 2**10:.1f} KB of json), saved to {args.output}"
+    )
+
+def run_merge(args: argparse.Namespace) -> None:
+    import json
+    from .merginista import MergeStore, store_to_session
+
+    merge_store = MergeStore(args.store, args.dedupe_by)
+    stats = merge_store.merge(args.inputs)
+    print(f"Merged {stats.sources} files: {stats.unique_tabs} new unique tabs, {stats.duplicates} duplicates")
+    if stats.failed:
+        print(f"Failed to merge {len(stats.failed)} files, they're merged again on the next run")
+    if args.output_file_path:
+        with open(args.output_file_path, "x", encoding="utf-8") as f:
+            json.dump(store_to_session(args.store), f, ensure_ascii=False, indent=2)
+        print(f"Session is saved to {args.output_file_path}")
+
+def run_compact(args: argparse.Namespace) -> None:
+    import json
+    from .deltinista import load_session_chain
+
+    try:
+        session = load_session_chain(args.chain)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    with open(args.output_file_path, "x", encoding="utf-8") as f:
+        json.dump(session, f, ensure_ascii=False, indent=2)
+    print(f"Session is saved to {args.output_file_path}")
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="sessionista", description="Get, save and view firefox session files.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="List profiles and their session files without reading them")
+    _add_pattern_arguments(list_parser)
+    list_parser.add_argument(
+        "--paths",
+        action="store_true",
+        help="Print only the session file paths, one per line"
+    )
+    list_parser.add_argument(
+        "--discovery-index",
+        action="store_true",
+        help="Remember profile and session listings between runs, rescanning only directories that changed"
+    )
+    list_parser.set_defaults(func=run_list)
+
+    # the export arguments are defined by main, importing it doesn't load the conversion code
+    from .main import add_export_arguments
+
+    export_parser = subparsers.add_parser("export", help="Convert session files to simplified sessions")
+    add_export_arguments(export_parser)
+    export_parser.set_defaults(func=run_export)
+
+    view_parser = subparsers.add_parser("view", help="Open a session, packed session or archive in the TUI")
+    view_parser.add_argument(
+        "path",
+        type=str,
+        help="Simplified or packed session, session archive, or sessionstore file which is converted first unless cached"
+    )
+    view_parser.add_argument("query", nargs="*", default=[], help="Full text query when path is a session archive")
+    view_parser.set_defaults(func=run_view)
+
+    tags_parser = subparsers.add_parser("tags", help="List the tags given in the viewer, without loading the session")
+    tags_parser.add_argument("session", type=str, help="Simplified json session")
+    tags_parser.add_argument("--tag", type=str, default=None, help="Only list the ids with this tag")
+    tags_parser.set_defaults(func=run_tags)
+
+    prune_parser = subparsers.add_parser("prune", help="Write a smaller sessionstore file firefox can restore")
+    prune_parser.add_argument("input", type=str, help="Sessionstore file (jsonlz4)")
+    prune_parser.add_argument("output", type=str, help="Where to write the pruned sessionstore file")
+    prune_parser.add_argument(
+        "--max-history",
+        type=_positive_int,
+        default=None,
+        help="Keep at most this many history entries per tab, around the page it's showing"
+    )
+    prune_parser.add_argument(
+        "--drop-closed",
+        action="store_true",
+        help="Forget recently closed windows and tabs"
+    )
+    prune_parser.add_argument(
+        "--keep-only",
+        type=str,
+        default=None,
+        help="Keep only the tabs whose title or url match this regex, or @domain"
+    )
+    prune_parser.add_argument(
+        "--drop",
+        type=str,
+        action="append",
+        default=[],
+        help="Drop the tabs whose title or url match this regex, or @domain. Can be repeated."
+    )
+    prune_parser.add_argument(
+        "--pick-windows",
+        action="store_true",
+        help="Pick the windows and tabs to keep in the TUI, or answer prompts when not on a terminal"
+    )
+    prune_parser.add_argument(
+        "--no-validate",
+        action="store_true",
+        help="Don't read the written file back to check it"
+    )
+    prune_parser.set_defaults(func=run_prune)
+
+    merge_parser = subparsers.add_parser("merge", help="Merge session exports into a deduplicated store of tabs")
+    merge_parser.add_argument("store", type=str, help="Merge store (json lines), created if missing and appended to otherwise")
+    merge_parser.add_argument("inputs", nargs="*", help="Simplified session exports (json or packed)")
+    merge_parser.add_argument(
+        "--dedupe-by",
+        # merginista.DEDUPE_KEYS, written out so building the parser doesn't load lz4
+        choices=("history", "url"),
+        default="history",
+        help="Whether a tab's whole history or only its url makes it a duplicate"
+    )
+    merge_parser.add_argument(
+        "-o", "--output-file-path",
+        type=str,
+        default=None,
+        help="Also write the unique tabs as a simplified session"
+    )
+    merge_parser.set_defaults(func=run_merge)
+
+    compact_parser = subparsers.add_parser("compact", help="Rebuild a full simplified session from a base export and its deltas")
+    compact_parser.add_argument(
+        "chain",
+        nargs="+",
+        help="Full session export followed by its deltas in the order they were written"
+    )
+    compact_parser.add_argument("-o", "--output-file-path", type=str, required=True, help="Output file path")
+    compact_parser.set_defaults(func=run_compact)
+    return parser
+
+def main(argv: list[str] | None=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
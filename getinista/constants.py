@@ -1 +1,2 @@
 PYTHON_WILDCARD = ".*"
+OUTPUT_FORMATS = ("json", "packed", "packed-lz4")
@@ -0,0 +1,317 @@
+import os
+import copy
+import json
+import hashlib
+
+from .packinista import PackedSession, is_packed_session_file
+
+DELTA_FORMAT = "sessionista-delta"
+DELTA_VERSION = 3
+DELTA_EXTENSION = "json"
+# session file -> the chain of exports that rebuilds its last exported state
+LAST_EXPORTS_FILE = "last_exports.json"
+
+def _parse_id(item_id: str) -> tuple[int, ...]:
+    return tuple(int(idx) for idx in item_id.split(":"))
+
+def _entry_fields(entry: dict) -> dict:
+    return {"title": entry.get("title", ""), "url": entry.get("url", "")}
+
+def is_delta(data) -> bool:
+    return isinstance(data, dict) and data.get("format") == DELTA_FORMAT
+
+def tab_content_key(entries) -> str:
+    """
+    Hash of a tab's exact history, so a tab is found again wherever it moved.
+
+    Unlike merginista.tab_key nothing is normalized, the base's entries are reused as they are.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for entry in entries:
+        digest.update(entry.get("title", "").encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(entry.get("url", "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def _tab_id(entries, window_idx: int, tab_idx: int) -> str:
+    # entry ids are window:tab:entry, picked windows keep their original positions
+    if len(entries):
+        return entries[0]["id"].rsplit(":", 1)[0]
+    return f"{window_idx}:{tab_idx}"
+
+def _session_key(tab_keys: list[list[str]]) -> str:
+    # the tab keys of every window in order, so a delta is only applied to the session it was made for
+    digest = hashlib.blake2b(digest_size=8)
+    for keys in tab_keys:
+        digest.update(" ".join(keys).encode("ascii"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+def _base_window(keys: list[str], window_idx: int, old_windows_by_key: dict[str, list[int]]) -> int:
+    """
+    Position of the old window sharing the most tabs with a new one, 0 for none.
+    Its own position wins ties, so unchanged windows need no reference.
+    """
+    votes: dict[int, int] = {}
+    for key in keys:
+        for old_idx in old_windows_by_key.get(key, ()):
+            votes[old_idx] = votes.get(old_idx, 0) + 1
+    if not votes:
+        return 0
+    best = max(votes.values())
+    if votes.get(window_idx) == best:
+        return window_idx
+    return max(votes, key=votes.__getitem__)
+
+def diff_sessions(old: list[dict], new: list[dict]) -> dict:
+    """
+    Describes new as changes to the tabs of old, found by content with tab_content_key.
+
+    Every new window is based on the old window it shares the most tabs with and only
+    lists the positions of the tabs removed from it and the tabs added to it, with their
+    entries. A changed tab is removed and added again. The order of the kept tabs is
+    only written when it changed, so closing a tab costs one position however many
+    tabs come after it.
+    """
+    old_keys = [[tab_content_key(entries) for entries in window["tabs"]] for window in old]
+    old_windows_by_key: dict[str, list[int]] = {}
+    for old_idx, keys in enumerate(old_keys, start=1):
+        for key in dict.fromkeys(keys):
+            old_windows_by_key.setdefault(key, []).append(old_idx)
+
+    windows = []
+    used_tabs: set[tuple[int, int]] = set()
+    new_tabs = 0
+    for window_idx, window in enumerate(new, start=1):
+        keys = [tab_content_key(entries) for entries in window["tabs"]]
+        base_idx = _base_window(keys, window_idx, old_windows_by_key)
+        base_keys = old_keys[base_idx - 1] if base_idx else []
+        # the first old tab not yet matched for every key
+        unmatched: dict[str, list[int]] = {}
+        for position in range(len(base_keys), 0, -1):
+            unmatched.setdefault(base_keys[position - 1], []).append(position)
+
+        delta_window: dict = {}
+        if base_idx != window_idx:
+            delta_window["from"] = base_idx
+        kept = []
+        added = []
+        ids = {}
+        for position, (key, entries) in enumerate(zip(keys, window["tabs"]), start=1):
+            if unmatched.get(key):
+                kept.append(unmatched[key].pop())
+            else:
+                added.append({"position": position, "entries": [_entry_fields(entry) for entry in entries]})
+            tab_id = _tab_id(entries, window_idx, position)
+            if tab_id != f"{window_idx}:{position}":
+                # picked windows and tabs keep the ids of where they were
+                ids[str(position)] = tab_id
+        removed = sorted(position for positions in unmatched.values() for position in positions)
+        used_tabs.update((base_idx, position) for position in kept)
+        new_tabs += len(added)
+        if removed:
+            delta_window["removed"] = removed
+        if added:
+            delta_window["added"] = added
+        if kept != sorted(kept):
+            delta_window["order"] = kept
+        if ids:
+            delta_window["ids"] = ids
+        windows.append(delta_window)
+
+    return {
+        "format": DELTA_FORMAT,
+        "version": DELTA_VERSION,
+        "base": _session_key(old_keys),
+        "windows": windows,
+        "summary": {
+            "windows": len(new),
+            "old_windows": len(old),
+            "new_tabs": new_tabs,
+            "kept_tabs": sum(len(window["tabs"]) for window in new) - new_tabs,
+            "removed_tabs": sum(len(keys) for keys in old_keys) - len(used_tabs),
+        },
+    }
+
+def _apply_changes_delta(session: list[dict], delta: dict) -> list[dict]:
+    old_tabs = [window["tabs"] for window in session]
+    old_keys = [[tab_content_key(entries) for entries in tabs] for tabs in old_tabs]
+    if _session_key(old_keys) != delta["base"]:
+        raise ValueError("Delta doesn't apply: it was made for another session")
+
+    windows = []
+    for window_idx, delta_window in enumerate(delta["windows"], start=1):
+        base_idx = delta_window.get("from", window_idx)
+        base_tabs = old_tabs[base_idx - 1] if base_idx else []
+        if "order" in delta_window:
+            tabs = [base_tabs[position - 1] for position in delta_window["order"]]
+        else:
+            removed = set(delta_window.get("removed", ()))
+            tabs = [entries for position, entries in enumerate(base_tabs, start=1) if position not in removed]
+        tabs = [[_entry_fields(entry) for entry in entries] for entries in tabs]
+        for tab in delta_window.get("added", ()):
+            tabs.insert(tab["position"] - 1, tab["entries"])
+        ids = delta_window.get("ids", {})
+        window_tabs = []
+        for position, fields in enumerate(tabs, start=1):
+            tab_id = ids.get(str(position), f"{window_idx}:{position}")
+            window_tabs.append([
+                {"id": f"{tab_id}:{entry_idx}", **entry} for entry_idx, entry in enumerate(fields, start=1)
+            ])
+        windows.append({"tabs": window_tabs, "tab_count": len(window_tabs)})
+    return windows
+
+def _apply_keyed_delta(session: list[dict], delta: dict) -> list[dict]:
+    tabs_by_key = {}
+    for window in session:
+        for entries in window["tabs"]:
+            tabs_by_key.setdefault(tab_content_key(entries), entries)
+
+    windows = []
+    for tabs in delta["windows"]:
+        window_tabs = []
+        for tab in tabs:
+            if "key" in tab:
+                if tab["key"] not in tabs_by_key:
+                    raise ValueError(f"Delta doesn't apply: tab {tab['tab']} is not in the session it's applied to")
+                fields = [_entry_fields(entry) for entry in tabs_by_key[tab["key"]]]
+            else:
+                fields = tab["entries"]
+            window_tabs.append([
+                {"id": f"{tab['tab']}:{entry_idx}", **entry} for entry_idx, entry in enumerate(fields, start=1)
+            ])
+        windows.append({"tabs": window_tabs, "tab_count": len(window_tabs)})
+    return windows
+
+def _apply_delta_in_place(session: list[dict], delta: dict) -> None:
+    if not is_delta(delta):
+        raise ValueError("Not a sessionista delta")
+    if delta["version"] >= 3:
+        session[:] = _apply_changes_delta(session, delta)
+        return
+    if delta["version"] == 2:
+        # every tab either by key or with its entries
+        session[:] = _apply_keyed_delta(session, delta)
+        return
+    # version 1 deltas diffed by positional ids
+    removed, added, changed = delta["removed"], delta["added"], delta["changed"]
+
+    # deepest and last first so that the remaining indices stay valid
+    for entry_id in sorted(removed["entries"], key=_parse_id, reverse=True):
+        window_idx, tab_idx, entry_idx = _parse_id(entry_id)
+        del session[window_idx - 1]["tabs"][tab_idx - 1][entry_idx - 1]
+    for tab_id in sorted(removed["tabs"], key=_parse_id, reverse=True):
+        window_idx, tab_idx = _parse_id(tab_id)
+        del session[window_idx - 1]["tabs"][tab_idx - 1]
+    for window_id in sorted(removed["windows"], key=_parse_id, reverse=True):
+        del session[_parse_id(window_id)[0] - 1]
+
+    for window_id in sorted(added["windows"], key=_parse_id):
+        if _parse_id(window_id)[0] != len(session) + 1:
+            raise ValueError(f"Delta doesn't apply: window {window_id} is not the next window")
+        session.append({"tabs": [], "tab_count": 0})
+    for tab_id in sorted(added["tabs"], key=_parse_id):
+        window_idx, tab_idx = _parse_id(tab_id)
+        tabs = session[window_idx - 1]["tabs"]
+        if tab_idx != len(tabs) + 1:
+            raise ValueError(f"Delta doesn't apply: tab {tab_id} is not the next tab")
+        tabs.append([])
+    for entry_id in sorted(added["entries"], key=_parse_id):
+        window_idx, tab_idx, entry_idx = _parse_id(entry_id)
+        entries = session[window_idx - 1]["tabs"][tab_idx - 1]
+        if entry_idx != len(entries) + 1:
+            raise ValueError(f"Delta doesn't apply: entry {entry_id} is not the next entry")
+        entries.append({"id": entry_id, **added["entries"][entry_id]})
+    for entry_id, fields in changed["entries"].items():
+        window_idx, tab_idx, entry_idx = _parse_id(entry_id)
+        session[window_idx - 1]["tabs"][tab_idx - 1][entry_idx - 1] = {"id": entry_id, **fields}
+
+    for window in session:
+        window["tab_count"] = len(window["tabs"])
+
+def apply_delta(base: list[dict], delta: dict) -> list[dict]:
+    session = copy.deepcopy(base)
+    _apply_delta_in_place(session, delta)
+    return session
+
+def compact_session(base: list[dict], deltas: list[dict]) -> list[dict]:
+    """
+    Rebuilds the full session at the end of a chain of deltas.
+    """
+    session = copy.deepcopy(base)
+    for delta in deltas:
+        _apply_delta_in_place(session, delta)
+    return session
+
+def load_session_chain(paths: list[str]) -> list[dict]:
+    """
+    Loads a full simplified session followed by the deltas exported on top of it.
+    """
+    loaded = []
+    for path in paths:
+        if is_packed_session_file(path):
+            packed = PackedSession(path)
+            try:
+                loaded.append(packed.to_simplified())
+            finally:
+                packed.close()
+            continue
+        with open(path, encoding="utf-8") as f:
+            loaded.append(json.load(f))
+    base, deltas = loaded[0], loaded[1:]
+    if is_delta(base):
+        raise ValueError(f"{paths[0]} is a delta, the chain has to start with a full session")
+    for path, delta in zip(paths[1:], deltas):
+        if not is_delta(delta):
+            raise ValueError(f"{path} is not a sessionista delta")
+    return compact_session(base, deltas)
+
+def describe_delta(delta: dict) -> str:
+    if delta["version"] >= 2:
+        summary = delta["summary"]
+        return (
+            f"windows {summary['old_windows']} -> {summary['windows']}, "
+            f"tabs +{summary['new_tabs']}/-{summary['removed_tabs']} ({summary['kept_tabs']} unchanged)"
+        )
+    removed, added, changed = delta["removed"], delta["added"], delta["changed"]
+    return (
+        f"windows +{len(added['windows'])}/-{len(removed['windows'])}, "
+        f"tabs +{len(added['tabs'])}/-{len(removed['tabs'])}, "
+        f"entries +{len(added['entries'])}/-{len(removed['entries'])}/~{len(changed['entries'])}"
+    )
+
+def _load_pointers(pointer_file: str) -> dict[str, list[str]]:
+    try:
+        with open(pointer_file, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def last_export_chain(pointer_file: str, session_file: str) -> list[str] | None:
+    """
+    The base export and deltas last written for session_file, if they're all still there.
+    """
+    chain = _load_pointers(pointer_file).get(os.path.abspath(session_file))
+    if not chain or not all(os.path.exists(path) for path in chain):
+        return None
+    return chain
+
+def record_export(pointer_file: str, session_file: str, output_file: str, delta: bool) -> None:
+    """
+    Points session_file at output_file, appended to its chain for a delta or starting a new chain otherwise.
+    """
+    pointers = _load_pointers(pointer_file)
+    key = os.path.abspath(session_file)
+    chain = pointers.get(key, []) if delta else []
+    pointers[key] = chain + [os.path.abspath(output_file)]
+    os.makedirs(os.path.dirname(pointer_file) or ".", exist_ok=True)
+    tmp_file = pointer_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(pointers, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_file, pointer_file)
+
+if __name__ == "__main__":
+    import sys
+    from .cli import main
+    main(["compact", *sys.argv[1:]])
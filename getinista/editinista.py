@@ -0,0 +1,245 @@
+import os
+import json
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+from .merginista import iter_session_file_windows
+from .packinista import is_packed_session_file
+
+OPS = ("mark", "unmark", "tag", "untag", "delete", "restore")
+LOG_SUFFIX = ".ops.jsonl"
+TAG_INDEX_SUFFIX = ".tags.json"
+
+def log_file_for(session_file: str) -> str:
+    return session_file + LOG_SUFFIX
+
+def tag_index_file_for(session_file: str) -> str:
+    return session_file + TAG_INDEX_SUFFIX
+
+def _parent_id(item_id: str) -> str:
+    return item_id.rsplit(":", 1)[0]
+
+def _id_prefixes(item_id: str) -> Iterator[str]:
+    # "2:5:3" is inside tab "2:5" which is inside window "2"
+    parts = item_id.split(":")
+    for depth in range(1, len(parts) + 1):
+        yield ":".join(parts[:depth])
+
+def tab_id(entries: Sequence[Mapping]) -> str | None:
+    return _parent_id(entries[0]["id"]) if len(entries) else None
+
+def window_id(window: Mapping) -> str | None:
+    for entries in window["tabs"]:
+        if len(entries):
+            return _parent_id(_parent_id(entries[0]["id"]))
+    return None
+
+def item_id(session_data: Sequence, path: tuple) -> str | None:
+    """
+    The id of the window, tab or entry shown at path of a simplified session, None for anything else.
+
+    Windows and tabs go by the prefixes of their entry ids, so ids stay the same when
+    the session is saved without some of its windows, tabs or entries.
+    """
+    try:
+        window = session_data[path[0]]
+        if len(path) == 1:
+            return window_id(window)
+        if path[1] != "tabs":
+            return None
+        if len(path) == 3:
+            return tab_id(window["tabs"][path[2]])
+        if len(path) == 4:
+            return window["tabs"][path[2]][path[3]]["id"]
+    except (KeyError, IndexError, TypeError):
+        pass
+    return None
+
+def load_tag_index(session_file: str) -> dict[str, list[str]]:
+    """
+    Tag -> ids of the tagged windows, tabs and entries, read without loading the session.
+    """
+    try:
+        with open(tag_index_file_for(session_file), encoding="utf-8") as f:
+            return json.load(f)["tags"]
+    except FileNotFoundError:
+        return {}
+
+def _replace_file(file_path: str, text: str) -> None:
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, file_path)
+
+@dataclass
+class SaveStats():
+    windows: int = 0
+    tabs: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+class EditLog():
+    """
+    Marks, tags and deletions of the windows, tabs and entries of a simplified json session.
+
+    Every operation is appended to a json lines log next to the session as
+        {"op": "tag", "id": "2:5", "tag": "read later"}
+    and the session file itself is only rewritten by save(), once for all of them.
+    Tags are also kept in a small tag index next to the session, see load_tag_index.
+    """
+    def __init__(self, session_file: str):
+        if is_packed_session_file(session_file):
+            # packed entry ids follow from positions, they wouldn't survive deletions
+            raise ValueError("Only json sessions can be edited")
+        self.session_file = session_file
+        self.log_file = log_file_for(session_file)
+        self.tag_index_file = tag_index_file_for(session_file)
+        self.marked: dict[str, None] = {}
+        self.tags: dict[str, dict[str, None]] = {}
+        self.deleted: set[str] = set()
+        # where the last line of the log is cut off, if it is
+        self._cut_off_at: int | None = None
+        self._replay()
+
+    def _replay(self) -> None:
+        try:
+            f = open(self.log_file, "rb")
+        except FileNotFoundError:
+            return
+        offset = 0
+        with f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # the last line of a log cut short by a crash, cut off before the next record
+                    self._cut_off_at = offset
+                    break
+                offset += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self._apply(record)
+
+    def _apply(self, record: dict) -> None:
+        op, item_id = record["op"], record["id"]
+        if op == "mark":
+            self.marked[item_id] = None
+        elif op == "unmark":
+            self.marked.pop(item_id, None)
+        elif op == "tag":
+            self.tags.setdefault(item_id, {})[record["tag"]] = None
+        elif op == "untag":
+            item_tags = self.tags.get(item_id, {})
+            item_tags.pop(record["tag"], None)
+            if not item_tags:
+                self.tags.pop(item_id, None)
+        elif op == "delete":
+            self.deleted.add(item_id)
+        elif op == "restore":
+            self.deleted.discard(item_id)
+
+    def record(self, op: str, item_id: str, tag: str | None=None) -> None:
+        if op not in OPS:
+            raise ValueError(f"Unknown operation {op}, expected one of {OPS}")
+        record: dict[str, Any] = {"op": op, "id": item_id}
+        if op in ("tag", "untag"):
+            if not tag:
+                raise ValueError(f"{op} needs a tag")
+            record["tag"] = tag
+        if self._cut_off_at is not None:
+            os.truncate(self.log_file, self._cut_off_at)
+            self._cut_off_at = None
+        with open(self.log_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+        self._apply(record)
+        if op in ("tag", "untag"):
+            self.write_tag_index()
+
+    def is_marked(self, item_id: str) -> bool:
+        return item_id in self.marked
+
+    def is_deleted(self, item_id: str) -> bool:
+        return any(prefix in self.deleted for prefix in _id_prefixes(item_id))
+
+    def tags_of(self, item_id: str) -> list[str]:
+        return list(self.tags.get(item_id, ()))
+
+    def tag_index(self) -> dict[str, list[str]]:
+        index: dict[str, list[str]] = {}
+        for item_id, item_tags in self.tags.items():
+            for tag in item_tags:
+                index.setdefault(tag, []).append(item_id)
+        return index
+
+    def write_tag_index(self) -> None:
+        _replace_file(self.tag_index_file, json.dumps({"tags": self.tag_index()}, ensure_ascii=False, indent=2))
+
+    def _kept_window(self, window: Mapping, stats: SaveStats) -> Mapping | None:
+        if (window_item_id := window_id(window)) is not None and self.is_deleted(window_item_id):
+            stats.windows += 1
+            return None
+        tabs = []
+        for entries in window["tabs"]:
+            if (tab_item_id := tab_id(entries)) is not None and self.is_deleted(tab_item_id):
+                stats.tabs += 1
+                continue
+            kept_entries = [entry for entry in entries if not self.is_deleted(entry["id"])]
+            stats.entries += len(entries) - len(kept_entries)
+            if kept_entries or not entries:
+                tabs.append(kept_entries)
+            else:
+                stats.tabs += 1
+        if not tabs and len(window["tabs"]):
+            stats.windows += 1
+            return None
+        return {**window, "tabs": tabs, "tab_count": len(tabs)}
+
+    def save(self, destination: str | None=None) -> SaveStats:
+        """
+        Writes the session without the deleted windows, tabs and entries to destination,
+        back over the session file by default, reading and writing one window at a time.
+
+        The log is then compacted to the marks and tags of what's left.
+        """
+        destination = destination or self.session_file
+        stats = SaveStats()
+        tmp_path = destination + ".tmp"
+        # the same layout json.dump(indent=2) gives the whole session
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            separator = "\n  "
+            for window in iter_session_file_windows(self.session_file):
+                kept = self._kept_window(window, stats)
+                if kept is None:
+                    continue
+                f.write(separator)
+                f.write(json.dumps(kept, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+                separator = ",\n  "
+            f.write("\n]" if separator != "\n  " else "]")
+        stats.bytes = os.path.getsize(tmp_path)
+        os.replace(tmp_path, destination)
+
+        if destination == self.session_file:
+            self._compact()
+        return stats
+
+    def _compact(self) -> None:
+        records = []
+        for item_id in self.marked:
+            if not self.is_deleted(item_id):
+                records.append({"op": "mark", "id": item_id})
+        for item_id, item_tags in self.tags.items():
+            if not self.is_deleted(item_id):
+                records.extend({"op": "tag", "id": item_id, "tag": tag} for tag in item_tags)
+        self.marked = {}
+        self.tags = {}
+        self.deleted = set()
+        self._cut_off_at = None
+        for record in records:
+            self._apply(record)
+        if records or os.path.exists(self.log_file):
+            _replace_file(self.log_file, "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+        if self.tags or os.path.exists(self.tag_index_file):
+            self.write_tag_index()
@@ -1,14 +1,24 @@
+import os
 import argparse
 import datetime
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING
 
-import pathionista
-from parsinista import Parsinista
+# lz4, sqlite3 and the conversion code are only imported once a command needs them,
+# so that --help and listing profiles start fast
+from . import pathionista
+from .constants import OUTPUT_FORMATS
+from .cachinista import DEFAULT_CACHE_DIR
+from .metrinista import Profiler, set_metrics_file
+
+if TYPE_CHECKING:
+    from .cachinista import SessionCache
+    from .archivista import SessionArchive
 
 PYTHON_WILDCARD = ".*"
 
-def main():
-    parser = argparse.ArgumentParser(description="CLI tool for getting and saving firefox session files.")
-    
+def add_export_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         "-p","--profile-pattern", 
         type=str, 
@@ -30,33 +40,266 @@ def main():
         "-o","--output-file-path", 
         type=str,
         default=None,
-        help="Output file path. Defaults to timestamp + postfix."
+        help="Output file path (output directory with --batch and --watch). Defaults to timestamp + postfix."
     )
     parser.add_argument(
         "--pick-windows-to-save",
         action="store_true",
-        help="Whether to ask the user to pick windows to be saved"
+        help="Pick the windows and tabs to save in the TUI, or answer prompts when not on a terminal"
+    )
+    parser.add_argument(
+        "-b", "--batch",
+        action="store_true",
+        help="Convert every session file of every matching profile without asking"
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes for --batch. Defaults to the number of CPUs."
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="With --batch, overlap reading, converting and writing of the session files"
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=4,
+        help="Session files --pipeline holds between two stages, bounds its memory use"
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reuse simplified sessions of session files that haven't changed since they were last converted"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=str(DEFAULT_CACHE_DIR),
+        help="Directory of the conversion cache"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=512,
+        help="Size limit of the conversion cache in MB"
+    )
+    parser.add_argument(
+        "--hash-content",
+        action="store_true",
+        help="Key the conversion cache on a hash of the session file content instead of its path and mtime"
+    )
+    parser.add_argument(
+        "--delta-against",
+        type=str,
+        nargs="+",
+        default=None,
+        help="Save only the changes since the last export, given as its base export followed by the deltas written on top of it"
+    )
+    parser.add_argument(
+        "-d", "--delta",
+        action="store_true",
+        help="Save only the changes since the last --delta export of the chosen session file, which is remembered in --cache-dir. The first one saves the full session"
+    )
+    parser.add_argument(
+        "-w", "--watch",
+        action="store_true",
+        help="Keep running and export session files of the chosen profile whenever they change"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="Polling interval in seconds for --watch when inotify is not available"
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=2.0,
+        help="Seconds a changed session file has to stay unchanged before --watch exports it"
+    )
+    parser.add_argument(
+        "-f", "--format",
+        choices=OUTPUT_FORMATS,
+        default="json",
+        help="Output format. 'packed' is a compact binary format that the TUI opens without parsing, 'packed-lz4' compresses it"
+    )
+    parser.add_argument(
+        "--archive",
+        type=str,
+        default=None,
+        help="Also add every converted session to this SQLite archive with full text search on titles and urls"
+    )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help="Show window and tab counts and top domains of every session when choosing one"
+    )
+    parser.add_argument(
+        "--discovery-index",
+        action="store_true",
+        help="Remember profile and session listings between runs, rescanning only directories that changed"
+    )
+    parser.add_argument(
+        "--metrics",
+        type=str,
+        default=None,
+        help="Append wall time, bytes and peak memory of every pipeline stage to this file as json lines. Tracing memory slows the export down"
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="REPORT_FILE",
+        help="Print every stage as it finishes and a cProfile and tracemalloc report at the end, into REPORT_FILE if given"
+    )
+
+def main(argv: list[str] | None=None):
+    parser = argparse.ArgumentParser(description="CLI tool for getting and saving firefox session files.")
+    add_export_arguments(parser)
+    export(parser.parse_args(argv))
+
+def export(args: argparse.Namespace):
+    if args.metrics:
+        set_metrics_file(args.metrics)
+
+    if args.profile is not None:
+        profiler = Profiler(args.profile or None)
+        profiler.start()
+        try:
+            run(args)
+        finally:
+            profiler.stop()
+    else:
+        run(args)
+
+def run(args: argparse.Namespace):
+    from .cachinista import SessionCache
+    from .archivista import SessionArchive
+
+    if args.discovery_index:
+        pathionista.enable_persistent_index(Path(args.cache_dir) / "discovery.json")
+
+    cache = None
+    if args.cache:
+        cache = SessionCache(args.cache_dir, args.cache_size * 2**20, args.hash_content)
+
+    archive = SessionArchive(args.archive) if args.archive else None
 
-    session_file_path = pathionista.get_session_file(args.profile_pattern, args.session_pattern, args.raw_patterns)
+    if args.batch:
+        run_batch(args, cache, archive)
+        return
+
+    if args.watch:
+        run_watch(args, cache, archive)
+        return
+
+    preview_cache = None
+    if args.preview and args.cache:
+        preview_cache = SessionCache(args.cache_dir, args.cache_size * 2**20, args.hash_content, namespace="preview")
+    session_file_path = pathionista.get_session_file(
+        args.profile_pattern, args.session_pattern, args.raw_patterns, args.preview, preview_cache
+    )
+    pathionista.directory_index.save()
     if not session_file_path:
         print("No session file selected")
         return
 
+    from .parsinista import Parsinista, output_extension
+    from .deltinista import DELTA_EXTENSION, LAST_EXPORTS_FILE, last_export_chain, load_session_chain, record_export
+
+    pointer_file = str(Path(args.cache_dir) / LAST_EXPORTS_FILE)
+    chain = args.delta_against
+    if args.delta and not chain:
+        chain = last_export_chain(pointer_file, session_file_path)
+        if chain is None:
+            print(f"No earlier export of {session_file_path} found, saving the full session")
+    delta_base = load_session_chain(chain) if chain else None
+
     output_file_path = args.output_file_path
-    if output_file_path == None:
-        output_file_path = generate_filename()
+    if output_file_path == None and delta_base is not None:
+        # deltas are json whatever the output format
+        output_file_path = generate_filename(postfix="firefox_session_delta", extension=DELTA_EXTENSION)
+    elif output_file_path == None:
+        output_file_path = generate_filename(extension=output_extension(args.format))
+
+    parser = Parsinista(session_file_path, output_file_path, cache=cache, output_format=args.format, archive=archive)
+    parser.convert_and_save_session(args.pick_windows_to_save, delta_base)
+    if not os.path.exists(output_file_path):
+        # nothing was picked
+        return
+    if not (args.delta or args.delta_against):
+        # exports are only tracked for deltas
+        return
+    if delta_base is not None and chain != last_export_chain(pointer_file, session_file_path):
+        # a delta against a hand picked chain starts tracking from that chain
+        for position, path in enumerate(chain):
+            record_export(pointer_file, session_file_path, path, delta=position > 0)
+    record_export(pointer_file, session_file_path, output_file_path, delta=delta_base is not None)
+
+
+def run_batch(args, cache: "SessionCache | None"=None, archive: "SessionArchive | None"=None):
+    session_files = pathionista.find_session_files(args.profile_pattern, args.session_pattern, args.raw_patterns)
+    pathionista.directory_index.save()
+    if not session_files:
+        print("No session files found")
+        return
+
+    output_dir = args.output_file_path
+    if output_dir == None:
+        output_dir = generate_filename(postfix="firefox_sessions", extension=None)
+
+    if args.pipeline:
+        from .pipelinista import convert_sessions_pipelined
+        results = convert_sessions_pipelined(
+            session_files, Path(output_dir), args.jobs, cache, args.format, archive, args.queue_size
+        )
+    else:
+        from .batchinista import convert_sessions
+        results = convert_sessions(session_files, Path(output_dir), args.jobs, cache, args.format, archive)
+    if any(r.error for r in results):
+        sys.exit(1)
+
+
+def run_watch(args, cache: "SessionCache | None"=None, archive: "SessionArchive | None"=None):
+    from .watchinista import SessionWatcher
+    from .parsinista import Parsinista, output_extension
+
+    profile = pathionista.choose_profile(args.profile_pattern, args.raw_patterns)
+    pathionista.directory_index.save()
+    if profile is None:
+        print("No profile selected")
+        return
+
+    output_dir = Path(args.output_file_path or ".")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    session_pattern = args.session_pattern
+    if session_pattern != PYTHON_WILDCARD and not args.raw_patterns:
+        session_pattern = pathionista.add_wildcards_to_pattern(session_pattern)
+
+    def export(session_file: Path):
+        output_file_path = output_dir / generate_filename(
+            postfix=f"{profile.path.name}_{session_file.name}", extension=output_extension(args.format)
+        )
+        Parsinista(
+            str(session_file), str(output_file_path), verbose=False, cache=cache, output_format=args.format, archive=archive
+        ).convert_and_save_session()
+        print(f"{session_file.name} changed, saved to {output_file_path}")
 
-    parser = Parsinista(session_file_path, output_file_path)
-    parser.convert_and_save_session(args.pick_windows_to_save)
+    watcher = SessionWatcher(profile.path / "sessionstore-backups", export, session_pattern, args.interval, args.settle)
+    watcher.run()
 
 
-def generate_filename(postfix="firefox_session", extension="json"):
+def generate_filename(postfix="firefox_session", extension: str | None="json"):
     # Get current timestamp in YYYYMMDD_HHMMSS format
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     # Construct the filename
-    filename = f"{timestamp}_{postfix}.{extension}"
+    filename = f"{timestamp}_{postfix}"
+    if extension:
+        filename += f".{extension}"
     return filename
 
 if __name__ == "__main__":
@@ -0,0 +1,214 @@
+import os
+import sys
+import json
+import hashlib
+from dataclasses import dataclass, field
+from typing import Iterator
+from urllib.parse import urlsplit, urlunsplit
+
+from .parsinista import iter_json_array_file
+from .packinista import PackedSession, is_packed_session_file
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+DEDUPE_KEYS = ("history", "url")
+
+def normalize_url(url: str) -> str:
+    """
+    Lowercases scheme and host, drops default ports, fragments and trailing slashes.
+    """
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    if not parts.netloc:
+        return urlunsplit((parts.scheme.lower(), "", parts.path, parts.query, ""))
+    netloc = (parts.hostname or "").lower()
+    if port is not None and port != DEFAULT_PORTS.get(parts.scheme.lower()):
+        netloc += f":{port}"
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), netloc, path, parts.query, ""))
+
+def tab_key(entries: list, dedupe_by: str="history") -> str:
+    """
+    Hash of the tab's normalized history, or of its last url only with dedupe_by="url".
+    """
+    urls = [normalize_url(entry.get("url", "")) for entry in entries]
+    if dedupe_by == "url":
+        urls = urls[-1:]
+    return hashlib.blake2b("\n".join(urls).encode("utf-8"), digest_size=16).hexdigest()
+
+def iter_session_file_windows(file_path: str) -> Iterator:
+    """
+    Windows of a simplified session export, decoded one at a time.
+    """
+    if is_packed_session_file(file_path):
+        session = PackedSession(file_path)
+        try:
+            yield from session
+        finally:
+            session.close()
+        return
+    with open(file_path, encoding="utf-8") as f:
+        yield from iter_json_array_file(f)
+
+@dataclass
+class MergeStats():
+    sources: int = 0
+    tabs: int = 0
+    unique_tabs: int = 0
+    failed: list[str] = field(default_factory=list)
+
+    @property
+    def duplicates(self) -> int:
+        return self.tabs - self.unique_tabs
+
+class MergeStore():
+    """
+    Append-only json lines store of unique tabs merged from many session exports.
+
+    Lines are one of
+        {"type": "source", "source": id, "path": ..., "pending": true}
+        {"type": "tab", "key": ..., "source": id, "window": w, "tab": t, "entries": [...]}
+        {"type": "duplicate", "key": ..., "source": id, "window": w, "tab": t}
+        {"type": "complete", "source": id}
+    so every tab keeps where it came from and where else it was seen.
+    A source only counts once its complete line is written, the lines of a file that
+    failed halfway are ignored and the file is merged again on the next run. So is a
+    line cut off by a crash, it's the last one and has no newline, and it's cut from
+    the store before anything is appended.
+    Only the set of tab keys is kept in memory, sources are streamed window by window.
+    """
+    def __init__(self, store_path: str, dedupe_by: str="history"):
+        if dedupe_by not in DEDUPE_KEYS:
+            raise ValueError(f"Unknown dedupe key {dedupe_by}, expected one of {DEDUPE_KEYS}")
+        self.store_path = store_path
+        self.dedupe_by = dedupe_by
+        self.keys: set[bytes] = set()
+        self.merged_paths: set[str] = set()
+        self.next_source = 1
+        # where the last line is cut off, if it is
+        self.cut_off_at: int | None = None
+        if os.path.exists(store_path):
+            self._load_existing()
+
+    def _load_existing(self) -> None:
+        # keys and paths of sources still waiting for their complete line
+        pending: dict[int, tuple[str, list[bytes]]] = {}
+        offset = 0
+        with open(self.store_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    self.cut_off_at = offset
+                    break
+                offset += len(line)
+                record = json.loads(line)
+                source = record["source"]
+                if record["type"] == "tab":
+                    digest = bytes.fromhex(record["key"])
+                    if source in pending:
+                        pending[source][1].append(digest)
+                    else:
+                        self.keys.add(digest)
+                elif record["type"] == "source":
+                    self.next_source = max(self.next_source, source + 1)
+                    if record.get("pending"):
+                        pending[source] = (record["path"], [])
+                    else:
+                        # stores written before sources were marked complete
+                        self.merged_paths.add(record["path"])
+                elif record["type"] == "complete" and source in pending:
+                    path, digests = pending.pop(source)
+                    self.merged_paths.add(path)
+                    self.keys.update(digests)
+
+    def merge(self, file_paths: list[str]) -> MergeStats:
+        """
+        Merges every file that isn't merged yet. A file that can't be read is reported
+        in the stats and skipped, the others are still merged.
+        """
+        stats = MergeStats()
+        if self.cut_off_at is not None:
+            os.truncate(self.store_path, self.cut_off_at)
+            self.cut_off_at = None
+        with open(self.store_path, "a", encoding="utf-8") as store:
+            for file_path in file_paths:
+                path = os.path.abspath(file_path)
+                if path in self.merged_paths:
+                    print(f"Skipping {file_path}, it's already merged")
+                    continue
+                try:
+                    self._merge_file(store, path, stats)
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    print(f"Failed to merge {file_path}: {type(e).__name__}: {e}")
+                    stats.failed.append(file_path)
+        return stats
+
+    def _write(self, store, record: dict) -> None:
+        store.write(json.dumps(record, ensure_ascii=False))
+        store.write("\n")
+
+    def _merge_file(self, store, path: str, stats: MergeStats) -> None:
+        source = self.next_source
+        self.next_source += 1
+        self._write(store, {"type": "source", "source": source, "path": path, "pending": True})
+        added_keys: list[bytes] = []
+        tabs = 0
+        try:
+            for window_idx, window in enumerate(iter_session_file_windows(path), start=1):
+                for tab_idx, entries in enumerate(window["tabs"], start=1):
+                    entries = [dict(entry) for entry in entries]
+                    key = tab_key(entries, self.dedupe_by)
+                    digest = bytes.fromhex(key)
+                    tabs += 1
+                    record = {"type": "duplicate", "key": key, "source": source, "window": window_idx, "tab": tab_idx}
+                    if digest not in self.keys:
+                        self.keys.add(digest)
+                        added_keys.append(digest)
+                        record["type"] = "tab"
+                        record["entries"] = entries
+                    self._write(store, record)
+        except BaseException:
+            # the lines already written stay behind without a complete line and are ignored
+            self.keys.difference_update(added_keys)
+            raise
+        self._write(store, {"type": "complete", "source": source})
+        store.flush()
+        self.merged_paths.add(path)
+        stats.sources += 1
+        stats.tabs += tabs
+        stats.unique_tabs += len(added_keys)
+
+def store_to_session(store_path: str) -> list[dict]:
+    """
+    Simplified session with a window per source holding the unique tabs first seen there.
+    """
+    windows: dict[int, list] = {}
+    incomplete: set[int] = set()
+    with open(store_path, encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                # cut off by a crash, see MergeStore
+                continue
+            record = json.loads(line)
+            if record["type"] == "source":
+                windows[record["source"]] = []
+                if record.get("pending"):
+                    incomplete.add(record["source"])
+            elif record["type"] == "tab":
+                windows[record["source"]].append(record["entries"])
+            elif record["type"] == "complete":
+                incomplete.discard(record["source"])
+    for source in incomplete:
+        del windows[source]
+    session_data = []
+    for window_idx, tabs in enumerate((tabs for tabs in windows.values() if tabs), start=1):
+        for tab_idx, entries in enumerate(tabs, start=1):
+            for entry_idx, entry in enumerate(entries, start=1):
+                entry["id"] = f"{window_idx}:{tab_idx}:{entry_idx}"
+        session_data.append({"tabs": tabs, "tab_count": len(tabs)})
+    return session_data
+
+if __name__ == "__main__":
+    from .cli import main
+    main(["merge", *sys.argv[1:]])
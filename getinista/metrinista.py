@@ -0,0 +1,194 @@
+import os
+import sys
+import json
+import time
+import threading
+import tracemalloc
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Iterator
+
+from .logginista import logger
+
+# exported so that batch worker processes write to the same metrics file
+METRICS_FILE_ENV = "SESSIONISTA_METRICS"
+
+_metrics_lock = threading.Lock()
+_local = threading.local()
+# tracemalloc's peak is process wide and spans reset it, so the peak of the whole run is kept here
+_peak_lock = threading.Lock()
+_run_peak = 0
+# threads with an unfinished span, the peak is only reset when no other thread is measuring
+_active_threads: dict[int, int] = {}
+
+@dataclass
+class Span():
+    """
+    Wall time, bytes processed and peak traced memory of one pipeline stage.
+
+    peak_bytes is only known while tracemalloc is tracing, which a metrics file or Profiler turns on.
+    """
+    stage: str
+    source: str | None = None
+    seconds: float = 0.0
+    bytes: int | None = None
+    peak_bytes: int | None = None
+    extra: dict = field(default_factory=dict)
+    _start_memory: int = field(default=0, repr=False)
+    _peak_seen: int = field(default=0, repr=False)
+
+    def as_record(self) -> dict:
+        record = {k: v for k, v in asdict(self).items() if not k.startswith("_") and k != "extra"}
+        record.update(self.extra)
+        record["pid"] = os.getpid()
+        record["time"] = time.time()
+        return record
+
+def _span_stack() -> list[Span]:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+def set_metrics_file(metrics_file: str | None) -> None:
+    """
+    Appends a json line per finished span to metrics_file, None turns it off.
+    """
+    if metrics_file is None:
+        os.environ.pop(METRICS_FILE_ENV, None)
+    else:
+        os.environ[METRICS_FILE_ENV] = os.path.abspath(metrics_file)
+
+def _write_metrics(span: Span) -> None:
+    metrics_file = os.environ.get(METRICS_FILE_ENV)
+    if not metrics_file:
+        return
+    line = json.dumps(span.as_record()) + "\n"
+    # a single O_APPEND write keeps lines from different processes apart
+    with _metrics_lock:
+        fd = os.open(metrics_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+
+@contextmanager
+def span(stage: str, source: str | None=None, bytes: int | None=None) -> Iterator[Span]:
+    """
+    Measures the block as one stage. The block may fill in bytes and extra on the yielded span.
+
+    Spans nest: a stage's peak memory includes the peaks of the stages inside it.
+    While spans run on other threads, like pipeline stages do, the peak isn't reset
+    and a span's peak_bytes is approximate, it may include peaks from before it started.
+    """
+    current = Span(stage, source, bytes=bytes)
+    stack = _span_stack()
+    # started here rather than in set_metrics_file so that batch worker processes trace too
+    if os.environ.get(METRICS_FILE_ENV) and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    tracing = tracemalloc.is_tracing()
+    thread_id = threading.get_ident()
+    with _peak_lock:
+        if tracing:
+            memory, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]._peak_seen = max(stack[-1]._peak_seen, peak)
+            if _active_threads.keys() <= {thread_id}:
+                _note_run_peak(peak)
+                tracemalloc.reset_peak()
+            current._start_memory = memory
+        _active_threads[thread_id] = _active_threads.get(thread_id, 0) + 1
+    stack.append(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.seconds = time.perf_counter() - start
+        stack.pop()
+        with _peak_lock:
+            if _active_threads[thread_id] == 1:
+                del _active_threads[thread_id]
+            else:
+                _active_threads[thread_id] -= 1
+        if tracing:
+            peak = max(current._peak_seen, tracemalloc.get_traced_memory()[1])
+            current.peak_bytes = peak - current._start_memory
+            if stack:
+                stack[-1]._peak_seen = max(stack[-1]._peak_seen, peak)
+        _log_span(current)
+        _write_metrics(current)
+
+def _note_run_peak(peak: int) -> None:
+    global _run_peak
+    _run_peak = max(_run_peak, peak)
+
+def run_peak() -> int:
+    """
+    Peak traced memory since tracemalloc started, including the parts spans reset.
+    """
+    with _peak_lock:
+        _note_run_peak(tracemalloc.get_traced_memory()[1])
+        return _run_peak
+
+def _log_span(current: Span) -> None:
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    message = f"{current.stage}: {current.seconds * 1000:.1f} ms"
+    if current.bytes is not None:
+        message += f", {current.bytes / 2**20:.2f} MB"
+    if current.peak_bytes is not None:
+        message += f", peak {current.peak_bytes / 2**20:.2f} MB"
+    if current.source:
+        message += f" ({current.source})"
+    logger.debug(message)
+
+class Profiler():
+    """
+    cProfile and tracemalloc for a whole run, reported by stop().
+
+    Also lowers the sessionista logger to DEBUG so that every span is printed.
+    """
+    def __init__(self, report_file: str | None=None, top: int=25):
+        import cProfile
+
+        self.report_file = report_file
+        self.top = top
+        self.profile = cProfile.Profile()
+        self._log_levels = [logger.level] + [handler.level for handler in logger.handlers]
+
+    def start(self) -> None:
+        logger.setLevel(logging.DEBUG)
+        for handler in logger.handlers:
+            handler.setLevel(logging.DEBUG)
+        global _run_peak
+        _run_peak = 0
+        tracemalloc.start()
+        self.profile.enable()
+
+    def stop(self) -> None:
+        import io
+        import pstats
+
+        self.profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()[0], run_peak()
+        tracemalloc.stop()
+        logger.setLevel(self._log_levels[0])
+        for handler, level in zip(logger.handlers, self._log_levels[1:]):
+            handler.setLevel(level)
+
+        report = io.StringIO()
+        report.write(f"Peak traced memory: {peak / 2**20:.2f} MB, still allocated: {current / 2**20:.2f} MB\n\n")
+        report.write(f"Top {self.top} allocation sites:\n")
+        for stat in snapshot.statistics("lineno")[:self.top]:
+            report.write(f"  {stat}\n")
+        report.write("\n")
+        stats = pstats.Stats(self.profile, stream=report)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+
+        if self.report_file:
+            with open(self.report_file, "w", encoding="utf-8") as f:
+                f.write(report.getvalue())
+            print(f"Profile is saved to {self.report_file}")
+        else:
+            sys.stderr.write(report.getvalue())
@@ -0,0 +1,129 @@
+import sys
+from collections.abc import Mapping, Sequence
+from typing import Any, Iterator
+
+class Tab(Sequence):
+    """
+    History entries of one tab, stored as a column of titles and a column of urls.
+
+    Entries are handed out as Entry views and their ids are only formatted when asked for.
+    index is firefox's 1-based index of the entry the tab shows, it isn't exported.
+    """
+    __slots__ = ("window_idx", "tab_idx", "titles", "urls", "index")
+
+    def __init__(
+        self,
+        window_idx: int,
+        tab_idx: int,
+        titles: list[str] | None=None,
+        urls: list[str] | None=None,
+        index: int | None=None
+    ):
+        self.window_idx = window_idx
+        self.tab_idx = tab_idx
+        self.titles = titles if titles is not None else []
+        self.urls = urls if urls is not None else []
+        self.index = index
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("entry index out of range")
+        return Entry(self, idx)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(entry == other_entry for entry, other_entry in zip(self, other))
+
+    __hash__ = None #pyright: ignore[reportAssignmentType]
+
+    def entry_id(self, idx: int) -> str:
+        return f"{self.window_idx}:{self.tab_idx}:{idx + 1}"
+
+    def to_simplified(self) -> list[dict]:
+        return [
+            {"id": self.entry_id(idx), "title": title, "url": url}
+            for idx, (title, url) in enumerate(zip(self.titles, self.urls))
+        ]
+
+class Entry(Mapping):
+    __slots__ = ("_tab", "_idx")
+    _KEYS = ("id", "title", "url")
+
+    def __init__(self, tab: Tab, idx: int):
+        self._tab = tab
+        self._idx = idx
+
+    def __getitem__(self, key):
+        if key == "id":
+            return self._tab.entry_id(self._idx)
+        if key == "title":
+            return self._tab.titles[self._idx]
+        if key == "url":
+            return self._tab.urls[self._idx]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+class Window(Mapping):
+    __slots__ = ("tabs",)
+    _KEYS = ("tabs", "tab_count")
+
+    def __init__(self, tabs: list[Tab] | None=None):
+        self.tabs = tabs if tabs is not None else []
+
+    def __getitem__(self, key):
+        if key == "tabs":
+            return self.tabs
+        if key == "tab_count":
+            return len(self.tabs)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+    def __repr__(self) -> str:
+        return f"Window(tab_count={len(self.tabs)})"
+
+    def to_simplified(self) -> dict:
+        return {"tabs": [tab.to_simplified() for tab in self.tabs], "tab_count": len(self.tabs)}
+
+def intern_string(value: Any) -> Any:
+    # the same urls and titles show up in every backup and in the history of many tabs
+    return sys.intern(value) if type(value) is str else value
+
+def json_default(value: Any) -> Any:
+    """
+    default= hook that lets json.dump write Window, Tab and Entry as the plain simplified json,
+    and any other Mapping or Sequence view, like the ones packed sessions are made of, as a dict or list.
+    """
+    if isinstance(value, (Window, Tab)):
+        return value.to_simplified()
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, Sequence) and not isinstance(value, str):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def to_simplified(session_data: Sequence) -> list[dict]:
+    """
+    Plain dicts and lists for code that has to mutate a session.
+    """
+    return [window.to_simplified() if isinstance(window, Window) else window for window in session_data]
@@ -0,0 +1,283 @@
+import os
+import sys
+import mmap
+import struct
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Iterator
+
+import lz4.block
+
+PACK_MAGIC = b"snpk\0\0\0\2"
+# version 1 didn't store entry ids, they were made up from positions
+PACK_MAGIC_V1 = b"snpk\0\0\0\1"
+PACK_EXTENSION = "snpk"
+FLAG_LZ4 = 1
+
+# magic, flags, windows, tabs, entries, strings, string bytes, padding to keep the arrays aligned
+_HEADER = struct.Struct("<8sIIIIIQ4x")
+
+def pack_session(session_data: Sequence[Mapping], compress: bool=False) -> bytes:
+    """
+    Packs a simplified session as flat offset arrays over an interned string table.
+
+    Layout after the header, all integers little endian uint32:
+        window_tabs[windows + 1]    first tab of every window
+        tab_entries[tabs + 1]       first entry of every tab
+        entry_titles[entries]       string index of every title
+        entry_urls[entries]         string index of every url
+        tab_windows[tabs]           window number of every tab's id
+        tab_numbers[tabs]           tab number of every tab's id
+        entry_numbers[entries]      entry number of every entry's id
+        string_offsets[strings + 1] byte offsets into the utf-8 string data
+        string data
+    With compress the whole body is a single LZ4 block, like mozLz40.
+    Entry ids "window:tab:entry" are stored as their numbers, so they survive
+    sessions saved without some of their windows, tabs or entries.
+    """
+    strings: dict[str, int] = {}
+    string_data = bytearray()
+    string_offsets = array("I", [0])
+    window_tabs = array("I", [0])
+    tab_entries = array("I", [0])
+    entry_titles = array("I")
+    entry_urls = array("I")
+    tab_windows = array("I")
+    tab_numbers = array("I")
+    entry_numbers = array("I")
+
+    def intern(value: str) -> int:
+        idx = strings.get(value)
+        if idx is None:
+            idx = strings[value] = len(strings)
+            string_data.extend(value.encode("utf-8"))
+            if len(string_data) > 0xFFFFFFFF:
+                raise ValueError("Session strings don't fit into a packed session")
+            string_offsets.append(len(string_data))
+        return idx
+
+    for window_idx, window in enumerate(session_data, start=1):
+        for tab_idx, entries in enumerate(window["tabs"], start=1):
+            tab_id = None
+            for entry_idx, entry in enumerate(entries, start=1):
+                entry_titles.append(intern(entry.get("title", "")))
+                entry_urls.append(intern(entry.get("url", "")))
+                window_number, tab_number, entry_number = _id_numbers(entry, (window_idx, tab_idx, entry_idx))
+                entry_numbers.append(entry_number)
+                tab_id = tab_id or (window_number, tab_number)
+            tab_entries.append(len(entry_titles))
+            # tabs without entries have no id to keep, they go by their position
+            window_number, tab_number = tab_id or (window_idx, tab_idx)
+            tab_windows.append(window_number)
+            tab_numbers.append(tab_number)
+        window_tabs.append(len(tab_entries) - 1)
+
+    arrays = (
+        window_tabs, tab_entries, entry_titles, entry_urls, tab_windows, tab_numbers, entry_numbers, string_offsets
+    )
+    if sys.byteorder == "big":
+        for arr in arrays:
+            arr.byteswap()
+    body = b"".join(arr.tobytes() for arr in arrays) + string_data
+    flags = 0
+    if compress:
+        body = lz4.block.compress(body)
+        flags |= FLAG_LZ4
+
+    header = _HEADER.pack(
+        PACK_MAGIC, flags, len(window_tabs) - 1, len(tab_entries) - 1, len(entry_titles), len(strings), len(string_data)
+    )
+    return header + body
+
+def _id_numbers(entry: Mapping, positions: tuple[int, int, int]) -> tuple[int, int, int]:
+    entry_id = entry.get("id")
+    if entry_id is None:
+        return positions
+    try:
+        window_number, tab_number, entry_number = map(int, entry_id.split(":"))
+    except ValueError:
+        raise ValueError(f"Entry id {entry_id!r} isn't window:tab:entry, it can't be packed") from None
+    return window_number, tab_number, entry_number
+
+def write_packed_session(session_data: Sequence[Mapping], file_path: str, compress: bool=False) -> None:
+    """
+    Writes pack_session(session_data, compress) to file_path.
+    """
+    with open(file_path, "wb") as f:
+        f.write(pack_session(session_data, compress))
+
+def is_packed_session_file(file_path: str) -> bool:
+    try:
+        with open(file_path, "rb") as f:
+            return f.read(len(PACK_MAGIC)) in (PACK_MAGIC, PACK_MAGIC_V1)
+    except OSError:
+        return False
+
+class PackedSession(Sequence):
+    """
+    Read-only view of a packed session that looks like the simplified json.
+
+    Uncompressed files are memory mapped and nothing is decoded until it's accessed,
+    windows, tabs and entries are lightweight views that are created on access.
+    """
+    def __init__(self, file_path: str):
+        with open(file_path, "rb") as f:
+            header = f.read(_HEADER.size)
+            magic, flags, windows, tabs, entries, strings, string_bytes = _HEADER.unpack(header)
+            if magic not in (PACK_MAGIC, PACK_MAGIC_V1):
+                raise ValueError("Invalid packed session file format.")
+            self._mmap = None
+            if flags & FLAG_LZ4:
+                body = memoryview(lz4.block.decompress(f.read()))
+            else:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                body = memoryview(self._mmap)[_HEADER.size:]
+
+        def take(count: int, offset: int) -> tuple[Sequence[int], int]:
+            end = offset + count * 4
+            view = body[offset:end].cast("I")
+            if sys.byteorder == "big":
+                swapped = array("I", view)
+                swapped.byteswap()
+                return swapped, end
+            return view, end
+
+        self._window_tabs, offset = take(windows + 1, 0)
+        self._tab_entries, offset = take(tabs + 1, offset)
+        self._entry_titles, offset = take(entries, offset)
+        self._entry_urls, offset = take(entries, offset)
+        if magic == PACK_MAGIC_V1:
+            self._tab_windows = self._tab_numbers = self._entry_numbers = None
+        else:
+            self._tab_windows, offset = take(tabs, offset)
+            self._tab_numbers, offset = take(tabs, offset)
+            self._entry_numbers, offset = take(entries, offset)
+        self._string_offsets, offset = take(strings + 1, offset)
+        self._string_data = body[offset:offset + string_bytes]
+
+    def _string(self, idx: int) -> str:
+        return str(self._string_data[self._string_offsets[idx]:self._string_offsets[idx + 1]], "utf-8")
+
+    def __len__(self) -> int:
+        return len(self._window_tabs) - 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("window index out of range")
+        return PackedWindow(self, idx)
+
+    def to_simplified(self) -> list[dict]:
+        return [
+            {
+                "tabs": [[dict(entry) for entry in tab] for tab in window["tabs"]],
+                "tab_count": window["tab_count"],
+            }
+            for window in self
+        ]
+
+    def close(self) -> None:
+        for name in (
+            "_window_tabs", "_tab_entries", "_entry_titles", "_entry_urls",
+            "_tab_windows", "_tab_numbers", "_entry_numbers", "_string_offsets", "_string_data"
+        ):
+            view = getattr(self, name)
+            if isinstance(view, memoryview):
+                view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+class PackedWindow(Mapping):
+    _KEYS = ("tabs", "tab_count")
+
+    def __init__(self, session: PackedSession, idx: int):
+        self._session = session
+        self._idx = idx
+
+    def __getitem__(self, key):
+        first = self._session._window_tabs[self._idx]
+        last = self._session._window_tabs[self._idx + 1]
+        if key == "tabs":
+            return PackedTabs(self._session, self._idx, first, last)
+        if key == "tab_count":
+            return last - first
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+class PackedTabs(Sequence):
+    def __init__(self, session: PackedSession, window_idx: int, first: int, last: int):
+        self._session = session
+        self._window_idx = window_idx
+        self._first = first
+        self._last = last
+
+    def __len__(self) -> int:
+        return self._last - self._first
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("tab index out of range")
+        return PackedTab(self._session, self._window_idx, idx, self._first + idx)
+
+class PackedTab(Sequence):
+    def __init__(self, session: PackedSession, window_idx: int, tab_idx: int, global_idx: int):
+        self._session = session
+        self._window_idx = window_idx
+        self._tab_idx = tab_idx
+        self._first = session._tab_entries[global_idx]
+        self._last = session._tab_entries[global_idx + 1]
+        if session._tab_windows is not None:
+            self._id_prefix = f"{session._tab_windows[global_idx]}:{session._tab_numbers[global_idx]}:"
+        else:
+            self._id_prefix = f"{window_idx + 1}:{tab_idx + 1}:"
+
+    def __len__(self) -> int:
+        return self._last - self._first
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("entry index out of range")
+        global_idx = self._first + idx
+        entry_numbers = self._session._entry_numbers
+        entry_number = entry_numbers[global_idx] if entry_numbers is not None else idx + 1
+        return PackedEntry(self._session, f"{self._id_prefix}{entry_number}", global_idx)
+
+class PackedEntry(Mapping):
+    _KEYS = ("id", "title", "url")
+
+    def __init__(self, session: PackedSession, entry_id: str, global_idx: int):
+        self._session = session
+        self._id = entry_id
+        self._global_idx = global_idx
+
+    def __getitem__(self, key):
+        if key == "id":
+            return self._id
+        if key == "title":
+            return self._session._string(self._session._entry_titles[self._global_idx])
+        if key == "url":
+            return self._session._string(self._session._entry_urls[self._global_idx])
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
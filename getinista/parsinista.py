@@ -1,21 +1,352 @@
 import os
+import re
+import sys
 import json
-from typing import Callable
+from json.decoder import scanstring
+from collections import Counter
+from dataclasses import dataclass, asdict
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Mapping, TextIO
+from urllib.parse import urlsplit
 import lz4.block
 
-from clinista import ask_for_valid_input
+from .clinista import ask_for_valid_input
+from .constants import OUTPUT_FORMATS
+from .cachinista import SessionCache
+from .deltinista import diff_sessions, describe_delta
+from .packinista import pack_session, PACK_EXTENSION
+from .metrinista import span
+from .modelista import Window, Tab, intern_string, json_default
+from .selectinista import Selection, current_entry, current_entry_index, top_domains
+
+if TYPE_CHECKING:
+    # sqlite3 is only needed when an archive is passed in
+    from .archivista import SessionArchive
 
 MAGIC_NUMBER = b"mozLz40\0"  # it's not a number
+# tabs shown for every window by pick_windows
+PICK_PREVIEW_TABS = 5
 
 
-def decompress_session_file(file_path: str) -> dict:
-    with open(file_path, "rb") as f:
-        magic = f.read(8)
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+# what's left of a number at the end of a chunk after its decoded start
+_NUMBER_TAIL = re.compile(r"[-+.eE0-9]+\Z")
+
+
+def read_compressed_block(file_path: str) -> bytearray:
+    with span("read", str(file_path)) as s, open(file_path, "rb") as f:
+        magic = f.read(len(MAGIC_NUMBER))
         if magic != MAGIC_NUMBER:
             raise ValueError("Invalid firefox sessionstore file format.")
-        json_data = lz4.block.decompress(f.read())
-        session = json.loads(json_data)
-        return session
+        # read straight into a buffer of the right size instead of growing bytes chunk by chunk
+        block = bytearray(os.fstat(f.fileno()).st_size - len(MAGIC_NUMBER))
+        f.readinto(block)
+        s.bytes = len(block)
+        return block
+
+def decompress_session_block(block: bytes | bytearray, source: str | None=None) -> str:
+    """
+    Inflates a sessionstore file without its magic number, as read by read_compressed_block.
+    A bytearray block is emptied before the text is decoded, the caller's reference would
+    keep it in memory otherwise.
+    """
+    with span("decompress", source) as s:
+        json_data = lz4.block.decompress(block)
+        if isinstance(block, bytearray):
+            block.clear()
+        s.bytes = len(json_data)
+        return json_data.decode("utf-8")
+
+def decompress_session_text(file_path: str) -> str:
+    return decompress_session_block(read_compressed_block(file_path), str(file_path))
+
+def decompress_session_file(file_path: str) -> dict:
+    text = decompress_session_text(file_path)
+    with span("parse", str(file_path), len(text)):
+        return json.loads(text)
+
+class _JsonScanner():
+    """
+    Walks a json document one value at a time.
+
+    members() and items() yield once per object key/array item and leave the
+    scanner at the start of the value, which the caller has to consume either
+    with value() or with a nested members()/items().
+    """
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+
+    def _peek(self) -> str:
+        self.pos = _WHITESPACE.match(self.text, self.pos).end() #pyright: ignore[reportOptionalMemberAccess]
+        return self.text[self.pos:self.pos + 1]
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise ValueError(f"Expected {char!r} at position {self.pos} of the session file")
+        self.pos += 1
+
+    def value(self):
+        self._peek()
+        value, self.pos = _decoder.raw_decode(self.text, self.pos)
+        return value
+
+    def members(self) -> Iterator[str]:
+        self._expect("{")
+        if self._peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self._expect(":")
+            yield key
+            if self._peek() != ",":
+                break
+            self.pos += 1
+        self._expect("}")
+
+    def items(self) -> Iterator[None]:
+        self._expect("[")
+        if self._peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self._peek() != ",":
+                break
+            self.pos += 1
+        self._expect("]")
+
+def _iter_window_tabs(scanner: _JsonScanner) -> Iterator[dict]:
+    for key in scanner.members():
+        if key == "tabs":
+            for _ in scanner.items():
+                yield scanner.value()
+        else:
+            scanner.value()
+
+def iter_session_windows(session_text: str) -> Iterator[Iterator[dict]]:
+    """
+    Yields an iterator over the tabs of every open window in the session.
+
+    Only a single tab is decoded at a time and everything after "windows"
+    (closed windows, cookies, etc.) is never decoded at all.
+    Tabs left unconsumed are skipped once the next window is requested.
+    """
+    scanner = _JsonScanner(session_text)
+    for key in scanner.members():
+        if key != "windows":
+            scanner.value()
+            continue
+        for _ in scanner.items():
+            tabs = _iter_window_tabs(scanner)
+            yield tabs
+            for _ in tabs:
+                pass
+        return
+
+def iter_json_array(json_text: str) -> Iterator:
+    """
+    Decodes the items of a top level json array one at a time.
+    """
+    scanner = _JsonScanner(json_text)
+    for _ in scanner.items():
+        yield scanner.value()
+
+def iter_json_array_file(f: TextIO, chunk_size: int=2**20) -> Iterator:
+    """
+    Decodes the items of a top level json array read from f, holding only
+    the item being decoded and the unread rest of the current chunk in memory.
+    """
+    buffer = f.read(chunk_size)
+    pos = 0
+    eof = not buffer
+
+    def fill() -> None:
+        nonlocal buffer, pos, eof
+        # read at least as much as is buffered, so a huge item is retried a logarithmic number of times
+        more = f.read(max(chunk_size, len(buffer) - pos))
+        eof = not more
+        buffer = buffer[pos:] + more
+        pos = 0
+
+    def peek() -> str:
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end() #pyright: ignore[reportOptionalMemberAccess]
+            if pos < len(buffer) or eof:
+                return buffer[pos:pos + 1]
+            fill()
+
+    if peek() != "[":
+        raise ValueError("Expected a json array")
+    pos += 1
+    if peek() == "]":
+        return
+    while True:
+        try:
+            value, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        if not eof and (end == len(buffer) or _NUMBER_TAIL.match(buffer, end)):
+            # a number or literal cut off at the end of the chunk decodes too,
+            # a number can also be cut before its fraction or exponent: "1" of "1.5"
+            fill()
+            continue
+        pos = end
+        yield value
+        separator = peek()
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or ']' after an array item, got {separator!r}")
+        pos += 1
+        peek()
+
+def stream_session_windows(file_path: str) -> Iterator[Iterator[dict]]:
+    return iter_session_windows(decompress_session_text(file_path))
+
+_LAST_UPDATE = re.compile(r'"lastUpdate"\s*:\s*(\d+)')
+
+@dataclass
+class SessionPreview():
+    window_count: int
+    tab_count: int
+    # seconds since the epoch
+    last_modified: float
+    top_domains: list[tuple[str, int]]
+
+def _current_url(tab: dict) -> str:
+    entries = tab.get("entries") or [{}]
+    return entries[current_entry_index(tab.get("index"), len(entries))].get("url", "")
+
+# firefox writes the open tabs of a window back to back, each starting with its entries
+_TAB_START = '{"entries":['
+_NEXT_TAB = '},{"entries":['
+_ENTRY_START = '{"url":"'
+_TAB_INDEX = '"index":'
+_TABS_KEY = '"tabs":'
+_DIGITS = re.compile(r"\d+")
+_NETLOC = re.compile(r"[A-Za-z][A-Za-z0-9+.-]*://([^/?#]*)")
+# keys that put url-first objects into a tab next to its entries
+_NESTED_KEYS = ('"children":', '"formdata":')
+
+def _find_current_url(text: str, start: int, limit: int, nested: bool) -> tuple[str, int] | None:
+    """
+    _current_url of the tab starting at start and the end of the tab, found with string searches
+    instead of decoding the tab. limit is where the next window's tabs start. None for tabs that
+    aren't laid out the way firefox writes them, which have to be decoded. So is the last tab
+    of every window, as nothing marks its end. nested says if the window's tabs have any
+    _NESTED_KEYS, so that tabs are only searched for them when some do.
+
+    A raw '"' can't be inside a json string, so '{"url":"' always starts an object whose first
+    key is url, and '"index":' is always a key.
+    """
+    # entries begin with their url, so the first one tells if they can be found by searching
+    entries_start = start + len(_TAB_START)
+    if not text.startswith(_TAB_START, start) or not text.startswith((_ENTRY_START, "]"), entries_start):
+        return None
+    end = text.find(_NEXT_TAB, start, limit) + 1
+    if end == 0 or nested and any(text.find(key, start, end) != -1 for key in _NESTED_KEYS):
+        return None
+    # the index of the tab comes after its entries
+    index_key = text.rfind(_TAB_INDEX, start, end)
+    index_value = _DIGITS.match(text, index_key + len(_TAB_INDEX)) if index_key != -1 else None
+    entry_start = _nth_entry_start(text, entries_start, end, int(index_value.group()) if index_value else None)
+    if entry_start == -1:
+        return "", end
+    url, _ = scanstring(text, entry_start + len(_ENTRY_START))
+    return url, end
+
+def _nth_entry_start(text: str, start: int, end: int, index: int | None) -> int:
+    # current_entry_index, searched for from whichever end of the entries is nearer
+    entry_count = text.count(_ENTRY_START, start, end)
+    if not entry_count:
+        return -1
+    position = current_entry_index(index, entry_count) + 1
+    if position * 2 <= entry_count:
+        entry_start = start - 1
+        for _ in range(position):
+            entry_start = text.find(_ENTRY_START, entry_start + 1, end)
+    else:
+        entry_start = end
+        for _ in range(entry_count - position + 1):
+            entry_start = text.rfind(_ENTRY_START, start, entry_start)
+    return entry_start
+
+def preview_session_file(file_path: str, top_n: int=5) -> SessionPreview:
+    """
+    Counts open windows and tabs and the domains of the pages tabs are showing.
+
+    Tabs are searched for the entry they show, see _find_current_url, or decoded one by one
+    when they can't be. Everything after the open windows is skipped, lastUpdate is picked out
+    of the rest with a regex.
+    """
+    session_text = decompress_session_text(file_path)
+    scanner = _JsonScanner(session_text)
+    window_count = 0
+    tab_count = 0
+    urls = Counter()
+    for key in scanner.members():
+        if key != "windows":
+            scanner.value()
+            continue
+        for _ in scanner.items():
+            window_count += 1
+            for window_key in scanner.members():
+                if window_key != "tabs":
+                    scanner.value()
+                    continue
+                tabs_limit = session_text.find(_TABS_KEY, scanner.pos)
+                if tabs_limit == -1:
+                    tabs_limit = len(session_text)
+                nested = any(session_text.find(key, scanner.pos, tabs_limit) != -1 for key in _NESTED_KEYS)
+                for _ in scanner.items():
+                    tab_count += 1
+                    scanner._peek()
+                    found = _find_current_url(session_text, scanner.pos, tabs_limit, nested)
+                    if found is None:
+                        url = _current_url(scanner.value())
+                    else:
+                        url, scanner.pos = found
+                    urls[url] += 1
+        break
+
+    # urlsplit is slow next to the rest, so it's only run once per netloc
+    hostnames = {}
+    domains = Counter()
+    for url, count in urls.items():
+        netloc = _NETLOC.match(url)
+        if netloc is None:
+            hostname = urlsplit(url).hostname
+        else:
+            netloc = netloc.group(1)
+            if netloc not in hostnames:
+                hostnames[netloc] = urlsplit("//" + netloc).hostname
+            hostname = hostnames[netloc]
+        if hostname:
+            domains[hostname] += count
+
+    last_update = _LAST_UPDATE.search(session_text, scanner.pos)
+    if last_update:
+        last_modified = int(last_update.group(1)) / 1000
+    else:
+        last_modified = os.path.getmtime(file_path)
+    return SessionPreview(window_count, tab_count, last_modified, domains.most_common(top_n))
+
+def cached_preview_session_file(file_path: str, cache: SessionCache | None, top_n: int=5) -> SessionPreview:
+    entry_path = cache.entry_path(file_path) if cache else None
+    cached = cache.get(file_path, entry_path) if cache else None
+    if cached is not None and cached.pop("top_n") >= top_n:
+        cached["top_domains"] = [tuple(domain) for domain in cached["top_domains"][:top_n]]
+        return SessionPreview(**cached)
+    preview = preview_session_file(file_path, top_n)
+    if cache:
+        cache.put(file_path, {"top_n": top_n, **asdict(preview)}, entry_path)
+    return preview
 
 def is_valid_yn_answer(user_input: str) -> bool:
     if user_input == 'y' or user_input == 'n':
@@ -23,38 +354,68 @@ def is_valid_yn_answer(user_input: str) -> bool:
     print("Invalid input. Expected either 'y' or 'n'")
     return False
 
-def pick_windows(data: list[dict]) -> None:
-    idx = 0
-    while idx < len(data):
-        print("Save this window? 5 tabs from the window(chosen randomly(actually not)):")
-        for tab in data[idx]['tabs'][-5:]:
-            print(f"    title: {tab[-1]['title']}")
-            print(f"    url: {tab[-1]['url']}")
+def pick_windows(data: list[Mapping]) -> Selection:
+    """
+    Asks about every window in turn. The answers are recorded in the returned selection, data is left as it is.
+    """
+    selection = Selection(data)
+    for window_idx, window in enumerate(data, start=1):
+        tabs = window["tabs"]
+        domains = ", ".join(f"{domain} ({count})" for domain, count in top_domains(tabs))
+        print(f"Save window {window_idx}/{len(data)}? {len(tabs)} tabs, mostly {domains}:")
+        for tab in tabs[:PICK_PREVIEW_TABS]:
+            entry = current_entry(tab)
+            if entry is not None:
+                print(f"    title: {entry['title']}")
+                print(f"    url: {entry['url']}")
+        if len(tabs) > PICK_PREVIEW_TABS:
+            print(f"    ... and {len(tabs) - PICK_PREVIEW_TABS} more")
         user_input = ask_for_valid_input("y/n:", is_valid_yn_answer)
-        if user_input == 'y':
-            idx += 1
-        else:
+        if user_input == 'n':
             print('Not saving the window above')
-            data.pop(idx)
+            selection.set_window(window_idx, keep=False)
+    return selection
+
+def choose_windows(data: list[Mapping]) -> Selection | None:
+    """
+    Lets the user pick windows and tabs in the TUI window picker, or with pick_windows' prompts
+    when stdout isn't a terminal or textual isn't installed. None when the picker is cancelled.
+    """
+    if sys.stdout.isatty() and sys.stdin.isatty():
+        try:
+            from tui.window_picker import WindowPicker
+        except ImportError:
+            pass
+        else:
+            return WindowPicker(data).run()
+    return pick_windows(data)
 
-def process_session_data(session, post_process_func: Callable[[list[dict]], None] | None=None) -> list[dict]:
+def process_session_data(
+    session: Mapping | Iterable[Iterable[dict]],
+    post_process_func: Callable[[list[Window]], None] | None=None
+) -> list[Window]:
+    """
+    Accepts either a fully decoded session or the output of iter_session_windows.
+
+    Windows are Window objects that read like the simplified dicts, see modelista.
+    """
+    if isinstance(session, Mapping):
+        windows = (window.get("tabs", []) for window in session.get("windows", []))
+    else:
+        windows = session
     simplified_data = []
-    for window_idx, window in enumerate(session.get("windows", []), start=1):
-        window_data = {"tabs": [], "tab_count": 0}
-        tab_count = 0
-        for tab_idx, tab in enumerate(window.get("tabs", []), start=1):
-            entries = []
-            for entry_idx, entry in enumerate(tab.get("entries", []), start=1):
-                entry_id = f"{window_idx}:{tab_idx}:{entry_idx}"
-                entries.append({
-                    "id": entry_id,
-                    "title": entry.get("title", ""),
-                    "url": entry.get("url", "")
-                })
-            window_data["tabs"].append(entries)
-            tab_count += 1
-        window_data["tab_count"] = tab_count
-        simplified_data.append(window_data)
+    for window_idx, tabs in enumerate(windows, start=1):
+        window = Window()
+        for tab_idx, tab in enumerate(tabs, start=1):
+            entries = tab.get("entries", [])
+            window.tabs.append(Tab(
+                window_idx,
+                tab_idx,
+                [intern_string(entry.get("title", "")) for entry in entries],
+                [intern_string(entry.get("url", "")) for entry in entries],
+                tab.get("index"),
+            ))
+        simplified_data.append(window)
     if post_process_func:
         post_process_func(simplified_data)
     return simplified_data
@@ -64,10 +425,55 @@ class FileExistsError(Exception):
         self.message = message
         super().__init__(self.message)
 
+def output_extension(output_format: str) -> str:
+    return "json" if output_format == "json" else PACK_EXTENSION
+
+def serialize_session(session_data: list[Mapping], output_format: str, destination: str | None=None) -> bytes:
+    """
+    The bytes of session_data in one of OUTPUT_FORMATS.
+    """
+    with span("serialize", destination) as s:
+        if output_format == "json":
+            output = json.dumps(session_data, ensure_ascii=False, indent=2, default=json_default).encode("utf-8")
+        else:
+            output = pack_session(session_data, compress=output_format == "packed-lz4")
+        s.bytes = len(output)
+    return output
+
+def write_session(session_data: list[Mapping], output_format: str, output_file: str) -> int:
+    """
+    Writes session_data to output_file in one of OUTPUT_FORMATS and returns the size of the file.
+
+    json is streamed into the file as it's encoded, so the whole output is never held in memory.
+    """
+    if output_format != "json":
+        output = serialize_session(session_data, output_format, output_file)
+        with span("write", output_file, len(output)), open(output_file, "wb") as f:
+            f.write(output)
+        return len(output)
+    with span("write", output_file) as s, open(output_file, "w", encoding="utf-8") as f:
+        json.dump(session_data, f, ensure_ascii=False, indent=2, default=json_default)
+        s.bytes = f.tell()
+    return s.bytes
+
 class Parsinista():
-    def __init__(self, input_file, output_file):
+    def __init__(
+        self,
+        input_file,
+        output_file,
+        verbose: bool=True,
+        cache: SessionCache | None=None,
+        output_format: str="json",
+        archive: "SessionArchive | None"=None
+    ):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format {output_format}, expected one of {OUTPUT_FORMATS}")
         self.input_file = input_file
         self.output_file = output_file
+        self.verbose = verbose
+        self.cache = cache
+        self.output_format = output_format
+        self.archive = archive
         self.session_data = None
 
     def save_simplified_session(self):
@@ -75,42 +481,78 @@ class Parsinista():
             raise FileExistsError
         if not self.session_data:
             raise ValueError
-        for window in self.session_data:
-            print("Window with " + str(window["tab_count"]) + " tabs")
+        if self.verbose:
+            for window in self.session_data:
+                print("Window with " + str(window["tab_count"]) + " tabs")
+        write_session(self.session_data, self.output_format, self.output_file)
+        if self.verbose:
+            print(f"Session is saved to {self.output_file}")
+
+    def save_session_delta(self, previous_data: list[dict]):
+        if os.path.exists(self.output_file):
+            raise FileExistsError
+        if self.session_data is None:
+            raise ValueError
+        delta = diff_sessions(previous_data, self.session_data)
         with open(self.output_file, "w", encoding="utf-8") as f:
-            json.dump(self.session_data, f, ensure_ascii=False, indent=2)
-        print(f"Session is saved to {self.output_file}")
+            json.dump(delta, f, ensure_ascii=False)
+        if self.verbose:
+            print(f"Delta ({describe_delta(delta)}) is saved to {self.output_file}")
 
-    def convert_and_save_session(self, choose_windows_to_save: bool=False):
-        decompressed = decompress_session_file(self.input_file)
-        post_process_func = pick_windows if choose_windows_to_save else None
-        self.session_data = process_session_data(decompressed, post_process_func)
-        self.save_simplified_session()
+    def load_session(self) -> list[Mapping]:
+        entry_path = self.cache.entry_path(self.input_file) if self.cache else None
+        session_data = self.cache.get(self.input_file, entry_path) if self.cache else None
+        if session_data is None:
+            windows = stream_session_windows(self.input_file)
+            # windows are decoded while they are simplified, so this span covers parsing too
+            with span("simplify", str(self.input_file)) as s:
+                session_data = process_session_data(windows)
+                s.extra["tabs"] = sum(window["tab_count"] for window in session_data)
+            if self.cache:
+                self.cache.put(self.input_file, session_data, entry_path)
+        return session_data
+
+    def convert_and_save_session(self, choose_windows_to_save: bool=False, delta_base: list[dict] | None=None):
+        """
+        With delta_base only the difference to that previously exported session is saved.
+        """
+        self.session_data = self.load_session()
+        if choose_windows_to_save:
+            selection = choose_windows(self.session_data)
+            if selection is None:
+                print("Nothing saved")
+                return
+            self.session_data = selection.apply()
+        if self.archive:
+            self.archive.add_session(self.session_data, str(self.input_file))
+        if delta_base is not None:
+            self.save_session_delta(delta_base)
+        else:
+            self.save_simplified_session()
 
 if __name__ == "__main__":
     data = [
         {
             "tabs": [
-                {"title": "first", "url": "first_url"},
-                {"title": "second", "url": "second_url"},
-                {"title": "third", "url": "third_url"},
+                [{"title": "first", "url": "first_url"}],
+                [{"title": "second", "url": "second_url"}],
+                [{"title": "third", "url": "third_url"}],
             ]
         },
         {
             "tabs": [
-                {"title": "1", "url": "first_url"},
-                {"title": "2", "url": "second_url"},
-                {"title": "3", "url": "third_url"},
+                [{"title": "1", "url": "first_url"}],
+                [{"title": "2", "url": "second_url"}],
+                [{"title": "3", "url": "third_url"}],
             ]
         },
         {
             "tabs": [
-                {"title": "___", "url": "first_url"},
-                {"title": "___", "url": "second_url"},
-                {"title": "___", "url": "third_url"},
+                [{"title": "___", "url": "first_url"}],
+                [{"title": "___", "url": "second_url"}],
+                [{"title": "___", "url": "third_url"}],
             ]
         },
     ]
     print(data)
-    pick_windows(data)
-    print(data)
+    print(pick_windows(data).apply())
@@ -2,25 +2,54 @@ import os
 import sys
 import platform
 import re
+import fnmatch
+import datetime
 from pathlib import Path
 from dataclasses import dataclass, field
 
-from constants import PYTHON_WILDCARD
-from clinista import get_user_choice
+from .constants import PYTHON_WILDCARD
+from .clinista import get_user_choice
+from .scaninista import DirectoryIndex
+from .metrinista import span
+
+# recovery.jsonlz4, recovery.baklz4, previous.jsonlz4, upgrade.jsonlz4-<build id>,
+# but not recovery.jsonlz4.tmp which firefox writes before renaming it
+SESSION_FILE_GLOBS = ("*.jsonlz4", "*.baklz4", "*.jsonlz4-*")
+
+# shared by every lookup in this process, see enable_persistent_index
+directory_index = DirectoryIndex()
+
+def enable_persistent_index(index_file: Path | str) -> None:
+    """
+    Keeps directory listings in index_file so that later runs only stat the directories.
+    """
+    global directory_index
+    directory_index = DirectoryIndex(index_file)
+
+def is_session_file_name(name: str) -> bool:
+    return not name.endswith(".tmp") and any(fnmatch.fnmatch(name, glob) for glob in SESSION_FILE_GLOBS)
 
 @dataclass
 class Session():
     path: Path
+    mtime_ns: int = 0
+    size: int = 0
 
 @dataclass
 class Profile():
     path: Path
-    sessions: list[Session] = field(init=False)
-    session_number: int = field(init=False)
+    _sessions: list[Session] | None = field(default=None, init=False, repr=False)
+
+    @property
+    def sessions(self) -> list[Session]:
+        # profiles are listed long before (and often without) anyone looking at their sessions
+        if self._sessions is None:
+            self._sessions = _find_sessions(self.path)
+        return self._sessions
 
-    def __post_init__(self):
-        self.sessions = _find_sessions(self.path)
-        self.session_number = len(self.sessions)
+    @property
+    def session_number(self) -> int:
+        return len(self.sessions)
 
 def _find_firefox_profiles(pattern: str='.*', raw_patterns=False) -> list[Profile]:
     if pattern != ".*" and not raw_patterns:
@@ -43,7 +72,9 @@ def _find_firefox_profiles(pattern: str='.*', raw_patterns=False) -> list[Profil
         sys.exit(1)
 
     profiles_path = Path(profiles_dir)
-    profile_paths = list(profiles_path.glob("*"))
+    with span("discover", profiles_dir) as s:
+        profile_paths = [profiles_path / e.name for e in directory_index.list_dir(profiles_path) if e.is_dir]
+        s.extra["profiles"] = len(profile_paths)
 
     compiled_pattern = re.compile(pattern)
     profiles = [Profile(pp) for pp in profile_paths if compiled_pattern.match(str(pp))]
@@ -53,12 +84,18 @@ def _find_sessions(profile_path: Path, pattern: str='.*', raw_patterns=False) ->
     if pattern != ".*" and not raw_patterns:
         pattern = add_wildcards_to_pattern(pattern)
     session_store_backups = profile_path / "sessionstore-backups"
-    if not session_store_backups.exists():
-        return []
-    
-    session_files = list(session_store_backups.glob("*.jsonlz4"))
+    with span("discover", str(session_store_backups)) as s:
+        entries = directory_index.list_dir(session_store_backups)
+        s.extra["entries"] = len(entries)
+
     compiled_pattern = re.compile(pattern)
-    sessions = [Session(fp) for fp in session_files if compiled_pattern.match(str(fp))]
+    sessions = []
+    for entry in entries:
+        session_file = session_store_backups / entry.name
+        if entry.is_dir or not is_session_file_name(entry.name):
+            continue
+        if compiled_pattern.match(str(session_file)):
+            sessions.append(Session(session_file, entry.mtime_ns, entry.size))
     
     current_session = []
     backup_sessions = []
@@ -81,21 +118,70 @@ def _create_session_file_label(file: Path) -> str:
     else:
         return "Backup Session"
 
-def get_session_file(profile_pattern: str=".*", session_pattern: str=".*", raw_patterns=False) -> Path | None:
+def _create_session_preview_label(file: Path, preview_cache) -> str:
+    # parsinista pulls in lz4, only needed when previews are asked for
+    from .parsinista import cached_preview_session_file
+
+    try:
+        preview = cached_preview_session_file(str(file), preview_cache, top_n=3)
+    except Exception as e:
+        return f"unreadable: {type(e).__name__}"
+    last_modified = datetime.datetime.fromtimestamp(preview.last_modified).strftime("%Y-%m-%d %H:%M")
+    domains = ", ".join(f"{domain} ({count})" for domain, count in preview.top_domains)
+    return f"{preview.window_count} windows, {preview.tab_count} tabs, {last_modified} | {domains}"
+
+def choose_profile(profile_pattern: str=".*", raw_patterns=False) -> Profile | None:
     profiles = _find_firefox_profiles(profile_pattern, raw_patterns)
     profile_idx = get_user_choice([f"{p.path.name} | {p.session_number} sessions" for p in profiles], "profile")
 
     if profile_idx is None: return None
-    selected_profile = profiles[profile_idx]
+    return profiles[profile_idx]
+
+def get_session_file(
+    profile_pattern: str=".*",
+    session_pattern: str=".*",
+    raw_patterns=False,
+    preview: bool=False,
+    preview_cache=None
+) -> Path | None:
+    """
+    With preview the session labels also summarize what the session contains.
+    """
+    selected_profile = choose_profile(profile_pattern, raw_patterns)
+    if selected_profile is None: return None
 
     sessions = _find_sessions(selected_profile.path, session_pattern, raw_patterns)
-    session_idx = get_user_choice([f"{s.path.name} ({_create_session_file_label(s.path)})" for s in sessions], "session")
+    labels = [f"{s.path.name} ({_create_session_file_label(s.path)})" for s in sessions]
+    if preview:
+        labels = [f"{label} {_create_session_preview_label(s.path, preview_cache)}" for label, s in zip(labels, sessions)]
+    session_idx = get_user_choice(labels, "session")
 
     if session_idx is None: return None
     selected_session = sessions[session_idx]
 
     return selected_session.path
 
+def find_session_files(profile_pattern: str=".*", session_pattern: str=".*", raw_patterns=False) -> list[Path]:
+    """
+    Non-interactive counterpart of get_session_file: every session of every matching profile.
+    """
+    session_files = []
+    for profile in _find_firefox_profiles(profile_pattern, raw_patterns):
+        sessions = _find_sessions(profile.path, session_pattern, raw_patterns)
+        session_files.extend(s.path for s in sessions)
+    return session_files
+
+def list_sessions(
+    profile_pattern: str=".*", session_pattern: str=".*", raw_patterns=False
+) -> list[tuple[Profile, list[Session]]]:
+    """
+    Every matching profile with its matching sessions, without asking or reading any session file.
+    """
+    return [
+        (profile, _find_sessions(profile.path, session_pattern, raw_patterns))
+        for profile in _find_firefox_profiles(profile_pattern, raw_patterns)
+    ]
+
 def add_wildcards_to_pattern(pattern: str) -> str:
     return PYTHON_WILDCARD + pattern + PYTHON_WILDCARD    
 
@@ -0,0 +1,187 @@
+import os
+import time
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+from .parsinista import (
+    FileExistsError, read_compressed_block, decompress_session_block, iter_session_windows, process_session_data, serialize_session
+)
+from .batchinista import ConversionResult, output_file_for, print_summary
+from .cachinista import SessionCache
+from .archivista import SessionArchive
+from .metrinista import span
+
+# files waiting between two stages, so at most this many compressed and this many serialized sessions are in memory
+DEFAULT_QUEUE_SIZE = 4
+
+_DONE = None
+
+def _convert_block(
+    input_file: Path,
+    output_file: Path,
+    block: bytearray | None,
+    cache: SessionCache | None,
+    entry_path: Path | None,
+    output_format: str,
+    archive: SessionArchive | None
+) -> bytes:
+    """
+    The CPU bound part of a conversion, from the compressed block to the bytes of the output file.
+
+    Runs in the executor. block is None when the session is expected to be in the cache,
+    entry_path is its cache entry as found by the read stage.
+    """
+    session_data = cache.get(input_file, entry_path) if cache and block is None else None
+    if session_data is None:
+        if block is None:
+            block = read_compressed_block(str(input_file))
+        windows = iter_session_windows(decompress_session_block(block, str(input_file)))
+        del block
+        with span("simplify", str(input_file)) as s:
+            session_data = process_session_data(windows)
+            s.extra["tabs"] = sum(window["tab_count"] for window in session_data)
+        if cache:
+            cache.put(input_file, session_data, entry_path)
+    if archive:
+        archive.add_session(session_data, str(input_file))
+    return serialize_session(session_data, output_format, str(output_file))
+
+def _write_output(output_file: Path, output: bytes) -> None:
+    with span("write", str(output_file), len(output)), open(output_file, "xb") as f:
+        f.write(output)
+
+class SessionPipeline():
+    """
+    Converts session files with reading, conversion and writing overlapping.
+
+    One task reads files, worker tasks hand the blocks to the executor and one task writes the results.
+    The stages are joined by queues of queue_size, so a slow stage holds the ones before it back
+    instead of letting the sessions pile up in memory.
+    Runs on whatever event loop awaits run(), the CLI uses asyncio.run and the TUI its own loop.
+    """
+    def __init__(
+        self,
+        output_dir: Path,
+        executor: Executor | None=None,
+        workers: int | None=None,
+        queue_size: int=DEFAULT_QUEUE_SIZE,
+        cache: SessionCache | None=None,
+        output_format: str="json",
+        archive: SessionArchive | None=None,
+        on_result: Callable[[ConversionResult], None] | None=None
+    ):
+        self.output_dir = output_dir
+        self.executor = executor
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.cache = cache
+        self.output_format = output_format
+        self.archive = archive
+        self.on_result = on_result
+
+    async def run(self, session_files: list[Path]) -> list[ConversionResult]:
+        """
+        Errors don't stop the pipeline, they are reported per file in the returned results.
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        read_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        write_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        results: list[ConversionResult] = []
+
+        owns_executor = self.executor is None
+        executor = self.executor or ProcessPoolExecutor(max_workers=self.workers)
+        tasks = [asyncio.create_task(self._read(session_files, read_queue))]
+        tasks += [asyncio.create_task(self._convert(read_queue, write_queue, executor)) for _ in range(self.workers)]
+        tasks.append(asyncio.create_task(self._write(write_queue, results)))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if owns_executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+        return results
+
+    async def _read(self, session_files: list[Path], read_queue: asyncio.Queue) -> None:
+        for session_file in session_files:
+            result = ConversionResult(session_file, output_file_for(session_file, self.output_dir, self.output_format))
+            start = time.perf_counter()
+            block = None
+            entry_path = None
+            try:
+                result.input_size = os.path.getsize(session_file)
+                if os.path.exists(result.output_file):
+                    raise FileExistsError
+                if self.cache is not None:
+                    entry_path = await asyncio.to_thread(self.cache.entry_path, session_file)
+                if entry_path is None or not entry_path.exists():
+                    block = await asyncio.to_thread(read_compressed_block, str(session_file))
+            except Exception as e:
+                result.error = f"{type(e).__name__}: {e}"
+            await read_queue.put((result, start, block, entry_path))
+        for _ in range(self.workers):
+            await read_queue.put(_DONE)
+
+    async def _convert(self, read_queue: asyncio.Queue, write_queue: asyncio.Queue, executor: Executor) -> None:
+        loop = asyncio.get_running_loop()
+        while (item := await read_queue.get()) is not _DONE:
+            result, start, block, entry_path = item
+            output = None
+            if not result.error:
+                try:
+                    output = await loop.run_in_executor(
+                        executor, _convert_block,
+                        result.input_file, result.output_file, block, self.cache, entry_path, self.output_format, self.archive
+                    )
+                except Exception as e:
+                    result.error = f"{type(e).__name__}: {e}"
+            del item, block
+            await write_queue.put((result, start, output))
+        await write_queue.put(_DONE)
+
+    async def _write(self, write_queue: asyncio.Queue, results: list[ConversionResult]) -> None:
+        running = self.workers
+        while running:
+            item = await write_queue.get()
+            if item is _DONE:
+                running -= 1
+                continue
+            result, start, output = item
+            if not result.error:
+                try:
+                    await asyncio.to_thread(_write_output, result.output_file, output)
+                except Exception as e:
+                    result.error = f"{type(e).__name__}: {e}"
+            del item, output
+            result.elapsed = time.perf_counter() - start
+            results.append(result)
+            if self.on_result:
+                self.on_result(result)
+
+def convert_sessions_pipelined(
+    session_files: list[Path],
+    output_dir: Path,
+    max_workers: int | None=None,
+    cache: SessionCache | None=None,
+    output_format: str="json",
+    archive: SessionArchive | None=None,
+    queue_size: int=DEFAULT_QUEUE_SIZE
+) -> list[ConversionResult]:
+    """
+    Drop-in for batchinista.convert_sessions that runs a SessionPipeline on a new event loop.
+    """
+    def report(result: ConversionResult) -> None:
+        status = f"FAILED ({result.error})" if result.error else f"ok ({result.elapsed:.2f}s)"
+        print(f"[{len(results) + 1}/{len(session_files)}] {result.input_file} -> {result.output_file}: {status}")
+        results.append(result)
+
+    results: list[ConversionResult] = []
+    start = time.perf_counter()
+    pipeline = SessionPipeline(
+        output_dir, workers=max_workers, queue_size=queue_size, cache=cache, output_format=output_format, archive=archive, on_result=report
+    )
+    asyncio.run(pipeline.run(session_files))
+    print_summary(results, time.perf_counter() - start)
+    return results
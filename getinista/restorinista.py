@@ -0,0 +1,164 @@
+import os
+import json
+from dataclasses import dataclass
+
+import lz4.block
+
+from .parsinista import MAGIC_NUMBER, FileExistsError, decompress_session_file, process_session_data
+from .selectinista import Selection, current_entry_index
+from .metrinista import span
+
+@dataclass
+class PruneStats():
+    windows: int = 0
+    tabs: int = 0
+    entries: int = 0
+    closed_windows: int = 0
+    closed_tabs: int = 0
+
+@dataclass
+class WriteStats():
+    input_bytes: int = 0
+    json_bytes: int = 0
+    output_bytes: int = 0
+
+def _remap_selected(selected: int, kept_positions: list[int]) -> int:
+    # the selected tab/window if it's kept, otherwise the closest kept one before it
+    return max(1, sum(position <= selected for position in kept_positions))
+
+def truncate_history(tab: dict, max_entries: int) -> int:
+    """
+    Keeps at most max_entries history entries of tab around the one it's showing,
+    going back in history first. index (and requestedIndex) are moved along. Returns the number of dropped entries.
+    """
+    if max_entries < 1:
+        raise ValueError(f"A tab keeps at least one history entry, got max_entries={max_entries}")
+    entries = tab.get("entries", [])
+    if len(entries) <= max_entries:
+        return 0
+    current = current_entry_index(tab.get("index"), len(entries))
+    start = max(0, current - max_entries + 1)
+    end = min(len(entries), start + max_entries)
+    start = max(0, end - max_entries)
+    tab["entries"] = entries[start:end]
+    tab["index"] = current - start + 1
+    if tab.get("requestedIndex", 0) > 0:
+        tab["requestedIndex"] = min(max(tab["requestedIndex"] - start, 1), len(tab["entries"]))
+    return len(entries) - len(tab["entries"])
+
+def prune_session(
+    session: dict,
+    selection: Selection | None=None,
+    max_history: int | None=None,
+    drop_closed: bool=False
+) -> PruneStats:
+    """
+    Drops what selection drops from a full decoded session, in place.
+
+    selection is made over process_session_data(session), its window and tab positions
+    are the positions in session["windows"]. With max_history every tab keeps at most that many
+    history entries, see truncate_history, and drop_closed forgets closed windows and tabs.
+    """
+    stats = PruneStats()
+    windows = session.get("windows", [])
+    kept_windows = []
+    kept_window_positions = []
+    for window_idx, window in enumerate(windows, start=1):
+        tabs = window.get("tabs", [])
+        if selection is not None and not selection.is_window_kept(window_idx):
+            stats.windows += 1
+            stats.tabs += len(tabs)
+            continue
+        kept_tabs = []
+        kept_tab_positions = []
+        for tab_idx, tab in enumerate(tabs, start=1):
+            if selection is not None and not selection.is_tab_kept(window_idx, tab_idx):
+                stats.tabs += 1
+                continue
+            if max_history is not None:
+                stats.entries += truncate_history(tab, max_history)
+            kept_tabs.append(tab)
+            kept_tab_positions.append(tab_idx)
+        if tabs and not kept_tabs:
+            stats.windows += 1
+            continue
+        if len(kept_tabs) != len(tabs):
+            window["tabs"] = kept_tabs
+            if "selected" in window:
+                window["selected"] = _remap_selected(window["selected"], kept_tab_positions)
+        if drop_closed and window.get("_closedTabs"):
+            stats.closed_tabs += len(window["_closedTabs"])
+            window["_closedTabs"] = []
+        kept_windows.append(window)
+        kept_window_positions.append(window_idx)
+    if len(kept_windows) != len(windows):
+        session["windows"] = kept_windows
+        if "selectedWindow" in session:
+            session["selectedWindow"] = _remap_selected(session["selectedWindow"], kept_window_positions)
+    if drop_closed and session.get("_closedWindows"):
+        stats.closed_windows = len(session["_closedWindows"])
+        session["_closedWindows"] = []
+    return stats
+
+def encode_session(session: dict, destination: str | None=None) -> bytes:
+    """
+    The utf-8 json of session, without whitespace like firefox writes it.
+
+    json.dumps goes through the C encoder, iterencode would fall back to the
+    pure python one and take about five times as long on big sessions.
+    """
+    with span("serialize", destination) as s:
+        json_data = json.dumps(session, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        s.bytes = len(json_data)
+    return json_data
+
+def write_session_file(session: dict, output_file: str, validate: bool=True) -> WriteStats:
+    """
+    Writes session as a mozLz40 sessionstore file firefox can restore.
+
+    The file is written next to output_file first and, with validate, only moved
+    into place once decompress_session_file reads back the same session.
+    """
+    if os.path.exists(output_file):
+        raise FileExistsError
+    stats = WriteStats()
+    json_data = encode_session(session, output_file)
+    stats.json_bytes = len(json_data)
+    with span("compress", output_file, len(json_data)):
+        # store_size prepends the decompressed size, as mozLz40 expects
+        block = lz4.block.compress(json_data, store_size=True)
+    del json_data
+
+    tmp_path = output_file + ".tmp"
+    with span("write", output_file, len(MAGIC_NUMBER) + len(block)), open(tmp_path, "xb") as f:
+        f.write(MAGIC_NUMBER)
+        f.write(block)
+    stats.output_bytes = len(MAGIC_NUMBER) + len(block)
+    try:
+        if validate and decompress_session_file(tmp_path) != session:
+            raise ValueError(f"{tmp_path} doesn't read back as the session that was written")
+        os.replace(tmp_path, output_file)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return stats
+
+def prune_session_file(
+    input_file: str,
+    output_file: str,
+    selection_func=None,
+    max_history: int | None=None,
+    drop_closed: bool=False,
+    validate: bool=True
+) -> tuple[PruneStats, WriteStats]:
+    """
+    Reads a sessionstore file, prunes it with prune_session and writes it to output_file.
+
+    selection_func gets the simplified session and returns the Selection to apply, or None to keep every window and tab.
+    """
+    session = decompress_session_file(input_file)
+    selection = selection_func(process_session_data(session)) if selection_func else None
+    prune_stats = prune_session(session, selection, max_history, drop_closed)
+    write_stats = write_session_file(session, output_file, validate)
+    write_stats.input_bytes = os.path.getsize(input_file)
+    return prune_stats, write_stats
@@ -0,0 +1,78 @@
+import os
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+@dataclass(frozen=True)
+class DirEntry():
+    name: str
+    is_dir: bool
+    mtime_ns: int
+    size: int
+
+class DirectoryIndex():
+    """
+    Listings of directories with the stat metadata of their entries, one os.scandir pass each.
+
+    A listing is reused for as long as the directory's own mtime doesn't change, which
+    happens whenever an entry is created, removed or renamed into place (firefox replaces
+    sessionstore files by renaming). Entries rewritten in place keep their old stat metadata.
+    With index_file the listings are kept across runs.
+    """
+    def __init__(self, index_file: Path | str | None=None):
+        self.index_file = Path(index_file) if index_file else None
+        self._listings: dict[str, tuple[int, list[DirEntry]]] = {}
+        self._dirty = False
+        if self.index_file:
+            self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.index_file, encoding="utf-8") as f: #pyright: ignore[reportArgumentType]
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        for directory, (mtime_ns, entries) in stored.items():
+            self._listings[directory] = (mtime_ns, [DirEntry(*entry) for entry in entries])
+
+    def save(self) -> None:
+        if not self.index_file or not self._dirty:
+            return
+        stored = {
+            directory: [mtime_ns, [[e.name, e.is_dir, e.mtime_ns, e.size] for e in entries]]
+            for directory, (mtime_ns, entries) in self._listings.items()
+        }
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(stored, f)
+        os.replace(tmp_file, self.index_file)
+        self._dirty = False
+
+    def list_dir(self, directory: Path) -> list[DirEntry]:
+        """
+        Entries of directory, empty if it doesn't exist.
+        """
+        key = str(directory)
+        try:
+            dir_mtime_ns = os.stat(directory).st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            self._listings.pop(key, None)
+            return []
+        cached = self._listings.get(key)
+        if cached and cached[0] == dir_mtime_ns:
+            return cached[1]
+
+        entries = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    stat = entry.stat()
+                    is_dir = entry.is_dir()
+                except FileNotFoundError:
+                    continue
+                entries.append(DirEntry(entry.name, is_dir, stat.st_mtime_ns, stat.st_size))
+        entries.sort(key=lambda e: e.name)
+        self._listings[key] = (dir_mtime_ns, entries)
+        self._dirty = True
+        return entries
@@ -0,0 +1,160 @@
+import re
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from typing import Callable
+from urllib.parse import urlsplit
+
+DOMAIN_PREFIX = "@"
+
+def current_entry_index(index: int | None, entry_count: int) -> int:
+    """
+    0-based position of the entry a tab shows, from firefox's 1-based tab index.
+    Without an index it's the last entry.
+    """
+    if index is None:
+        return entry_count - 1
+    return min(max(index, 1), entry_count) - 1
+
+def current_entry(tab: Sequence[Mapping]) -> Mapping | None:
+    # Tabs of freshly converted sessions know their index, exported ones don't
+    if not len(tab):
+        return None
+    return tab[current_entry_index(getattr(tab, "index", None), len(tab))]
+
+def domain_of(url: str) -> str:
+    try:
+        return urlsplit(url).hostname or ""
+    except ValueError:
+        return ""
+
+def top_domains(tabs: Sequence[Sequence[Mapping]], top_n: int=3) -> list[tuple[str, int]]:
+    domains = Counter()
+    for tab in tabs:
+        entry = current_entry(tab)
+        if entry is not None:
+            domains[domain_of(entry.get("url", ""))] += 1
+    return domains.most_common(top_n)
+
+def tab_matcher(pattern: str) -> Callable[[Sequence[Mapping]], bool]:
+    """
+    Tests the current entry of a tab against a regex on its title and url,
+    or against a domain and its subdomains when pattern starts with DOMAIN_PREFIX.
+    """
+    if pattern.startswith(DOMAIN_PREFIX):
+        domain = pattern[len(DOMAIN_PREFIX):].lower()
+
+        def matches_domain(tab: Sequence[Mapping]) -> bool:
+            entry = current_entry(tab)
+            host = domain_of(entry.get("url", "")) if entry is not None else ""
+            return host == domain or host.endswith("." + domain)
+        return matches_domain
+
+    regex = re.compile(pattern, re.IGNORECASE)
+
+    def matches_regex(tab: Sequence[Mapping]) -> bool:
+        entry = current_entry(tab)
+        return entry is not None and bool(regex.search(entry.get("title", "")) or regex.search(entry.get("url", "")))
+    return matches_regex
+
+class Selection():
+    """
+    Keep/drop decisions over the windows and tabs of a simplified session.
+
+    Windows and tabs are addressed by 1-based position like the window:tab:entry ids,
+    everything is kept until dropped, and the session itself is left alone until apply().
+    """
+    def __init__(self, session_data: Sequence[Mapping]):
+        self.session_data = session_data
+        self.dropped_windows: set[int] = set()
+        self.dropped_tabs: set[tuple[int, int]] = set()
+
+    def _tab_count(self, window_idx: int) -> int:
+        return len(self.session_data[window_idx - 1]["tabs"])
+
+    def is_window_kept(self, window_idx: int) -> bool:
+        return window_idx not in self.dropped_windows
+
+    def is_tab_kept(self, window_idx: int, tab_idx: int) -> bool:
+        return window_idx not in self.dropped_windows and (window_idx, tab_idx) not in self.dropped_tabs
+
+    def set_window(self, window_idx: int, keep: bool) -> None:
+        if keep:
+            self.dropped_windows.discard(window_idx)
+        else:
+            self.dropped_windows.add(window_idx)
+
+    def set_tab(self, window_idx: int, tab_idx: int, keep: bool) -> None:
+        if keep:
+            if window_idx in self.dropped_windows:
+                # keeping a tab of a dropped window brings the window back with only that tab
+                self.dropped_windows.discard(window_idx)
+                self.dropped_tabs.update((window_idx, idx) for idx in range(1, self._tab_count(window_idx) + 1))
+            self.dropped_tabs.discard((window_idx, tab_idx))
+        else:
+            self.dropped_tabs.add((window_idx, tab_idx))
+
+    def toggle_window(self, window_idx: int) -> bool:
+        self.set_window(window_idx, not self.is_window_kept(window_idx))
+        return self.is_window_kept(window_idx)
+
+    def toggle_tab(self, window_idx: int, tab_idx: int) -> bool:
+        self.set_tab(window_idx, tab_idx, not self.is_tab_kept(window_idx, tab_idx))
+        return self.is_tab_kept(window_idx, tab_idx)
+
+    def select_matching(self, pattern: str, keep: bool) -> int:
+        """
+        Keeps or drops every tab matching pattern, see tab_matcher. Returns the number of matching tabs.
+        """
+        matches = tab_matcher(pattern)
+        count = 0
+        for window_idx, window in enumerate(self.session_data, start=1):
+            for tab_idx, tab in enumerate(window["tabs"], start=1):
+                if matches(tab):
+                    self.set_tab(window_idx, tab_idx, keep)
+                    count += 1
+        return count
+
+    def keep_only_matching(self, pattern: str) -> int:
+        """
+        Keeps the tabs matching pattern and drops all the others. Returns the number of matching tabs.
+        """
+        matches = tab_matcher(pattern)
+        self.dropped_windows.clear()
+        self.dropped_tabs.clear()
+        count = 0
+        for window_idx, window in enumerate(self.session_data, start=1):
+            for tab_idx, tab in enumerate(window["tabs"], start=1):
+                if matches(tab):
+                    count += 1
+                else:
+                    self.dropped_tabs.add((window_idx, tab_idx))
+        return count
+
+    def kept_tab_count(self, window_idx: int) -> int:
+        if not self.is_window_kept(window_idx):
+            return 0
+        tab_count = self._tab_count(window_idx)
+        if not self.dropped_tabs:
+            return tab_count
+        return sum((window_idx, tab_idx) not in self.dropped_tabs for tab_idx in range(1, tab_count + 1))
+
+    def apply(self) -> list[Mapping]:
+        """
+        The kept part of the session in a single pass. Windows without dropped tabs are reused as they are,
+        windows left without any tab are dropped. Entry ids keep referring to the original positions.
+        """
+        windows_with_drops = {window_idx for window_idx, _ in self.dropped_tabs}
+        kept = []
+        for window_idx, window in enumerate(self.session_data, start=1):
+            if window_idx in self.dropped_windows:
+                continue
+            if window_idx not in windows_with_drops:
+                kept.append(window)
+                continue
+            tabs = [
+                tab for tab_idx, tab in enumerate(window["tabs"], start=1)
+                if (window_idx, tab_idx) not in self.dropped_tabs
+            ]
+            if tabs:
+                kept.append({"tabs": tabs, "tab_count": len(tabs)})
+        return kept
@@ -0,0 +1,141 @@
+import os
+import re
+import sys
+import time
+import select
+import ctypes
+import ctypes.util
+from pathlib import Path
+from typing import Callable
+
+from .parsinista import MAGIC_NUMBER
+from .pathionista import is_session_file_name
+
+# from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+
+# upper bound on blocking in inotify mode, in case an event gets lost
+MAX_IDLE_WAIT = 60.0
+
+def _open_inotify(directory: Path) -> int | None:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    # firefox writes sessionstore files to a temporary file and renames it into place
+    if libc.inotify_add_watch(fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+def _has_session_header(path: Path) -> bool:
+    try:
+        with open(path, "rb") as f:
+            # magic followed by the 4 byte decompressed size
+            header = f.read(len(MAGIC_NUMBER) + 4)
+    except OSError:
+        return False
+    return len(header) == len(MAGIC_NUMBER) + 4 and header.startswith(MAGIC_NUMBER)
+
+class SessionWatcher():
+    """
+    Calls on_change for every session file in sessions_dir that changed and then
+    stayed unchanged for settle seconds.
+
+    Waits on inotify where available and falls back to polling every interval seconds.
+    Files are compared by mtime and size, so touching a file without rewriting it
+    still counts as a change.
+    """
+    def __init__(
+        self,
+        sessions_dir: Path,
+        on_change: Callable[[Path], None],
+        pattern: str=".*",
+        interval: float=1.0,
+        settle: float=2.0,
+    ):
+        self.sessions_dir = sessions_dir
+        self.on_change = on_change
+        self.pattern = re.compile(pattern)
+        self.interval = interval
+        self.settle = settle
+        self.exported: dict[Path, tuple[int, int]] = {}
+        self.pending: dict[Path, tuple[tuple[int, int], float]] = {}
+
+    def _scan(self) -> dict[Path, tuple[int, int]]:
+        files = {}
+        try:
+            with os.scandir(self.sessions_dir) as it:
+                for entry in it:
+                    if not is_session_file_name(entry.name) or not self.pattern.match(entry.path):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        return files
+
+    def poll(self) -> None:
+        now = time.monotonic()
+        files = self._scan()
+        for path in list(self.pending):
+            if path not in files:
+                del self.pending[path]
+        for path, stat_key in files.items():
+            if self.exported.get(path) == stat_key:
+                self.pending.pop(path, None)
+                continue
+            pending = self.pending.get(path)
+            if pending is None or pending[0] != stat_key:
+                # changed again, restart the debounce
+                self.pending[path] = (stat_key, now)
+                continue
+            if now - pending[1] < self.settle or not _has_session_header(path):
+                continue
+            del self.pending[path]
+            self.exported[path] = stat_key
+            try:
+                self.on_change(path)
+            except Exception as e:
+                print(f"Failed to export {path}: {type(e).__name__}: {e}")
+
+    def run(self, export_existing: bool=False) -> None:
+        if not export_existing:
+            self.exported.update(self._scan())
+        fd = _open_inotify(self.sessions_dir)
+        mode = "inotify" if fd is not None else f"polling every {self.interval}s"
+        print(f"Watching {self.sessions_dir} ({mode}), press Ctrl+C to stop")
+        try:
+            while True:
+                if fd is None:
+                    time.sleep(self.interval)
+                else:
+                    timeout = min(self.interval, self.settle) if self.pending else MAX_IDLE_WAIT
+                    ready, _, _ = select.select([fd], [], [], timeout)
+                    if ready:
+                        self._drain(fd)
+                self.poll()
+        except KeyboardInterrupt:
+            print("Stopped watching")
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    @staticmethod
+    def _drain(fd: int) -> None:
+        # only the wake up matters, the directory is rescanned anyway
+        try:
+            while os.read(fd, 64 * 1024):
+                pass
+        except BlockingIOError:
+            pass
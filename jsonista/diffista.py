@@ -0,0 +1,50 @@
+from collections.abc import Mapping, Sequence
+from typing import Any, Iterator
+
+from jsonista.indexista import LeafPath
+
+# the container at the path gained or lost keys/items, its children have to be synced
+CHANGED_CHILDREN = "children"
+# the value at the path is a different scalar or a different kind of value altogether
+CHANGED_VALUE = "value"
+
+def _is_sequence(value: Any) -> bool:
+    return isinstance(value, Sequence) and not isinstance(value, str)
+
+def _keys(value: Mapping | Sequence) -> Iterator:
+    return iter(value) if isinstance(value, Mapping) else iter(range(len(value)))
+
+def iter_changes(old: Any, new: Any, path: LeafPath=()) -> Iterator[tuple[LeafPath, str]]:
+    """
+    Yields the paths where new differs from old, outermost first.
+
+    Unchanged subtrees are skipped with a single == (done in C for parsed json),
+    so the walk only descends along the changes.
+    """
+    if isinstance(old, Mapping) and isinstance(new, Mapping):
+        if old.keys() != new.keys():
+            yield path, CHANGED_CHILDREN
+    elif _is_sequence(old) and _is_sequence(new):
+        if len(old) != len(new):
+            yield path, CHANGED_CHILDREN
+    else:
+        if type(old) is not type(new) or old != new:
+            yield path, CHANGED_VALUE
+        return
+
+    for key in _keys(old):
+        if isinstance(new, Mapping):
+            if key not in new:
+                continue
+        elif key >= len(new):
+            break
+        old_child = old[key]
+        new_child = new[key]
+        if old_child is new_child:
+            continue
+        if isinstance(old_child, (dict, list)) and old_child == new_child:
+            continue
+        yield from iter_changes(old_child, new_child, path + (key,))
+
+def diff_documents(old: Any, new: Any) -> list[tuple[LeafPath, str]]:
+    return list(iter_changes(old, new))
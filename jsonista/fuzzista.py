@@ -0,0 +1,122 @@
+import re
+import time
+import heapq
+from typing import Any, Iterator
+
+from jsonista.indexista import LeafPath, iter_leaves
+
+FUZZY_KEYS = ("title", "url")
+BATCH_SIZE = 1024
+DEFAULT_LIMIT = 1000
+FRAME_BUDGET = 1 / 60
+
+SCORE_MATCH = 16
+BONUS_BOUNDARY = 8
+BONUS_CONSECUTIVE = 4
+PENALTY_GAP = 1
+BOUNDARY_CHARS = " /.-_:?&=#"
+
+def _score(text: str, query: str, start: int) -> int:
+    """
+    Scores the tightest occurrence of query as a subsequence of text at or after start.
+    """
+    # forward pass finds where the first occurrence ends...
+    idx = start
+    for char in query:
+        idx = text.index(char, idx) + 1
+    end = idx
+    # ...backward pass moves its start as far right as possible
+    idx = end
+    for char in reversed(query):
+        idx = text.rindex(char, 0, idx)
+    positions = []
+    pos = idx
+    for char in query:
+        pos = text.index(char, pos)
+        positions.append(pos)
+        pos += 1
+
+    score = SCORE_MATCH * len(query)
+    previous = -2
+    for pos in positions:
+        if pos == 0 or text[pos - 1] in BOUNDARY_CHARS:
+            score += BONUS_BOUNDARY
+        if pos == previous + 1:
+            score += BONUS_CONSECUTIVE
+        previous = pos
+    score -= PENALTY_GAP * (positions[-1] - positions[0] + 1 - len(query))
+    # shorter candidates win ties
+    return score * 1024 - min(len(text), 1023)
+
+def _subsequence_regex(query: str) -> re.Pattern:
+    # negated classes instead of .*? so a candidate is decided without backtracking
+    parts = [re.escape(query[0])]
+    parts.extend(f"[^{re.escape(char)}]*{re.escape(char)}" for char in query[1:])
+    return re.compile("".join(parts))
+
+class FuzzyIndex():
+    """
+    Title and url leaves of a document, lowercased once, ranked best first against queries.
+
+    Candidates are filtered by a subsequence regex in batches and only survivors are scored.
+    A query that extends the previous one only looks at the previous matches.
+    """
+    def __init__(self, data: Any):
+        self.paths: list[LeafPath] = []
+        self.texts: list[str] = []
+        for path, value in iter_leaves(data):
+            if path and path[-1] in FUZZY_KEYS and value:
+                self.paths.append(path)
+                self.texts.append(str(value).lower())
+        self._last_query = ""
+        self._last_matches: list[int] | None = None
+
+    def iter_rank(self, query: str, limit: int=DEFAULT_LIMIT, frame_budget: float=FRAME_BUDGET) -> Iterator[list[LeafPath]]:
+        """
+        Yields the best matches found so far, best first, about every frame_budget seconds
+        and once more when all candidates are scored. Stop iterating to cancel.
+        """
+        query = query.lower()
+        if not query:
+            yield []
+            return
+        if self._last_matches is not None and self._last_query and query.startswith(self._last_query):
+            candidates = self._last_matches
+        else:
+            candidates = range(len(self.texts))
+        subsequence = _subsequence_regex(query)
+
+        texts = self.texts
+        matches = []
+        best: list[tuple[int, int]] = []
+        yield_at = time.monotonic() + frame_budget
+        for batch_start in range(0, len(candidates), BATCH_SIZE):
+            for text_id in candidates[batch_start:batch_start + BATCH_SIZE]:
+                found = subsequence.search(texts[text_id])
+                if found is None:
+                    continue
+                matches.append(text_id)
+                entry = (_score(texts[text_id], query, found.start()), -text_id)
+                if len(best) < limit:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+            if time.monotonic() >= yield_at:
+                yield self._ranked_paths(best)
+                yield_at = time.monotonic() + frame_budget
+
+        self._last_query = query
+        self._last_matches = matches
+        yield self._ranked_paths(best)
+
+    def _ranked_paths(self, best: list[tuple[int, int]]) -> list[LeafPath]:
+        return [self.paths[-text_id] for _, text_id in sorted(best, reverse=True)]
+
+    def rank(self, query: str, limit: int=DEFAULT_LIMIT) -> list[LeafPath]:
+        """
+        Paths of the best matching title and url leaves, best first.
+        """
+        ranked = []
+        for ranked in self.iter_rank(query, limit):
+            pass
+        return ranked
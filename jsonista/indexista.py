@@ -0,0 +1,284 @@
+import re
+import threading
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Any, Callable, Iterator
+
+LeafPath = tuple[Any, ...]
+
+QUANTIFIERS = "?*{"
+HEX_DIGITS = "0123456789abcdefABCDEF"
+OCTAL_DIGITS = "01234567"
+# hex digits following \x, \u and \U
+HEX_ESCAPE_LENGTHS = {"x": 2, "u": 4, "U": 8}
+# leaves scanned by a search between two checks of is_cancelled
+CANCEL_CHECK_INTERVAL = 2048
+
+def iter_leaves(data: Any, path: LeafPath=()) -> Iterator[tuple[LeafPath, Any]]:
+    if isinstance(data, Mapping):
+        for key, value in data.items():
+            yield from iter_leaves(value, path + (key,))
+    elif isinstance(data, Sequence) and not isinstance(data, str):
+        for idx, item in enumerate(data):
+            yield from iter_leaves(item, path + (idx,))
+    else:
+        yield path, data
+
+def _trigrams(value: str) -> set[str]:
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+def _skip_group(pattern: str, i: int) -> int:
+    """
+    Returns the index right after the group or character class starting at i.
+    """
+    closing = {"(": ")", "[": "]", "{": "}"}
+    stack = [closing[pattern[i]]]
+    i += 1
+    while i < len(pattern) and stack:
+        c = pattern[i]
+        if c == "\\":
+            i += 2
+            continue
+        if stack[-1] == "]":
+            if c == "]":
+                stack.pop()
+        elif c == stack[-1]:
+            stack.pop()
+        elif c in "([":
+            stack.append(closing[c])
+        i += 1
+    return i
+
+def _skip_escape(pattern: str, i: int) -> int:
+    """
+    Returns the index right after the escape starting with the backslash at i.
+    """
+    escaped = pattern[i + 1:i + 2]
+    i += 2
+    if escaped in HEX_ESCAPE_LENGTHS:
+        end = i
+        while end < i + HEX_ESCAPE_LENGTHS[escaped] and end < len(pattern) and pattern[end] in HEX_DIGITS:
+            end += 1
+        return end
+    if escaped == "N" and pattern[i:i + 1] == "{":
+        end = pattern.find("}", i)
+        return len(pattern) if end == -1 else end + 1
+    if escaped == "0":
+        # \0 and up to two more octal digits
+        end = i
+        while end < i + 2 and end < len(pattern) and pattern[end] in OCTAL_DIGITS:
+            end += 1
+        return end
+    if escaped.isdigit():
+        # three octal digits are a character, anything else a backreference of up to two digits
+        if escaped in OCTAL_DIGITS and len(pattern[i:i + 2]) == 2 and all(c in OCTAL_DIGITS for c in pattern[i:i + 2]):
+            return i + 2
+        return i + 1 if pattern[i:i + 1].isdigit() else i
+    return i
+
+def required_literals(pattern: str) -> list[str]:
+    """
+    Substrings that every match of the regex has to contain.
+
+    Conservative: groups, classes and anything optional are treated as unknown,
+    and a top level alternation means nothing is required at all.
+    """
+    literals = []
+    run = ""
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            escaped = pattern[i + 1:i + 2]
+            if escaped and not escaped.isalnum():
+                char = escaped
+                i += 2
+            else:
+                # \d, \w, \b, backreferences, \x41, \101...
+                literals.append(run)
+                run = ""
+                i = _skip_escape(pattern, i)
+                continue
+        elif c in "([{":
+            literals.append(run)
+            run = ""
+            i = _skip_group(pattern, i)
+            continue
+        elif c == "|":
+            return []
+        elif c in ".^$)+" or c in QUANTIFIERS:
+            literals.append(run)
+            run = ""
+            i += 1
+            continue
+        else:
+            char = c
+            i += 1
+        following = pattern[i:i + 1]
+        if following and following in QUANTIFIERS:
+            # optional character
+            literals.append(run)
+            run = ""
+        elif following == "+":
+            literals.append(run + char)
+            run = ""
+        else:
+            run += char
+    literals.append(run)
+    return [literal for literal in literals if literal]
+
+class LeafIndex():
+    """
+    Flat list of every leaf of a document with a trigram index over its string leaves.
+
+    Queries narrow the candidates with the trigrams of the literals the pattern requires
+    and only run the regex on those and the leaves that aren't strings, instead of walking
+    the whole document. With build_postings=False the trigrams are left for build_postings,
+    e.g. on another thread, and queries scan every leaf until they're built.
+    """
+    def __init__(self, data: Any, build_postings: bool=True):
+        self.data = data
+        self.paths: list[LeafPath] = []
+        self.values: list[str] = []
+        # numbers, booleans and nulls aren't in the postings, they're always scanned
+        self.unindexed = array("I")
+        for leaf_id, (path, value) in enumerate(iter_leaves(data)):
+            self.paths.append(path)
+            if isinstance(value, str):
+                self.values.append(value)
+            else:
+                self.values.append(str(value))
+                self.unindexed.append(leaf_id)
+        # leaf ids by trigram, None until built
+        self.postings: dict[str, array] | None = None
+        self._postings_lock = threading.Lock()
+        if build_postings:
+            self.build_postings()
+
+    @property
+    def ready(self) -> bool:
+        return self.postings is not None
+
+    def build_postings(self) -> None:
+        """
+        Builds the trigram postings if they aren't yet, waiting for a build running on another thread.
+        """
+        with self._postings_lock:
+            if self.postings is not None:
+                return
+            postings: dict[str, array] = {}
+            unindexed = set(self.unindexed)
+            for leaf_id, text in enumerate(self.values):
+                if leaf_id in unindexed:
+                    continue
+                for trigram in _trigrams(text.lower()):
+                    posting = postings.get(trigram)
+                    if posting is None:
+                        posting = postings[trigram] = array("I")
+                    posting.append(leaf_id)
+            self.postings = postings
+
+    def _candidates(self, literals: list[str]) -> list[int] | None:
+        """
+        Sorted ids of the leaves that may match, None if the literals don't narrow anything down
+        or the postings aren't built yet.
+        """
+        postings_by_trigram = self.postings
+        if postings_by_trigram is None:
+            return None
+        trigrams = set()
+        for literal in literals:
+            trigrams |= _trigrams(literal.lower())
+        if not trigrams:
+            return None
+        postings = sorted((postings_by_trigram.get(trigram, ()) for trigram in trigrams), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(posting)
+        candidates.update(self.unindexed)
+        return sorted(candidates)
+
+    def iter_search(
+        self,
+        pattern: str,
+        literal: bool=False,
+        is_cancelled: Callable[[], bool] | None=None
+    ) -> Iterator[int]:
+        """
+        Leaf ids whose value matches the pattern, in document order, as they're found.
+        Invalid patterns raise re.error right away, not on the first next().
+
+        is_cancelled is checked every CANCEL_CHECK_INTERVAL scanned leaves, the search
+        stops once it returns True, even if nothing matched in between.
+        """
+        if literal:
+            regex = re.compile(re.escape(pattern))
+            literals = [pattern]
+        else:
+            regex = re.compile(pattern)
+            # whitespace in verbose patterns isn't literal
+            literals = [] if regex.flags & re.VERBOSE else required_literals(pattern)
+        candidates = self._candidates(literals)
+        leaf_ids = range(len(self.values)) if candidates is None else candidates
+        if is_cancelled is None:
+            values = self.values
+            return (leaf_id for leaf_id in leaf_ids if regex.search(values[leaf_id]))
+        return self._scan(regex, leaf_ids, is_cancelled)
+
+    def _scan(self, regex: re.Pattern, leaf_ids: Sequence[int], is_cancelled: Callable[[], bool]) -> Iterator[int]:
+        values = self.values
+        for start in range(0, len(leaf_ids), CANCEL_CHECK_INTERVAL):
+            if is_cancelled():
+                return
+            for leaf_id in leaf_ids[start:start + CANCEL_CHECK_INTERVAL]:
+                if regex.search(values[leaf_id]):
+                    yield leaf_id
+
+    def search(self, pattern: str, literal: bool=False) -> list[int]:
+        """
+        Leaf ids whose value matches the pattern, in document order.
+        """
+        return list(self.iter_search(pattern, literal))
+
+    def match_children(
+        self,
+        pattern: str,
+        literal: bool=False,
+        is_cancelled: Callable[[], bool] | None=None
+    ) -> dict[LeafPath, dict[Any, None]]:
+        """
+        For every container on the way to a matching leaf, the keys of its children on that way,
+        in document order. Empty if nothing matches. Lets a view show only the matching branches
+        without copying the document like filter() does.
+        """
+        children: dict[LeafPath, dict[Any, None]] = {}
+        for leaf_id in self.iter_search(pattern, literal, is_cancelled):
+            path = self.paths[leaf_id]
+            for depth in range(len(path)):
+                children.setdefault(path[:depth], {})[path[depth]] = None
+        return children
+
+    def filter(self, pattern: str, literal: bool=False) -> Any:
+        """
+        The document pruned down to the branches leading to matching leaves, None if nothing matches.
+        """
+        matches = self.search(pattern, literal)
+        if not matches:
+            return None
+        return prune(self.data, [self.paths[leaf_id] for leaf_id in matches])
+
+def prune(data: Any, paths: list[LeafPath]) -> Any:
+    """
+    Copies only the branches of data leading to the given leaf paths.
+    Lists are compacted, so indices of the kept items can change.
+    """
+    if any(len(path) == 0 for path in paths):
+        return data
+    grouped: dict[Any, list[LeafPath]] = {}
+    for path in paths:
+        grouped.setdefault(path[0], []).append(path[1:])
+    if isinstance(data, Mapping):
+        return {key: prune(data[key], sub_paths) for key, sub_paths in grouped.items()}
+    return [prune(data[idx], sub_paths) for idx, sub_paths in grouped.items()]
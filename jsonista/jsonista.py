@@ -1,20 +1,182 @@
+import os
 import re
 import json
-from typing import Any, Dict, List, Mapping, Union
+import threading
+from typing import Any, Dict, List, Mapping, Sequence, Union
+
+from getinista.packinista import PackedSession, is_packed_session_file
+from jsonista.indexista import LeafIndex
+from jsonista.fuzzista import FuzzyIndex
+
+def _load_json_file(json_path: str) -> Any:
+    if is_packed_session_file(json_path):
+        # memory mapped, windows/tabs/entries are only decoded when they're looked at
+        return PackedSession(json_path)
+    with open(json_path) as json_file:
+        return json.load(json_file)
+
+class JsonDocument:
+    """
+    A parsed json file shared by everything that reads it.
+
+    Documents opened from the same path are the same object, parsed at most once
+    and dropped when the last user releases them. Loading can happen on any thread.
+    """
+    _open_documents: Dict[str, "JsonDocument"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, source: Mapping | list | str):
+        self.source = source
+        self.data: Any = None
+        self._index: LeafIndex | None = None
+        self._fuzzy_index: FuzzyIndex | None = None
+        self._refcount = 0
+        self._load_lock = threading.Lock()
+        self._loaded = threading.Event()
+        if not isinstance(source, str):
+            self.data = source
+            self._loaded.set()
+
+    @classmethod
+    def open(cls, json_data: Mapping | list | str) -> "JsonDocument":
+        """
+        Returns the shared document for json_data with one more reference, without loading it.
+        """
+        if not isinstance(json_data, str):
+            return cls(json_data).acquire()
+        key = os.path.abspath(json_data)
+        with cls._registry_lock:
+            document = cls._open_documents.get(key)
+            if document is None:
+                document = cls._open_documents[key] = cls(json_data)
+            document._refcount += 1
+        return document
+
+    def acquire(self) -> "JsonDocument":
+        with self._registry_lock:
+            self._refcount += 1
+        return self
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded.is_set()
+
+    def load(self) -> Any:
+        with self._load_lock:
+            if not self.loaded:
+                self.data = _load_json_file(self.source) #pyright: ignore[reportArgumentType]
+                self._loaded.set()
+        return self.data
+
+    def read_source(self) -> Any:
+        """
+        Parses the file again without touching the loaded data, see replace_data.
+        """
+        if not isinstance(self.source, str):
+            raise ValueError("Only documents opened from a file can be read again")
+        return _load_json_file(self.source)
+
+    def replace_data(self, data: Any) -> None:
+        """
+        Swaps in data read by read_source for every user of the document.
+        """
+        with self._load_lock:
+            previous = self.data
+            self.data = data
+            self._index = None
+            self._fuzzy_index = None
+            self._loaded.set()
+        if isinstance(previous, PackedSession):
+            previous.close()
+
+    def get_index(self) -> LeafIndex:
+        """
+        The leaf index, created on first use as viewing doesn't need it. Its trigram postings
+        are built by build_index, queries scan every leaf until they are.
+        """
+        with self._load_lock:
+            if self._index is None:
+                self._index = LeafIndex(self.data, build_postings=False)
+            return self._index
+
+    def build_index(self) -> LeafIndex:
+        # outside _load_lock, queries get the index and scan it while this runs
+        index = self.get_index()
+        index.build_postings()
+        return index
+
+    def get_fuzzy_index(self) -> FuzzyIndex:
+        with self._load_lock:
+            if self._fuzzy_index is None:
+                self._fuzzy_index = FuzzyIndex(self.data)
+        return self._fuzzy_index
+
+    def release(self) -> None:
+        with self._registry_lock:
+            self._refcount -= 1
+            if self._refcount > 0:
+                return
+            if isinstance(self.source, str):
+                self._open_documents.pop(os.path.abspath(self.source), None)
+        if isinstance(self.data, PackedSession):
+            self.data.close()
+        self.data = None
+        self._index = None
+        self._fuzzy_index = None
 
 class JsonDataManager:
-    def __init__(self, json_data: Mapping | str):
-        if isinstance(json_data, Mapping):
-            self.data = json_data
+    def __init__(self, json_data: Mapping | list | str | JsonDocument, load: bool=True):
+        """
+        With load=False the document is only loaded by an explicit load(), e.g. from a worker thread.
+        """
+        if isinstance(json_data, JsonDocument):
+            self.document = json_data.acquire()
         else:
-            with open(json_data) as json_file:
-                self.data = json.load(json_file)
+            self.document = JsonDocument.open(json_data)
+        if load:
+            self.load()
+
+    @classmethod
+    def from_archive(cls, archive_path: str, query: str, limit: int=1000) -> "JsonDataManager":
+        """
+        Full text search over a session archive, matching entries grouped by the snapshot they're from.
+        """
+        from getinista.archivista import SessionArchive
+
+        archive = SessionArchive(archive_path)
+        try:
+            grouped: Dict[str, List[Dict[str, str]]] = {}
+            for row in archive.search(query, limit):
+                snapshot = f"{row['snapshot']}: {row['source']}"
+                grouped.setdefault(snapshot, []).append({"id": row["id"], "title": row["title"], "url": row["url"]})
+        finally:
+            archive.close()
+        return cls(grouped)
+
+    def load(self) -> Any:
+        return self.document.load()
+
+    def close(self) -> None:
+        self.document.release()
+
+    @property
+    def data(self) -> Any:
+        return self.document.data
 
     def get_all_data(self) -> Mapping:
-        return self.data
+        return self.document.data
+
+    def get_index(self) -> LeafIndex:
+        return self.document.get_index()
+
+    def build_index(self) -> LeafIndex:
+        return self.document.build_index()
+
+    def get_fuzzy_index(self) -> FuzzyIndex:
+        return self.document.get_fuzzy_index()
 
     def get_filtered_data(self, text_filter: str) -> Dict[Any, Any] | List[Any] | None:
-        return filter_mapping_by_regex(self.data, text_filter)
+        return self.get_index().filter(text_filter)
 
 
 def filter_mapping_by_regex(
@@ -29,9 +191,9 @@ def filter_mapping_by_regex(
                 filtered_value = recursive_filter(value)
                 if filtered_value is not None:
                     filtered_dict[key] = filtered_value
-            return element if filtered_dict else None
+            return filtered_dict if filtered_dict else None
 
-        elif isinstance(element, list):
+        elif isinstance(element, Sequence) and not isinstance(element, str):
             filtered_list = []
             for item in element:
                 filtered_item = recursive_filter(item)
@@ -0,0 +1,48 @@
+import json
+
+import lz4.block
+import pytest
+
+from getinista.parsinista import MAGIC_NUMBER
+
+def make_firefox_session(windows: int=3, tabs: int=3, entries: int=2) -> dict:
+    """
+    A decoded sessionstore with distinct titles and urls for every entry, showing the last entry of every tab.
+    Keys are in the order firefox writes them.
+    """
+    return {
+        "version": ["sessionrestore", 1],
+        "windows": [
+            {
+                "tabs": [
+                    {
+                        "entries": [
+                            {"url": f"https://site{t}.example/{w}/{e}", "title": f"Page {w}.{t}.{e}"}
+                            for e in range(1, entries + 1)
+                        ],
+                        "index": entries,
+                    }
+                    for t in range(1, tabs + 1)
+                ],
+                "selected": 1,
+            }
+            for w in range(1, windows + 1)
+        ],
+        "selectedWindow": 1,
+        "_closedWindows": [],
+    }
+
+def write_firefox_session(file_path, session: dict) -> None:
+    with open(file_path, "wb") as f:
+        f.write(MAGIC_NUMBER)
+        f.write(lz4.block.compress(json.dumps(session).encode("utf-8"), store_size=True))
+
+@pytest.fixture
+def firefox_session() -> dict:
+    return make_firefox_session()
+
+@pytest.fixture
+def session_file(tmp_path, firefox_session):
+    file_path = tmp_path / "recovery.jsonlz4"
+    write_firefox_session(file_path, firefox_session)
+    return file_path
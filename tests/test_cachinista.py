@@ -0,0 +1,77 @@
+import os
+import shutil
+
+import pytest
+
+from getinista.cachinista import SessionCache
+
+SESSION = [{"tabs": [[{"id": "1:1:1", "title": "a", "url": "https://a.example"}]], "tab_count": 1}]
+
+@pytest.fixture
+def session_file(tmp_path):
+    file_path = tmp_path / "recovery.jsonlz4"
+    file_path.write_bytes(b"mozLz40\0" + bytes(range(256)) * 64)
+    return file_path
+
+def _touch_later(file_path):
+    stat = os.stat(file_path)
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+def test_hit_and_miss_on_change(tmp_path, session_file):
+    cache = SessionCache(tmp_path / "cache")
+    assert cache.get(session_file) is None
+    cache.put(session_file, SESSION)
+    assert cache.get(session_file) == SESSION
+    _touch_later(session_file)
+    assert cache.get(session_file) is None
+
+def test_content_hash_hits_a_copy_without_mtime(tmp_path, session_file):
+    cache = SessionCache(tmp_path / "cache", hash_content=True)
+    cache.put(session_file, SESSION)
+    copy = tmp_path / "elsewhere" / "copy.jsonlz4"
+    copy.parent.mkdir()
+    shutil.copyfile(session_file, copy)
+    _touch_later(copy)
+    assert cache.get(copy) == SESSION
+    assert SessionCache(tmp_path / "cache", hash_content=True).get(copy) == SESSION
+
+def test_content_hash_misses_changed_content(tmp_path, session_file):
+    cache = SessionCache(tmp_path / "cache", hash_content=True)
+    cache.put(session_file, SESSION)
+    data = bytearray(session_file.read_bytes())
+    data[-1] ^= 1
+    session_file.write_bytes(data)
+    _touch_later(session_file)
+    assert cache.get(session_file) is None
+
+def test_namespaces_dont_see_each_other(tmp_path, session_file):
+    for hash_content in (False, True):
+        cache_dir = tmp_path / f"cache{hash_content}"
+        SessionCache(cache_dir, hash_content=hash_content).put(session_file, SESSION)
+        assert SessionCache(cache_dir, hash_content=hash_content, namespace="preview").get(session_file) is None
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    files = []
+    for idx in range(3):
+        file_path = tmp_path / f"{idx}.jsonlz4"
+        file_path.write_bytes(bytes([idx]) * 16)
+        files.append(file_path)
+    cache = SessionCache(tmp_path / "cache")
+    cache.put(files[0], SESSION)
+    entry_size = os.path.getsize(cache.entry_path(files[0]))
+    cache.max_size = 2 * entry_size
+    cache.put(files[1], SESSION)
+    # entries are ordered by mtime, make the first one the most recently used
+    os.utime(cache.entry_path(files[1]), ns=(0, 0))
+    cache.get(files[0])
+    cache.put(files[2], SESSION)
+    assert files[0] in cache
+    assert files[1] not in cache
+    assert files[2] in cache
+
+def test_broken_entries_are_dropped(tmp_path, session_file):
+    cache = SessionCache(tmp_path / "cache")
+    cache.put(session_file, SESSION)
+    cache.entry_path(session_file).write_text("{", encoding="utf-8")
+    assert cache.get(session_file) is None
+    assert session_file not in cache
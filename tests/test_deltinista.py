@@ -0,0 +1,118 @@
+import copy
+import json
+
+import pytest
+
+from getinista.cli import main
+from getinista.deltinista import apply_delta, compact_session, diff_sessions, load_session_chain
+
+def _session(windows: list[list[list[str]]]) -> list[dict]:
+    """
+    A simplified session from the urls of every tab, with positional ids.
+    """
+    return [
+        {
+            "tabs": [
+                [
+                    {"id": f"{w}:{t}:{e}", "title": url.upper(), "url": url}
+                    for e, url in enumerate(urls, start=1)
+                ]
+                for t, urls in enumerate(tabs, start=1)
+            ],
+            "tab_count": len(tabs),
+        }
+        for w, tabs in enumerate(windows, start=1)
+    ]
+
+def _urls(window_idx: int, count: int) -> list[list[str]]:
+    return [[f"https://{window_idx}.example/{t}/a", f"https://{window_idx}.example/{t}/b"] for t in range(count)]
+
+def _with_ids(session: list[dict], window_idx: int, tab_ids: list[str]) -> list[dict]:
+    session = copy.deepcopy(session)
+    for tab_id, entries in zip(tab_ids, session[window_idx - 1]["tabs"]):
+        for entry_idx, entry in enumerate(entries, start=1):
+            entry["id"] = f"{tab_id}:{entry_idx}"
+    return session
+
+OLD = [_urls(1, 50), _urls(2, 30), _urls(3, 5)]
+
+def _edited(edit) -> list[list[list[str]]]:
+    windows = copy.deepcopy(OLD)
+    edit(windows)
+    return windows
+
+@pytest.mark.parametrize("edit", [
+    lambda windows: None,
+    lambda windows: windows[0].pop(0),
+    lambda windows: windows[0].append(["https://new.example/"]),
+    lambda windows: windows[0][10].append("https://1.example/10/c"),
+    lambda windows: windows[1].insert(3, windows[1].pop(20)),
+    lambda windows: windows.pop(0),
+    lambda windows: windows.insert(0, [["https://new.example/"]]),
+    lambda windows: windows[2].extend(windows[0][:2]),
+    lambda windows: windows[2].clear(),
+    lambda windows: windows.append(_urls(1, 3)),
+])
+def test_delta_rebuilds_the_new_session(edit):
+    old = _session(OLD)
+    new = _session(_edited(edit))
+    delta = json.loads(json.dumps(diff_sessions(old, new)))
+    assert apply_delta(old, delta) == new
+
+def test_delta_only_holds_changed_tabs():
+    old = _session(OLD)
+    new = _session(_edited(lambda windows: (windows[0].pop(0), windows[1][5].append("https://x.example/"))))
+    delta = diff_sessions(old, new)
+    assert delta["windows"] == [
+        {"removed": [1]},
+        {"removed": [6], "added": [{"position": 6, "entries": [
+            *({"title": url.upper(), "url": url} for url in OLD[1][5]),
+            {"title": "HTTPS://X.EXAMPLE/", "url": "https://x.example/"},
+        ]}]},
+        {},
+    ]
+    assert delta["summary"] == {"windows": 3, "old_windows": 3, "new_tabs": 1, "kept_tabs": 83, "removed_tabs": 2}
+
+def test_order_is_only_written_when_it_changed():
+    old = _session(OLD)
+    moved = diff_sessions(old, _session(_edited(lambda windows: windows[1].insert(0, windows[1].pop()))))
+    assert moved["windows"][1]["order"] == [30, *range(1, 30)]
+    assert "removed" not in moved["windows"][1] and "added" not in moved["windows"][1]
+    # windows closed before others are found by their tabs
+    closed = diff_sessions(old, _session(_edited(lambda windows: windows.pop(0))))
+    assert closed["windows"] == [{"from": 2}, {"from": 3}]
+
+def test_picked_ids_are_kept():
+    old = _session(OLD)
+    new = _with_ids(_session([OLD[0][:2]]), 1, ["1:3", "1:7"])
+    delta = diff_sessions(old, new)
+    assert delta["windows"][0]["ids"] == {"1": "1:3", "2": "1:7"}
+    assert apply_delta(old, delta) == new
+
+def test_delta_for_another_session_is_rejected():
+    old = _session(OLD)
+    delta = diff_sessions(old, _session(_edited(lambda windows: windows[0].pop())))
+    with pytest.raises(ValueError, match="another session"):
+        apply_delta(_session(_edited(lambda windows: windows[2].pop())), delta)
+
+def test_chain_compacts_to_the_last_session(tmp_path):
+    sessions = [
+        _session(OLD),
+        _session(_edited(lambda windows: windows[0].pop(3))),
+        _session(_edited(lambda windows: (windows[0].pop(3), windows.append([["https://new.example/"]])))),
+        _session(_edited(lambda windows: (windows[0].pop(3), windows.pop(1)))),
+    ]
+    deltas = [diff_sessions(old, new) for old, new in zip(sessions, sessions[1:])]
+    assert compact_session(sessions[0], deltas) == sessions[-1]
+
+    paths = [str(tmp_path / "base.json")] + [str(tmp_path / f"delta{i}.json") for i in range(len(deltas))]
+    for path, data in zip(paths, [sessions[0], *deltas]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+    assert load_session_chain(paths) == sessions[-1]
+    with pytest.raises(ValueError):
+        load_session_chain(paths[1:])
+
+    output_path = tmp_path / "compacted.json"
+    main(["compact", *paths, "-o", str(output_path)])
+    assert json.loads(output_path.read_text(encoding="utf-8")) == sessions[-1]
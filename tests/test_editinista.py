@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from getinista.editinista import EditLog, load_tag_index, log_file_for
+from getinista.modelista import json_default
+from getinista.parsinista import process_session_data
+
+@pytest.fixture
+def json_session(tmp_path, firefox_session):
+    file_path = tmp_path / "session.json"
+    session_data = process_session_data(firefox_session)
+    file_path.write_text(json.dumps(session_data, default=json_default, indent=2), encoding="utf-8")
+    return str(file_path)
+
+def _state(log: EditLog):
+    return log.marked, log.tags, log.deleted
+
+def test_log_is_replayed(json_session):
+    log = EditLog(json_session)
+    log.record("mark", "1:2")
+    log.record("mark", "2")
+    log.record("unmark", "2")
+    log.record("tag", "1:2", "read later")
+    log.record("tag", "3:1:2", "read later")
+    log.record("tag", "3:1:2", "work")
+    log.record("untag", "3:1:2", "work")
+    log.record("delete", "2:3")
+    log.record("delete", "3")
+    log.record("restore", "3")
+
+    replayed = EditLog(json_session)
+    assert _state(replayed) == _state(log)
+    assert replayed.is_marked("1:2") and not replayed.is_marked("2")
+    assert replayed.is_deleted("2:3:1") and not replayed.is_deleted("3:1")
+    assert replayed.tags_of("3:1:2") == ["read later"]
+    with pytest.raises(ValueError):
+        log.record("tag", "1:1")
+
+def test_tag_index_is_read_without_the_session(json_session):
+    log = EditLog(json_session)
+    log.record("tag", "1:2", "read later")
+    log.record("tag", "2", "work")
+    log.record("tag", "3:1:2", "read later")
+    assert load_tag_index(json_session) == {"read later": ["1:2", "3:1:2"], "work": ["2"]}
+    log.record("untag", "2", "work")
+    assert load_tag_index(json_session) == {"read later": ["1:2", "3:1:2"]}
+
+def test_cut_off_last_line_is_replaced_by_the_next_record(json_session):
+    log = EditLog(json_session)
+    log.record("mark", "1:1")
+    with open(log_file_for(json_session), "a", encoding="utf-8") as f:
+        f.write('{"op": "mark", "id"')
+
+    log = EditLog(json_session)
+    assert list(log.marked) == ["1:1"]
+    log.record("mark", "1:2")
+    assert list(EditLog(json_session).marked) == ["1:1", "1:2"]
+
+def test_save_drops_deleted_items_and_compacts_the_log(json_session):
+    log = EditLog(json_session)
+    log.record("delete", "1")
+    log.record("delete", "2:2")
+    log.record("delete", "3:1:1")
+    log.record("mark", "2:2")
+    log.record("mark", "3:3")
+    log.record("tag", "3:3:2", "keep")
+    stats = log.save()
+    assert (stats.windows, stats.tabs, stats.entries) == (1, 1, 1)
+
+    with open(json_session, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert [[[entry["id"] for entry in tab] for tab in window["tabs"]] for window in saved] == [
+        [["2:1:1", "2:1:2"], ["2:3:1", "2:3:2"]],
+        [["3:1:2"], ["3:2:1", "3:2:2"], ["3:3:1", "3:3:2"]],
+    ]
+    assert [window["tab_count"] for window in saved] == [2, 3]
+    with open(log_file_for(json_session), encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == [
+            {"op": "mark", "id": "3:3"}, {"op": "tag", "id": "3:3:2", "tag": "keep"},
+        ]
+    assert load_tag_index(json_session) == {"keep": ["3:3:2"]}
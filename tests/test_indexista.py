@@ -0,0 +1,69 @@
+import re
+
+import pytest
+
+from jsonista.indexista import CANCEL_CHECK_INTERVAL, LeafIndex, required_literals
+from jsonista.jsonista import JsonDocument
+
+@pytest.mark.parametrize("pattern, literals", [
+    (r"\x41bc", ["bc"]),
+    (r"\u0041bc", ["bc"]),
+    (r"\U00000041bc", ["bc"]),
+    (r"\N{LATIN CAPITAL LETTER A}bc", ["bc"]),
+    (r"\101bc", ["bc"]),
+    (r"\0bc", ["bc"]),
+    (r"ab\1cd", ["ab", "cd"]),
+    (r"a\.bc", ["a.bc"]),
+])
+def test_required_literals_skip_whole_escapes(pattern, literals):
+    assert required_literals(pattern) == literals
+
+@pytest.mark.parametrize("pattern", [r"\x41bc", r"\101bc", r"Abc"])
+def test_search_with_escapes(pattern):
+    data = [{"title": "Abc", "url": "https://example.com"}, {"title": "xyz", "url": "https://abc.org"}]
+    index = LeafIndex(data)
+    expected = [leaf_id for leaf_id, value in enumerate(index.values) if re.search(pattern, value)]
+    assert expected
+    assert index.search(pattern) == expected
+
+def test_search_finds_leaves_outside_titles_and_urls():
+    data = [{"tabs": [[{"id": "1:1:1", "title": "a", "url": "b"}]], "tab_count": 1}]
+    index = LeafIndex(data)
+    assert [index.paths[leaf_id] for leaf_id in index.search("1:1:1")] == [(0, "tabs", 0, 0, "id")]
+
+def test_search_stops_when_cancelled_without_matches():
+    data = ["nothing"] * (3 * CANCEL_CHECK_INTERVAL) + ["needle"]
+    index = LeafIndex(data)
+    checks = []
+
+    def is_cancelled():
+        checks.append(None)
+        return len(checks) > 1
+
+    assert list(index.iter_search("needle|xyz", is_cancelled=is_cancelled)) == []
+    assert len(checks) == 2
+    assert index.search("needle|xyz") == [len(data) - 1]
+
+def test_only_string_leaves_are_in_the_postings():
+    data = [{"tabs": [[{"id": "1:1:1", "title": "release 1700", "url": "b"}]], "tab_count": 1700, "pinned": True}]
+    index = LeafIndex(data)
+    assert all(posting.typecode == "I" for posting in index.postings.values())
+    assert list(index.unindexed) == [3, 4]
+    assert not any(3 in posting or 4 in posting for posting in index.postings.values())
+    # numbers are scanned along with the candidates
+    assert [index.paths[leaf_id] for leaf_id in index.search("1700")] == [(0, "tabs", 0, 0, "title"), (0, "tab_count")]
+    assert [index.paths[leaf_id] for leaf_id in index.search("True")] == [(0, "pinned")]
+
+def test_queries_scan_every_leaf_until_the_postings_are_built():
+    data = [{"title": f"page {i}", "url": f"https://site{i % 3}.example/"} for i in range(50)]
+    document = JsonDocument(data)
+    index = document.get_index()
+    assert not index.ready
+    # a build holding the lock on another thread doesn't block queries
+    with index._postings_lock:
+        unindexed_matches = index.search("site1")
+        assert document.get_index() is index
+    assert document.build_index() is index
+    assert index.ready
+    assert index.search("site1") == unindexed_matches
+    assert len(unindexed_matches) == 17
@@ -0,0 +1,37 @@
+import asyncio
+
+from tui.tui import JsonTreeApp
+
+DATA = [
+    {"tabs": [[{"id": "1:1:1", "title": "needle", "url": "https://a.example/"}], [{"id": "1:2:1", "title": "hay", "url": "https://b.example/"}]], "tab_count": 2},
+    {"tabs": [[{"id": "2:1:1", "title": "hay", "url": "https://c.example/"}]], "tab_count": 1},
+]
+
+def _child_keys(node):
+    return [child.data[-1] for child in node.children]
+
+def test_filter_rebuilds_under_the_same_root():
+    async def run() -> None:
+        app = JsonTreeApp(DATA)
+        async with app.run_test() as pilot:
+            view = app.tree_view
+            root = view.root
+            view.reveal_path((1, "tabs", 0, 0, "url"))
+            expanded = view._expanded_paths()
+
+            view.start_filter("needle")
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            assert view.root is root
+            assert _child_keys(root) == [0]
+            tab = view._materialized_node((0, "tabs", 0, 0))
+            assert tab.data == (0, "tabs", 0, 0) and _child_keys(tab) == ["title"]
+
+            view.start_filter("")
+            await pilot.pause()
+            assert view.root is root
+            assert _child_keys(root) == [0, 1]
+            assert view._expanded_paths() == expanded
+            assert view._materialized_node((1, "tabs", 0, 0, "url")).data == (1, "tabs", 0, 0, "url")
+
+    asyncio.run(run())
@@ -0,0 +1,67 @@
+import json
+
+from getinista.cli import main
+from getinista.merginista import MergeStore, store_to_session
+
+def _export(tmp_path, name, windows):
+    file_path = tmp_path / name
+    session = [
+        {"tabs": [[{"title": url, "url": url} for url in tab] for tab in tabs], "tab_count": len(tabs)}
+        for tabs in windows
+    ]
+    file_path.write_text(json.dumps(session), encoding="utf-8")
+    return str(file_path)
+
+def _records(store_path):
+    with open(store_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_merge_dedupes_across_exports(tmp_path):
+    store_path = str(tmp_path / "store.jsonl")
+    first = _export(tmp_path, "first.json", [[["https://a.example/"], ["https://b.example/", "https://c.example/"]]])
+    # a normalizes to the same url, b/c is the same history, c alone isn't
+    second = _export(tmp_path, "second.json", [[["HTTPS://A.example:443/#top"]], [["https://b.example", "https://c.example/"], ["https://c.example/"]]])
+
+    stats = MergeStore(store_path).merge([first, second])
+    assert (stats.sources, stats.tabs, stats.unique_tabs, stats.duplicates) == (2, 5, 3, 2)
+    duplicates = [record for record in _records(store_path) if record["type"] == "duplicate"]
+    assert [(record["source"], record["window"], record["tab"]) for record in duplicates] == [(2, 1, 1), (2, 2, 1)]
+
+    # merged files are skipped, the keys are read back from the store
+    stats = MergeStore(store_path).merge([first, second])
+    assert stats.sources == 0
+    assert [len(window["tabs"]) for window in store_to_session(store_path)] == [2, 1]
+
+def test_merge_dedupe_by_url(tmp_path):
+    store_path = str(tmp_path / "store.jsonl")
+    first = _export(tmp_path, "first.json", [[["https://a.example/", "https://c.example/"]]])
+    second = _export(tmp_path, "second.json", [[["https://b.example/", "https://c.example/"]]])
+    stats = MergeStore(store_path, "url").merge([first, second])
+    assert (stats.unique_tabs, stats.duplicates) == (1, 1)
+
+def test_cut_off_last_line_is_ignored_and_ended(tmp_path):
+    store_path = tmp_path / "store.jsonl"
+    first = _export(tmp_path, "first.json", [[["https://a.example/"]]])
+    second = _export(tmp_path, "second.json", [[["https://b.example/"]]])
+    MergeStore(str(store_path)).merge([first, second])
+    # a crash while writing the complete line of the second file
+    lines = store_path.read_text(encoding="utf-8").splitlines(keepends=True)
+    store_path.write_text("".join(lines[:-1]) + lines[-1][:10], encoding="utf-8")
+    assert [window["tabs"] for window in store_to_session(str(store_path))] == [
+        [[{"title": "https://a.example/", "url": "https://a.example/", "id": "1:1:1"}]]
+    ]
+
+    merge_store = MergeStore(str(store_path))
+    stats = merge_store.merge([first, second])
+    assert (stats.sources, stats.unique_tabs) == (1, 1)
+    records = _records(store_path)
+    assert records[-1] == {"type": "complete", "source": 3}
+    assert len(store_to_session(str(store_path))) == 2
+
+def test_merge_subcommand(tmp_path, capsys):
+    store_path = str(tmp_path / "store.jsonl")
+    output_path = tmp_path / "merged.json"
+    first = _export(tmp_path, "first.json", [[["https://a.example/"], ["https://a.example/"]]])
+    main(["merge", store_path, first, "-o", str(output_path)])
+    assert "1 new unique tabs, 1 duplicates" in capsys.readouterr().out
+    assert [window["tab_count"] for window in json.loads(output_path.read_text(encoding="utf-8"))] == [1]
@@ -0,0 +1,53 @@
+import threading
+import tracemalloc
+
+import pytest
+
+from getinista.metrinista import run_peak, span
+
+MB = 2**20
+
+@pytest.fixture
+def tracing():
+    tracemalloc.start()
+    yield
+    tracemalloc.stop()
+
+def test_run_peak_survives_spans(tracing):
+    block = bytearray(20 * MB)
+    del block
+    with span("after"):
+        pass
+    assert run_peak() >= 20 * MB
+
+def test_nested_span_peak_is_included_in_the_outer_one(tracing):
+    with span("outer") as outer:
+        with span("inner") as inner:
+            block = bytearray(10 * MB)
+            del block
+        with span("next"):
+            pass
+    assert inner.peak_bytes >= 10 * MB
+    assert outer.peak_bytes >= 10 * MB
+
+def test_spans_on_other_threads_dont_hide_a_peak(tracing):
+    allocated = threading.Event()
+    other_done = threading.Event()
+    measured = {}
+
+    def measure():
+        with span("allocate") as s:
+            block = bytearray(10 * MB)
+            del block
+            allocated.set()
+            other_done.wait(5)
+        measured["peak"] = s.peak_bytes
+
+    thread = threading.Thread(target=measure)
+    thread.start()
+    allocated.wait(5)
+    with span("other"):
+        pass
+    other_done.set()
+    thread.join()
+    assert measured["peak"] >= 10 * MB
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from getinista.modelista import json_default
+from getinista.packinista import PackedSession, is_packed_session_file, pack_session
+from getinista.parsinista import process_session_data
+from getinista.selectinista import Selection
+
+def _json_export(session_data) -> list[dict]:
+    return json.loads(json.dumps(session_data, default=json_default))
+
+def _read_back(tmp_path, session_data, compress: bool) -> list[dict]:
+    file_path = tmp_path / "session.snpk"
+    file_path.write_bytes(pack_session(session_data, compress))
+    assert is_packed_session_file(str(file_path))
+    packed = PackedSession(str(file_path))
+    try:
+        return packed.to_simplified()
+    finally:
+        packed.close()
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_round_trip(tmp_path, firefox_session, compress):
+    session_data = process_session_data(firefox_session)
+    assert _read_back(tmp_path, session_data, compress) == _json_export(session_data)
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_round_trip_keeps_ids_of_a_partial_selection(tmp_path, firefox_session, compress):
+    selection = Selection(process_session_data(firefox_session))
+    selection.set_window(1, False)
+    selection.set_tab(2, 1, False)
+    kept = selection.apply()
+    expected = _json_export(kept)
+    assert expected[0]["tabs"][0][0]["id"] == "2:2:1"
+    assert _read_back(tmp_path, kept, compress) == expected
+
+def test_round_trip_keeps_ids_of_deleted_entries(tmp_path):
+    session_data = [{"tabs": [[{"id": "4:7:2", "title": "a", "url": "b"}, {"id": "4:7:5", "title": "c", "url": "d"}]], "tab_count": 1}]
+    assert _read_back(tmp_path, session_data, False) == session_data
+
+def test_ids_that_cant_be_packed(tmp_path):
+    session_data = [{"tabs": [[{"id": "not-an-id", "title": "a", "url": "b"}]], "tab_count": 1}]
+    with pytest.raises(ValueError):
+        pack_session(session_data)
@@ -0,0 +1,56 @@
+import io
+import json
+
+import lz4.block
+import pytest
+
+from getinista.parsinista import (
+    MAGIC_NUMBER, decompress_session_block, iter_json_array_file, preview_session_file, read_compressed_block,
+)
+from conftest import make_firefox_session
+
+def _write(file_path, session, separators):
+    json_data = json.dumps(session, separators=separators).encode("utf-8")
+    file_path.write_bytes(MAGIC_NUMBER + lz4.block.compress(json_data, store_size=True))
+
+@pytest.mark.parametrize("separators", [(",", ":"), (", ", ": ")])
+def test_preview_counts_the_pages_tabs_show(tmp_path, separators):
+    session = make_firefox_session(windows=2, tabs=3, entries=3)
+    tabs = session["windows"][0]["tabs"]
+    tabs[0]["index"] = 1
+    del tabs[1]["index"]
+    tabs[2]["entries"][1]["children"] = [{"url": "https://frame.example/", "title": "frame"}]
+    tabs[2]["index"] = 2
+    tabs.insert(1, {"entries": [{"url": 'https://Quote.example/"q"'}], "index": 1})
+    tabs.insert(1, {"entries": [{"url": "about:blank"}], "index": 1})
+    session["windows"][1]["tabs"][0]["entries"][2]["formdata"] = {"url": "https://form.example/", "id": {"q": "x"}}
+    session["windows"][1]["tabs"].append({"entries": [], "index": 0})
+    session["windows"][1]["_closedTabs"] = [{"state": {"entries": [{"url": "https://closed.example/"}], "index": 1}}]
+    session["session"] = {"lastUpdate": 1700000000000}
+    file_path = tmp_path / "recovery.jsonlz4"
+    _write(file_path, session, separators)
+
+    preview = preview_session_file(str(file_path))
+    assert (preview.window_count, preview.tab_count) == (2, 9)
+    assert preview.last_modified == 1700000000
+    # tab 1 shows its first entry, tab 2 has no index and shows its last, tab 3 its second
+    assert dict(preview.top_domains) == {
+        "site1.example": 2, "site2.example": 2, "site3.example": 2, "quote.example": 1,
+    }
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 64])
+def test_iter_json_array_file_reads_items_cut_between_chunks(chunk_size):
+    items = [1.5, -2e10, 30, 4E-2, True, None, "a \\\"b\\\"", {"tabs": [[{"url": "u"}]], "n": 0.25}, []]
+    text = json.dumps(items, separators=(", ", ": "))
+    assert list(iter_json_array_file(io.StringIO(text), chunk_size)) == items
+
+def test_iter_json_array_file_rejects_what_isnt_an_array():
+    with pytest.raises(ValueError):
+        list(iter_json_array_file(io.StringIO('{"a": 1}')))
+    with pytest.raises(ValueError):
+        list(iter_json_array_file(io.StringIO("[1, 2"), 1))
+
+def test_block_is_freed_before_decoding(session_file, firefox_session):
+    block = read_compressed_block(str(session_file))
+    assert json.loads(decompress_session_block(block)) == firefox_session
+    assert len(block) == 0
@@ -0,0 +1,13 @@
+from getinista.pathionista import Profile
+
+def test_sessions_skip_files_firefox_is_still_writing(tmp_path):
+    backups = tmp_path / "sessionstore-backups"
+    backups.mkdir()
+    for name in [
+        "recovery.jsonlz4", "recovery.baklz4", "recovery.jsonlz4.tmp", "previous.jsonlz4",
+        "upgrade.jsonlz4-20240101000000", "upgrade.jsonlz4-20240101000000.tmp", "notes.lz4.txt",
+    ]:
+        (backups / name).write_bytes(b"mozLz40\0")
+    names = [session.path.name for session in Profile(tmp_path).sessions]
+    assert sorted(names[:2]) == ["recovery.baklz4", "recovery.jsonlz4"]
+    assert sorted(names[2:]) == ["previous.jsonlz4", "upgrade.jsonlz4-20240101000000"]
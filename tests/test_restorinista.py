@@ -0,0 +1,84 @@
+import pytest
+
+from getinista import restorinista
+from getinista.cli import main
+from getinista.parsinista import FileExistsError, decompress_session_file, process_session_data
+from getinista.restorinista import prune_session, prune_session_file, truncate_history, write_session_file
+from getinista.selectinista import Selection
+
+def _tab(entries: int, index: int | None=None, requested: int=0) -> dict:
+    tab = {"entries": [{"url": f"https://site.example/{e}"} for e in range(1, entries + 1)]}
+    if index is not None:
+        tab["index"] = index
+    if requested:
+        tab["requestedIndex"] = requested
+    return tab
+
+def _urls(tab: dict) -> list[int]:
+    return [int(entry["url"].rsplit("/", 1)[1]) for entry in tab["entries"]]
+
+@pytest.mark.parametrize("index, max_entries, kept, new_index", [
+    (5, 3, [3, 4, 5], 3),
+    (1, 3, [1, 2, 3], 1),
+    (10, 4, [7, 8, 9, 10], 4),
+    (None, 2, [9, 10], 2),
+    (5, 1, [5], 1),
+])
+def test_truncate_history_keeps_the_shown_entry(index, max_entries, kept, new_index):
+    tab = _tab(10, index)
+    assert truncate_history(tab, max_entries) == 10 - max_entries
+    assert (_urls(tab), tab["index"]) == (kept, new_index)
+
+def test_truncate_history_moves_requested_index():
+    tab = _tab(10, 8, requested=6)
+    truncate_history(tab, 3)
+    assert (_urls(tab), tab["index"], tab["requestedIndex"]) == ([6, 7, 8], 3, 1)
+    with pytest.raises(ValueError):
+        truncate_history(_tab(3, 1), 0)
+    assert truncate_history(_tab(3, 1), 3) == 0
+
+def test_prune_remaps_selected_and_drops_closed(firefox_session):
+    firefox_session["windows"][1]["selected"] = 3
+    firefox_session["windows"][1]["_closedTabs"] = [{"state": _tab(1)}] * 2
+    firefox_session["selectedWindow"] = 3
+    firefox_session["_closedWindows"] = [{"tabs": []}]
+    selection = Selection(process_session_data(firefox_session))
+    selection.set_window(1, keep=False)
+    selection.set_tab(2, 3, keep=False)
+
+    stats = prune_session(firefox_session, selection, max_history=1, drop_closed=True)
+    assert (stats.windows, stats.tabs, stats.entries, stats.closed_windows, stats.closed_tabs) == (1, 4, 5, 1, 2)
+    windows = firefox_session["windows"]
+    assert [len(window["tabs"]) for window in windows] == [2, 3]
+    assert windows[0]["selected"] == 2
+    assert firefox_session["selectedWindow"] == 2
+    assert all(len(tab["entries"]) == 1 for window in windows for tab in window["tabs"])
+
+def test_written_file_reads_back_as_the_session(tmp_path, firefox_session):
+    output_file = str(tmp_path / "pruned.jsonlz4")
+    stats = write_session_file(firefox_session, output_file)
+    assert decompress_session_file(output_file) == firefox_session
+    assert stats.output_bytes == (tmp_path / "pruned.jsonlz4").stat().st_size
+    with pytest.raises(FileExistsError):
+        write_session_file(firefox_session, output_file)
+
+def test_file_that_doesnt_read_back_is_not_written(tmp_path, firefox_session, monkeypatch):
+    monkeypatch.setattr(restorinista, "decompress_session_file", lambda path: {"windows": []})
+    with pytest.raises(ValueError, match="doesn't read back"):
+        write_session_file(firefox_session, str(tmp_path / "pruned.jsonlz4"))
+    assert list(tmp_path.iterdir()) == []
+    # without validation nothing is read back
+    write_session_file(firefox_session, str(tmp_path / "pruned.jsonlz4"), validate=False)
+    assert [path.name for path in tmp_path.iterdir()] == ["pruned.jsonlz4"]
+
+def test_prune_file_and_subcommand(tmp_path, session_file, capsys):
+    output_file = str(tmp_path / "pruned.jsonlz4")
+    prune_stats, write_stats = prune_session_file(str(session_file), output_file, max_history=1)
+    assert prune_stats.entries == 9
+    assert write_stats.input_bytes == session_file.stat().st_size
+    assert all(len(tab["entries"]) == 1 for window in decompress_session_file(output_file)["windows"] for tab in window["tabs"])
+
+    main(["prune", str(session_file), str(tmp_path / "only_site2.jsonlz4"), "--keep-only", "@site2.example"])
+    assert "Dropped 0 windows, 6 tabs" in capsys.readouterr().out
+    pruned = decompress_session_file(str(tmp_path / "only_site2.jsonlz4"))
+    assert [len(window["tabs"]) for window in pruned["windows"]] == [1, 1, 1]
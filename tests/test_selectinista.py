@@ -0,0 +1,45 @@
+from getinista.parsinista import process_session_data
+from getinista.selectinista import Selection, current_entry, top_domains
+
+def _tab_ids(session_data) -> list[list[str]]:
+    return [[tab[0]["id"].rsplit(":", 1)[0] for tab in window["tabs"]] for window in session_data]
+
+def test_apply_drops_windows_and_tabs_in_one_pass(firefox_session):
+    session_data = process_session_data(firefox_session)
+    selection = Selection(session_data)
+    selection.set_window(1, keep=False)
+    selection.set_tab(2, 2, keep=False)
+    kept = selection.apply()
+    assert _tab_ids(kept) == [["2:1", "2:3"], ["3:1", "3:2", "3:3"]]
+    assert kept[0]["tab_count"] == 2
+    # windows without drops are reused, the session itself is left alone
+    assert kept[1] is session_data[2]
+    assert len(session_data) == 3 and session_data[1]["tab_count"] == 3
+
+def test_keeping_a_tab_of_a_dropped_window_keeps_only_that_tab(firefox_session):
+    selection = Selection(process_session_data(firefox_session))
+    assert not selection.toggle_window(3)
+    assert selection.toggle_tab(3, 2)
+    assert [selection.kept_tab_count(window_idx) for window_idx in (1, 2, 3)] == [3, 3, 1]
+    assert _tab_ids(selection.apply())[2] == ["3:2"]
+
+def test_windows_left_without_tabs_are_dropped(firefox_session):
+    selection = Selection(process_session_data(firefox_session))
+    for tab_idx in (1, 2, 3):
+        selection.set_tab(2, tab_idx, keep=False)
+    assert _tab_ids(selection.apply()) == [["1:1", "1:2", "1:3"], ["3:1", "3:2", "3:3"]]
+
+def test_matching_by_domain_and_regex(firefox_session):
+    selection = Selection(process_session_data(firefox_session))
+    assert selection.keep_only_matching("@site2.example") == 3
+    assert _tab_ids(selection.apply()) == [["1:2"], ["2:2"], ["3:2"]]
+    assert selection.select_matching(r"Page 1\.1\.", keep=True) == 1
+    assert _tab_ids(selection.apply())[0] == ["1:1", "1:2"]
+
+def test_current_entry_follows_the_tab_index(firefox_session):
+    firefox_session["windows"][0]["tabs"][0]["index"] = 1
+    session_data = process_session_data(firefox_session)
+    tabs = session_data[0]["tabs"]
+    assert current_entry(tabs[0])["url"] == "https://site1.example/1/1"
+    assert current_entry(tabs[1])["url"] == "https://site2.example/1/2"
+    assert top_domains(tabs) == [("site1.example", 1), ("site2.example", 1), ("site3.example", 1)]
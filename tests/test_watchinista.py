@@ -0,0 +1,12 @@
+from getinista.parsinista import MAGIC_NUMBER
+from getinista.watchinista import SessionWatcher
+
+def test_watcher_skips_files_firefox_is_still_writing(tmp_path):
+    for name in ["recovery.jsonlz4", "recovery.jsonlz4.tmp", "recovery.baklz4"]:
+        (tmp_path / name).write_bytes(MAGIC_NUMBER + b"\x10\0\0\0")
+    changed = []
+    watcher = SessionWatcher(tmp_path, changed.append, settle=0)
+    # the first poll notices the files, the second exports the ones that stayed the same
+    watcher.poll()
+    watcher.poll()
+    assert sorted(path.name for path in changed) == ["recovery.baklz4", "recovery.jsonlz4"]
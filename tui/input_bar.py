@@ -1,8 +1,15 @@
 from textual.app import ComposeResult
 from textual.binding import Binding
+from textual.message import Message
 from textual.widget import Widget
 from textual.widgets import Input
 
+FILTER_COMMAND = "f"
+# "t tag" tags the marked windows, tabs and entries (or the one at the cursor), "t -tag" untags them
+TAG_COMMAND = "t"
+# "w" writes the deletions back to the session file
+WRITE_COMMAND = "w"
+
 class CenteredInputBar(Widget):
     """A widget that displays a centered input bar."""
     
@@ -22,6 +29,19 @@ class CenteredInputBar(Widget):
         Binding('escape', 'close_input', 'Return to Normal Mode')
     ]
 
+    class FilterChanged(Message):
+        """Posted on every keystroke of a filter command, with the pattern typed so far."""
+        def __init__(self, pattern: str) -> None:
+            super().__init__()
+            self.pattern = pattern
+
+    class CommandSubmitted(Message):
+        """Posted when a command other than a filter is entered."""
+        def __init__(self, command: str, argument: str) -> None:
+            super().__init__()
+            self.command = command
+            self.argument = argument
+
     def compose(self) -> ComposeResult:
         self.input = Input(placeholder="Enter command", id="input-bar")
         yield self.input
@@ -42,8 +62,17 @@ class CenteredInputBar(Widget):
         self.toggle_class("visible")
         self.input.blur()
 
+    def on_input_changed(self, event: Input.Changed) -> None:
+        # "f pattern" filters as it's typed, "f" alone clears the filter
+        if event.value.startswith(FILTER_COMMAND):
+            self.post_message(self.FilterChanged(event.value[len(FILTER_COMMAND):].strip()))
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        event.stop()
+        command, _, argument = event.value.strip().partition(" ")
+        if command and command != FILTER_COMMAND:
+            self.post_message(self.CommandSubmitted(command, argument.strip()))
+        self.action_close_input()
+
     def action_run_command(self) -> None:
-        # running command?
-        if self.input.value.startswith('f'):
-            pass # filter
         self.action_close_input()
@@ -1,45 +1,504 @@
-import json
+import os
 import re
+import time
 import random
+from collections.abc import Mapping, Sequence
+from functools import partial
 
+from rich.text import Text
 from textual.app import ComposeResult
 from textual.events import Key
+from textual.worker import get_current_worker
 from textual.widgets import Tree, Input
 from textual.widgets.tree import TreeNode
-from jsonista.jsonista import JsonDataManager
+from jsonista.jsonista import JsonDataManager, JsonDocument
+from jsonista.diffista import diff_documents, CHANGED_VALUE
+from getinista.editinista import EditLog, SaveStats, item_id
+
+# search results are handed to the UI thread in batches of this size, or this often
+SEARCH_BATCH_SIZE = 256
+SEARCH_BATCH_INTERVAL = 0.05
+# search terms starting with this are matched fuzzily against titles and urls and ranked best first
+FUZZY_PREFIX = "~"
+# seconds between checks of the viewed file for changes
+RELOAD_INTERVAL = 1.0
+# the filter is applied once typing pauses for this long
+FILTER_DEBOUNCE = 0.15
+# nodes added when a filter is applied, deeper matches are added as their parents are expanded
+FILTER_EXPAND_LIMIT = 500
+DELETED_MARK = "✘ "
+MARKED_MARK = "● "
+# paths of windows, tabs and entries in a simplified session: (w,), (w, "tabs", t), (w, "tabs", t, e)
+EDITABLE_DEPTHS = (1, 3, 4)
+
+def _is_container(value) -> bool:
+    return isinstance(value, Mapping) or (isinstance(value, Sequence) and not isinstance(value, str))
+
+def _key_label(key) -> str:
+    return f"[{key}]" if isinstance(key, int) else key
 
 class JsonTreeView(Tree):
+    """
+    Tree nodes are created only when their parent is expanded and dropped again
+    when it's collapsed. Every node keeps the path of its value as node data.
+
+    Files are parsed on a worker thread while a loading indicator is shown,
+    unless background_load is False. They are parsed again whenever they change
+    on disk, every reload_interval seconds at most, and only the nodes that show
+    changed values are updated.
+
+    Windows, tabs and entries of a simplified json session can be marked, tagged
+    and deleted. Those go to the session's EditLog and the file is only rewritten
+    by save_edits.
+    """
     CSS_PATH = "app.tcss"
-    def __init__(self, json_path):
-        super().__init__("JSON Viewer")
-        self.json_path = json_path
-        self.json_manager = JsonDataManager(json_path)
+    def __init__(
+        self,
+        json_data: Mapping | list | str | JsonDocument,
+        background_load: bool=True,
+        reload_interval: float | None=RELOAD_INTERVAL
+    ):
+        super().__init__("JSON Viewer", data=())
+        self.json_manager = JsonDataManager(json_data, load=False)
+        self.reload_interval = reload_interval
+        self._source_stat = None
+        self._reloading = False
         self.search_term = ""
         self.search_results = []
         self.current_search_index = 0
+        self._search_generation = 0
+        self._search_running = False
+        self._search_error = None
+        self._jump_to_first_result = False
+        self.filter_pattern = ""
+        self._filter_children: dict[tuple, dict] | None = None
+        self._filter_generation = 0
+        self._filter_timer = None
+        # paths of the nodes expanded before filtering, None while not filtered
+        self._unfiltered_expanded: list[tuple] | None = None
+        self._unfiltered_cursor_line = -1
+        self.edit_log: EditLog | None = None
+        self._saving = False
+        if isinstance(self.json_manager.document.source, str):
+            try:
+                self.edit_log = EditLog(self.json_manager.document.source)
+            except ValueError:
+                # packed sessions are read-only
+                pass
+        if self.json_manager.document.loaded or not background_load:
+            self.json_manager.load()
+            self.load_json_tree()
+
+    def on_mount(self) -> None:
+        if isinstance(self.json_manager.document.source, str) and self.reload_interval:
+            self._source_stat = self._stat_source()
+            self.set_interval(self.reload_interval, self._check_source)
+        if not self.json_manager.document.loaded:
+            self.loading = True
+            self.run_worker(self._load_in_background, thread=True, group="load")
+        else:
+            self._build_index_in_background()
+
+    def on_unmount(self) -> None:
+        self.json_manager.close()
+
+    def _load_in_background(self) -> None:
+        self.json_manager.load()
+        self.app.call_from_thread(self._on_document_loaded)
+
+    def _on_document_loaded(self) -> None:
         self.load_json_tree()
+        self.loading = False
+        self._build_index_in_background()
+        # terms typed while the document was loading
+        if self.search_term:
+            self.start_search(self.search_term)
+        if self.filter_pattern:
+            self.start_filter(self.filter_pattern)
+
+    def _build_index_in_background(self) -> None:
+        # filtering and searching big documents scans every leaf until the index is built
+        self.run_worker(self.json_manager.build_index, thread=True, group="index")
 
     def compose(self) -> ComposeResult:
-        self.search_input = Input(placeholder="Search for: ", value=self.search_term)
+        self.search_input = Input(placeholder=f"Search for ({FUZZY_PREFIX} for fuzzy): ", value=self.search_term)
         self.search_input.visible = False
         yield self.search_input
 
     def load_json_tree(self):
-        with open(self.json_path) as json_file:
-            data = json.load(json_file)
-        self.display_tree(self, data)
-
-    def display_tree(self, tree, data, parent=None):
-        if isinstance(data, dict):
-            for key, value in data.items():
-                node = tree.root.add(key) if parent is None else parent.add(key)
-                self.display_tree(tree, value, node)
-        elif isinstance(data, list):
-            for index, item in enumerate(data):
-                node = tree.root.add(f"[{index}]") if parent is None else parent.add(f"[{index}]")
-                self.display_tree(tree, item, node)
+        self.populate_node(self.root)
+
+    def value_at(self, path: tuple):
+        value = self.json_manager.get_all_data()
+        for key in path:
+            value = value[key]
+        return value
+
+    def populate_node(self, node: TreeNode) -> None:
+        """
+        Adds one level of children to node unless it already has them.
+        """
+        if node.children or node.data is None:
+            return
+        path = node.data
+        value = self.value_at(path)
+        if self._filter_children is not None and _is_container(value):
+            # only the children on the way to a match, straight from the match set
+            for key in self._filter_children.get(path, ()):
+                node.add(self._node_label(path + (key,)), data=path + (key,))
+        elif isinstance(value, Mapping):
+            for key, child in value.items():
+                node.add(self._node_label(path + (key,)), data=path + (key,))
+        elif _is_container(value):
+            for index in range(len(value)):
+                node.add(self._node_label(path + (index,)), data=path + (index,))
+        else:
+            # leaves have no path of their own, they're the value of their parent
+            node.add_leaf(f"{value}", data=None)
+
+    def on_tree_node_expanded(self, event: Tree.NodeExpanded) -> None:
+        self.populate_node(event.node)
+
+    def on_tree_node_collapsed(self, event: Tree.NodeCollapsed) -> None:
+        if not event.node.is_root:
+            event.node.remove_children()
+
+    def reveal_path(self, path: tuple) -> TreeNode:
+        """
+        Expands only the nodes on the way to path and returns the node showing its value.
+        """
+        node = self.root
+        self.populate_node(node)
+        node.expand()
+        for depth in range(len(path)):
+            key = path[depth]
+            children = node.children
+            if isinstance(key, int) and key < len(children) and children[key].data == path[:depth + 1]:
+                node = children[key]
+            else:
+                node = next(child for child in children if child.data == path[:depth + 1])
+            self.populate_node(node)
+            node.expand()
+        if not _is_container(self.value_at(path)) and node.children:
+            node = node.children[0]
+        return node
+
+    def _stat_source(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self.json_manager.document.source)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _check_source(self) -> None:
+        if self._reloading or not self.json_manager.document.loaded:
+            return
+        stat = self._stat_source()
+        if stat is None or stat == self._source_stat:
+            return
+        self._reloading = True
+        self.run_worker(partial(self._reload_in_background, stat), thread=True, exclusive=True, group="reload")
+
+    def _reload_in_background(self, stat: tuple[int, int]) -> None:
+        try:
+            data = self.json_manager.document.read_source()
+        except (OSError, ValueError):
+            # most likely caught in the middle of a write, the next check tries again
+            self.app.call_from_thread(self._reload_failed)
+            return
+        changes = diff_documents(self.json_manager.data, data)
+        self.app.call_from_thread(self._apply_reload, data, changes, stat)
+
+    def _reload_failed(self) -> None:
+        self._reloading = False
+
+    def _apply_reload(self, data, changes: list[tuple[tuple, str]], stat: tuple[int, int]) -> None:
+        self._source_stat = stat
+        self._reloading = False
+        if not changes:
+            return
+        cursor = self.cursor_node
+        cursor_path = None
+        if cursor is not None:
+            cursor_path = cursor.data if cursor.data is not None else cursor.parent.data
+        self.workers.cancel_group(self, "search")
+        self.json_manager.document.replace_data(data)
+        if self._unfiltered_expanded is not None:
+            # the filtered view is rebuilt from the new match set, the full view is rebuilt
+            # from the new data once the filter is cleared
+            self.start_filter(self.filter_pattern)
         else:
-            tree.root.add(f"{data}") if parent is None else parent.add(f"{data}")
+            self.patch_nodes(changes)
+        if cursor_path is not None:
+            node = self._materialized_node(cursor_path)
+            if cursor.data is None and node is not None and node.children and node.children[0].data is None:
+                node = node.children[0]
+            self.call_after_refresh(self.move_cursor, node)
+        if self.search_term:
+            search_index = self.current_search_index
+            self.start_search(self.search_term)
+            self.current_search_index = search_index
+        if self.edit_log is not None:
+            # positions shift when a save drops windows, tabs or entries
+            self.refresh_edit_labels()
+        self.notify(f"Reloaded, {len(changes)} changes", timeout=2)
+
+    def _materialized_node(self, path: tuple) -> TreeNode:
+        """
+        The node showing the value at path, or the deepest of its ancestors that has a node.
+        Unlike reveal_path nothing is expanded or added.
+        """
+        node = self.root
+        for depth in range(len(path)):
+            prefix = path[:depth + 1]
+            child = next((child for child in node.children if child.data == prefix), None)
+            if child is None:
+                return node
+            node = child
+        return node
+
+    def patch_nodes(self, changes: list[tuple[tuple, str]]) -> None:
+        """
+        Brings the nodes in line with the reloaded data, changes as returned by diff_documents.
+
+        Nodes whose children haven't been added yet read the new data once they're expanded,
+        everything else keeps its expansion state.
+        """
+        for path, kind in changes:
+            node = self._materialized_node(path)
+            if node.data != path or not node.children:
+                continue
+            if kind == CHANGED_VALUE:
+                node.remove_children()
+                self.populate_node(node)
+            else:
+                self._sync_children(node)
+
+    def _sync_children(self, node: TreeNode) -> None:
+        path = node.data
+        value = self.value_at(path)
+        children = list(node.children)
+        if isinstance(value, Mapping):
+            existing = set()
+            for child in children:
+                key = child.data[-1]
+                if key in value:
+                    existing.add(key)
+                else:
+                    child.remove()
+            for key in value:
+                if key not in existing:
+                    node.add(self._node_label(path + (key,)), data=path + (key,))
+        else:
+            for child in children[len(value):]:
+                child.remove()
+            for index in range(len(children), len(value)):
+                node.add(self._node_label(path + (index,)), data=path + (index,))
+
+    def _node_label(self, path: tuple) -> str | Text:
+        label = _key_label(path[-1])
+        log = self.edit_log
+        if log is None or len(path) not in EDITABLE_DEPTHS or not (log.marked or log.tags or log.deleted):
+            return label
+        node_id = item_id(self.json_manager.data, path)
+        if node_id is None:
+            return label
+        mark = DELETED_MARK if log.is_deleted(node_id) else MARKED_MARK if log.is_marked(node_id) else ""
+        tags = " ".join(f"#{tag}" for tag in log.tags_of(node_id))
+        if not mark and not tags:
+            return label
+        return Text(f"{mark}{label}  {tags}" if tags else f"{mark}{label}")
+
+    def refresh_edit_labels(self) -> None:
+        """
+        Relabels the windows, tabs and entries that have nodes.
+        """
+        pending = [self.root]
+        while pending:
+            node = pending.pop()
+            if node.data and len(node.data) in EDITABLE_DEPTHS:
+                node.set_label(self._node_label(node.data))
+            pending.extend(node.children)
+
+    def _cursor_item_id(self) -> str | None:
+        node = self.cursor_node
+        if node is None:
+            return None
+        path = node.data if node.data is not None else node.parent.data
+        # the closest window, tab or entry around the cursor
+        for depth in range(len(path), 0, -1):
+            if depth in EDITABLE_DEPTHS and (node_id := item_id(self.json_manager.data, path[:depth])) is not None:
+                return node_id
+        return None
+
+    def _can_edit(self) -> bool:
+        if self.edit_log is None:
+            self.notify("Only json sessions opened from a file can be edited", severity="error", timeout=2)
+            return False
+        if self._saving:
+            self.notify("Still saving", timeout=2)
+            return False
+        return True
+
+    def _edit_targets(self) -> list[str]:
+        if not self._can_edit():
+            return []
+        if self.edit_log.marked:
+            return list(self.edit_log.marked)
+        node_id = self._cursor_item_id()
+        if node_id is None:
+            self.notify("Not on a window, tab or entry", timeout=2)
+            return []
+        return [node_id]
+
+    def _unmark_all(self) -> None:
+        for node_id in list(self.edit_log.marked):
+            self.edit_log.record("unmark", node_id)
+
+    def toggle_mark(self) -> None:
+        if not self._can_edit():
+            return
+        node_id = self._cursor_item_id()
+        if node_id is None:
+            return
+        self.edit_log.record("unmark" if self.edit_log.is_marked(node_id) else "mark", node_id)
+        self.refresh_edit_labels()
+
+    def toggle_delete(self) -> None:
+        """
+        Deletes the marked windows, tabs and entries, or the one at the cursor.
+        Restores them instead when they're all deleted already.
+        """
+        targets = self._edit_targets()
+        if not targets:
+            return
+        op = "restore" if all(node_id in self.edit_log.deleted for node_id in targets) else "delete"
+        for node_id in targets:
+            self.edit_log.record(op, node_id)
+        self._unmark_all()
+        self.refresh_edit_labels()
+        self.notify(f"{len(self.edit_log.deleted)} deletions to save with :w", timeout=2)
+
+    def tag(self, tag: str, remove: bool=False) -> None:
+        targets = self._edit_targets()
+        if not targets:
+            return
+        for node_id in targets:
+            self.edit_log.record("untag" if remove else "tag", node_id, tag)
+        self._unmark_all()
+        self.refresh_edit_labels()
+
+    def save_edits(self) -> None:
+        if not self._can_edit():
+            return
+        self._saving = True
+        self.run_worker(self._save_in_background, thread=True, group="save")
+
+    def _save_in_background(self) -> None:
+        try:
+            stats = self.edit_log.save()
+        except (OSError, ValueError) as e:
+            self.app.call_from_thread(self._on_saved, None, str(e))
+            return
+        self.app.call_from_thread(self._on_saved, stats, None)
+
+    def _on_saved(self, stats: SaveStats | None, error: str | None) -> None:
+        self._saving = False
+        if stats is None:
+            self.notify(f"Saving failed: {error}", severity="error", timeout=4)
+            return
+        self.notify(
+            f"Saved, removed {stats.windows} windows, {stats.tabs} tabs and {stats.entries} entries", timeout=3
+        )
+        # the rewritten file is picked up like any other change
+        self._check_source()
+
+    def set_filter(self, pattern: str) -> None:
+        """
+        Shows only the branches leading to leaves matching pattern, once typing pauses.
+        An empty pattern brings the unfiltered view back as it was.
+        """
+        if self._filter_timer is not None:
+            self._filter_timer.stop()
+        self._filter_timer = self.set_timer(FILTER_DEBOUNCE, partial(self.start_filter, pattern))
+
+    def start_filter(self, pattern: str) -> None:
+        self._filter_timer = None
+        self._filter_generation += 1
+        self.filter_pattern = pattern
+        if pattern == "" or not self.json_manager.document.loaded:
+            self.workers.cancel_group(self, "filter")
+            self.clear_filter()
+            return
+        self.run_worker(
+            partial(self._filter_in_background, pattern, self._filter_generation),
+            thread=True, exclusive=True, group="filter"
+        )
+
+    def _filter_in_background(self, pattern: str, generation: int) -> None:
+        worker = get_current_worker()
+        try:
+            children = self.json_manager.get_index().match_children(f"(?i){pattern}", is_cancelled=lambda: worker.is_cancelled)
+        except re.error as e:
+            self.app.call_from_thread(self.notify, f"Invalid filter pattern: {e}", severity="error", timeout=2)
+            return
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self._apply_filter, generation, children)
+
+    def _apply_filter(self, generation: int, children: dict[tuple, dict]) -> None:
+        if generation != self._filter_generation:
+            return
+        if self._unfiltered_expanded is None:
+            self._unfiltered_expanded = self._expanded_paths()
+            self._unfiltered_cursor_line = self.cursor_line
+        self.root.remove_children()
+        self._filter_children = children
+        # expand the matching branches breadth first until enough lines are shown
+        added = 0
+        pending = [self.root]
+        while pending and added < FILTER_EXPAND_LIMIT:
+            node = pending.pop(0)
+            self.populate_node(node)
+            node.expand()
+            added += len(node.children)
+            # every child is on the way to a match, matching leaves expand to show their value
+            pending.extend(child for child in node.children if child.data is not None)
+        self.cursor_line = 0
+        if not children:
+            self.notify("Nothing matches the filter", timeout=2)
+
+    def clear_filter(self) -> None:
+        """
+        Rebuilds the unfiltered view, expanded as it was before filtering.
+        """
+        if self._unfiltered_expanded is None:
+            return
+        expanded, self._unfiltered_expanded = self._unfiltered_expanded, None
+        self._filter_children = None
+        self.root.remove_children()
+        self.populate_node(self.root)
+        for path in expanded:
+            # parents come first, paths gone after a reload are skipped
+            node = self._materialized_node(path)
+            if node.data == path:
+                self.populate_node(node)
+                node.expand()
+        self.cursor_line = self._unfiltered_cursor_line
+
+    def _expanded_paths(self) -> list[tuple]:
+        paths = []
+        pending = [self.root]
+        while pending:
+            node = pending.pop()
+            if node.is_expanded and node.data is not None:
+                paths.append(node.data)
+                pending.extend(reversed(node.children))
+        return paths
+
+    def _is_shown_by_filter(self, path: tuple) -> bool:
+        if self._filter_children is None:
+            return True
+        return all(path[depth] in self._filter_children.get(path[:depth], ()) for depth in range(len(path)))
 
     def focus_on_search_input(self):
         if self.search_input.visible:
@@ -50,16 +509,107 @@ class JsonTreeView(Tree):
             self.search_input.focus()
 
     def run_search(self):
-        self.search_term = self.search_input.value
-        self.search_results = self._search_nodes(self.root, self.search_term)
-        self.current_search_index = 0
+        term = self.search_input.value
         self.search_input.visible = False
         self.focus()
-        if len(self.search_results) == 0:
-            self.notify("Nothing was found", timeout=2)
+        if term != self.search_term:
+            self.start_search(term)
+        self.current_search_index = 0
+        if self.search_results:
+            self._move_to_search_result()
+        elif self._search_running:
+            # jump once the first results come in
+            self._jump_to_first_result = True
+        else:
+            self._report_empty_search()
+
+    def start_search(self, term: str) -> None:
+        """
+        Searches the data on a worker thread, cancelling the search for the previous term.
+        Results are appended to search_results as they're found.
+        """
+        self._search_generation += 1
+        self.search_term = term
+        self.search_results = []
+        self.current_search_index = 0
+        self._search_error = None
+        self._jump_to_first_result = False
+        if term == "" or not self.json_manager.document.loaded:
+            self._search_running = False
+            self.workers.cancel_group(self, "search")
+            return
+        self._search_running = True
+        self.run_worker(
+            partial(self._search_in_background, term, self._search_generation),
+            thread=True, exclusive=True, group="search"
+        )
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        if event.input is self.search_input and event.value != self.search_term:
+            self.start_search(event.value)
+
+    def _search_in_background(self, term: str, generation: int) -> None:
+        worker = get_current_worker()
+        if term.startswith(FUZZY_PREFIX):
+            self._fuzzy_search_in_background(term[len(FUZZY_PREFIX):], generation)
+            return
+        index = self.json_manager.get_index()
+        try:
+            leaf_ids = index.iter_search(f"(?i){term}", is_cancelled=lambda: worker.is_cancelled)
+        except re.error as e:
+            self.app.call_from_thread(self._add_search_results, generation, [], True, str(e))
+            return
+        batch = []
+        flush_at = time.monotonic() + SEARCH_BATCH_INTERVAL
+        for leaf_id in leaf_ids:
+            if worker.is_cancelled:
+                return
+            batch.append(index.paths[leaf_id])
+            if len(batch) >= SEARCH_BATCH_SIZE or time.monotonic() >= flush_at:
+                self.app.call_from_thread(self._add_search_results, generation, batch, False)
+                batch = []
+                flush_at = time.monotonic() + SEARCH_BATCH_INTERVAL
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self._add_search_results, generation, batch, True)
+
+    def _fuzzy_search_in_background(self, query: str, generation: int) -> None:
+        worker = get_current_worker()
+        for ranked in self.json_manager.get_fuzzy_index().iter_rank(query):
+            if worker.is_cancelled:
+                return
+            # every ranking replaces the previous, better matches may turn up later
+            self.app.call_from_thread(self._add_search_results, generation, ranked, False, None, True)
+        self.app.call_from_thread(self._add_search_results, generation, [], True)
+
+    def _add_search_results(
+        self,
+        generation: int,
+        paths: list[tuple],
+        done: bool,
+        error: str | None=None,
+        replace: bool=False
+    ) -> None:
+        if generation != self._search_generation:
             return
-        self.expand_and_select_nodes(self.search_results)
-        self._move_to_search_result()
+        if replace:
+            self.search_results = list(paths)
+            self.current_search_index = min(self.current_search_index, max(len(paths) - 1, 0))
+        else:
+            self.search_results.extend(paths)
+        self._search_running = not done
+        self._search_error = error
+        if self._jump_to_first_result and self.search_results:
+            self._jump_to_first_result = False
+            self._move_to_search_result()
+        elif self._jump_to_first_result and done:
+            self._jump_to_first_result = False
+            self._report_empty_search()
+
+    def _report_empty_search(self) -> None:
+        if self._search_error:
+            self.notify(f"Invalid search pattern: {self._search_error}", severity="error", timeout=2)
+        else:
+            self.notify("Nothing was found", timeout=2)
 
     def next_match(self):
         if self.search_results:
@@ -71,39 +621,15 @@ class JsonTreeView(Tree):
             self.current_search_index = (self.current_search_index - 1) % len(self.search_results)
             self._move_to_search_result()
 
-    def _search_nodes(self, node: TreeNode, term: str):
-        results = []
-        if term == "":
-            return results
-        if node.children and len(node.children) > 0:
-            for child in node.children:
-                if not child: continue
-                results.extend(self._search_nodes(child, term))
-        if not node.label or not node.label.plain: #pyright: ignore[reportAttributeAccessIssue]
-            return results
-        label = node.label.plain #pyright: ignore[reportAttributeAccessIssue]
-        if re.search(term, label, re.IGNORECASE):
-            results.append(node)
-            if node.id % 10 == 0:
-                pass
-        return results
-
     def _move_to_search_result(self):
         if not self.search_results:
             return
-        next_result = self.search_results[self.current_search_index]
-        self.expand_all_parents(next_result)
-        self.move_cursor(next_result)
-
-    def expand_all_parents(self, node: TreeNode):
-        node.expand()
-        if node.parent:
-            self.expand_all_parents(node.parent)
-
-    def expand_and_select_nodes(self, nodes: list[TreeNode]):
-        for node in nodes:
-            self.expand_all_parents(node)
-            self.select_node(node)
+        if not self._is_shown_by_filter(self.search_results[self.current_search_index]):
+            self.notify("This match is hidden by the filter", timeout=2)
+            return
+        next_result = self.reveal_path(self.search_results[self.current_search_index])
+        # the node only gets its line once the tree is rebuilt
+        self.call_after_refresh(self.move_cursor, next_result)
 
     def on_key(self, event: Key) -> None:
         """Change color on every key press."""
@@ -1,10 +1,15 @@
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 from textual.app import App, ComposeResult
 from textual.binding import Binding
 
 from .json_tree_view import JsonTreeView
-from .input_bar import CenteredInputBar
+from .input_bar import CenteredInputBar, TAG_COMMAND, WRITE_COMMAND
+from getinista.cachinista import SessionCache
+from jsonista.jsonista import JsonDataManager, JsonDocument
 
 
 class JsonTreeApp(App):
@@ -13,6 +18,8 @@ class JsonTreeApp(App):
         Binding("/", "focus_on_search_input", "Search Input"),
         Binding(':', 'open_input', 'Enter Command Mode'),
         Binding("enter", 'search', "Search"),
+        Binding("m", "toggle_mark", "Mark"),
+        Binding("d", "toggle_delete", "Delete/Restore"),
         # Movement
         Binding("l", "expand_current_node", "Expand Node"),
         Binding("h", "collapse_current_node", "Collapse Node"),
@@ -22,16 +29,45 @@ class JsonTreeApp(App):
         Binding("j", "move_down", "Move Down"),
     ]
 
-    def __init__(self, json_path):
+    def __init__(self, json_data, session_file: Path | None=None, output_dir: Path | None=None):
+        """
+        With session_file the viewer starts empty, converts the sessionstore file
+        into output_dir with a SessionPipeline and then shows the result.
+        """
         super().__init__()
-        self.JSON_PATH = json_path
+        self.JSON_DATA = json_data
+        self.session_file = session_file
+        self.output_dir = output_dir
 
     def compose(self) -> ComposeResult:
         self.input = CenteredInputBar()
-        self.tree_view = JsonTreeView(self.JSON_PATH)
+        self.tree_view = JsonTreeView(self.JSON_DATA)
         yield self.input
         yield self.tree_view
 
+    def on_mount(self) -> None:
+        if self.session_file is not None:
+            self.tree_view.loading = True
+            # async worker, the pipeline runs on the app's own event loop
+            self.run_worker(self._convert_session(self.session_file), group="convert")
+
+    async def _convert_session(self, session_file: Path) -> None:
+        from getinista.pipelinista import SessionPipeline
+
+        # a thread rather than a worker process, forking would copy the app's running threads
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # the conversion also fills the cache, so the next view of this file starts right away
+            pipeline = SessionPipeline(self.output_dir, executor, workers=1, cache=SessionCache())
+            result, = await pipeline.run([session_file])
+        if result.error:
+            self.tree_view.loading = False
+            self.notify(f"Converting {session_file} failed: {result.error}", severity="error", timeout=10)
+            return
+        await self.tree_view.remove()
+        self.tree_view = JsonTreeView(str(result.output_file))
+        await self.mount(self.tree_view)
+        self.tree_view.focus()
+
     def action_open_input(self) -> None:
         self.notify('aaah')
         self.input.open_input()
@@ -55,6 +91,25 @@ class JsonTreeApp(App):
     def action_search(self) -> None:
         self.tree_view.run_search()
 
+    def on_centered_input_bar_filter_changed(self, event: CenteredInputBar.FilterChanged) -> None:
+        self.tree_view.set_filter(event.pattern)
+
+    def on_centered_input_bar_command_submitted(self, event: CenteredInputBar.CommandSubmitted) -> None:
+        if event.command == TAG_COMMAND and event.argument:
+            remove = event.argument.startswith("-")
+            self.tree_view.tag(event.argument.removeprefix("-"), remove)
+        elif event.command == WRITE_COMMAND:
+            self.tree_view.save_edits()
+        else:
+            self.notify(f"Unknown command {event.command}", severity="error", timeout=2)
+        self.tree_view.focus()
+
+    def action_toggle_mark(self) -> None:
+        self.tree_view.toggle_mark()
+
+    def action_toggle_delete(self) -> None:
+        self.tree_view.toggle_delete()
+
     def action_focus_on_search_input(self) -> None:
         self.tree_view.focus_on_search_input()
 
@@ -70,12 +125,28 @@ class JsonTreeApp(App):
     def action_move_up(self) -> None:
         self.tree_view.action_cursor_up()
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python main.py <path_to_json>")
+def main(argv: list[str] | None=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Usage: sessionista view <path_to_json_packed_or_sessionstore_file>")
+        print("       sessionista view <session_archive.sqlite> <full text query>")
         sys.exit(1)
 
-    json_path = sys.argv[1]
-    app = JsonTreeApp(json_path)
+    json_path = argv[0]
+    json_data = json_path
+    if Path(json_path).suffix in (".sqlite", ".db"):
+        manager = JsonDataManager.from_archive(json_path, " ".join(argv[1:]))
+        json_data = manager.document
+    elif "lz4" in Path(json_path).name:
+        # sessionstore files are previewed through the conversion cache filled by sessionista export --cache,
+        # the ones that aren't cached yet are converted by the viewer
+        json_data = SessionCache().get(json_path)
+        if json_data is None:
+            with tempfile.TemporaryDirectory(prefix="sessionista-view-") as output_dir:
+                JsonTreeApp([], Path(json_path), Path(output_dir)).run()
+            return
+    app = JsonTreeApp(json_data)
     app.run()
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import sys
+import json
+from collections.abc import Mapping, Sequence
+
+from rich.text import Text
+from textual.app import App, ComposeResult
+from textual.binding import Binding
+from textual.widgets import Tree, Input, Footer
+from textual.widgets.tree import TreeNode
+from getinista.modelista import json_default
+from getinista.selectinista import Selection, current_entry, domain_of, top_domains
+from jsonista.jsonista import JsonDataManager
+
+# tabs of a window are added this many at a time, the rest behind a "more" node
+TAB_PAGE_SIZE = 200
+KEPT_MARK = "✔ "
+DROPPED_MARK = "✘ "
+
+class WindowPickerTree(Tree):
+    """
+    Windows of a session with their tabs, marked as kept or dropped in a Selection.
+
+    Tabs are only added when their window is expanded, a page at a time.
+    Node data is ("window", window_idx), ("tab", window_idx, tab_idx) or ("more", window_idx, next_tab_idx).
+    """
+    BINDINGS = [
+        Binding("space", "toggle_keep", "Keep/Drop"),
+    ]
+
+    def __init__(self, selection: Selection):
+        super().__init__("Session", data=None)
+        self.selection = selection
+        self.show_root = False
+        for window_idx in range(1, len(selection.session_data) + 1):
+            self.root.add(self._window_label(window_idx), data=("window", window_idx))
+        self.root.expand()
+
+    def on_mount(self) -> None:
+        self.cursor_line = 0
+
+    def _window(self, window_idx: int) -> Mapping:
+        return self.selection.session_data[window_idx - 1]
+
+    def _window_label(self, window_idx: int) -> Text:
+        tabs = self._window(window_idx)["tabs"]
+        mark = KEPT_MARK if self.selection.is_window_kept(window_idx) else DROPPED_MARK
+        domains = ", ".join(f"{domain} ({count})" for domain, count in top_domains(tabs))
+        return Text(f"{mark}Window {window_idx}: {self.selection.kept_tab_count(window_idx)}/{len(tabs)} tabs | {domains}")
+
+    def _tab_label(self, window_idx: int, tab_idx: int) -> Text:
+        entry = current_entry(self._window(window_idx)["tabs"][tab_idx - 1])
+        mark = KEPT_MARK if self.selection.is_tab_kept(window_idx, tab_idx) else DROPPED_MARK
+        if entry is None:
+            return Text(f"{mark}(empty tab)")
+        return Text(f"{mark}{entry.get('title', '') or entry.get('url', '')} ({domain_of(entry.get('url', ''))})")
+
+    def _add_tab_page(self, node: TreeNode, first_tab_idx: int) -> None:
+        window_idx = node.data[1]
+        tab_count = len(self._window(window_idx)["tabs"])
+        last_tab_idx = min(first_tab_idx + TAB_PAGE_SIZE, tab_count + 1)
+        for tab_idx in range(first_tab_idx, last_tab_idx):
+            node.add_leaf(self._tab_label(window_idx, tab_idx), data=("tab", window_idx, tab_idx))
+        if last_tab_idx <= tab_count:
+            node.add_leaf(Text(f"... {tab_count - last_tab_idx + 1} more tabs"), data=("more", window_idx, last_tab_idx))
+
+    def on_tree_node_expanded(self, event: Tree.NodeExpanded) -> None:
+        node = event.node
+        if node.data and node.data[0] == "window" and not node.children:
+            self._add_tab_page(node, 1)
+
+    def on_tree_node_collapsed(self, event: Tree.NodeCollapsed) -> None:
+        node = event.node
+        if node.data and node.data[0] == "window":
+            node.remove_children()
+
+    def on_tree_node_selected(self, event: Tree.NodeSelected) -> None:
+        node = event.node
+        if node.data and node.data[0] == "more":
+            window_node = node.parent
+            node.remove()
+            self._add_tab_page(window_node, node.data[2])
+
+    def action_toggle_keep(self) -> None:
+        node = self.cursor_node
+        if node is None or not node.data:
+            return
+        kind, window_idx = node.data[:2]
+        if kind == "window":
+            self.selection.toggle_window(window_idx)
+            self.refresh_labels(node)
+        elif kind == "tab":
+            self.selection.toggle_tab(window_idx, node.data[2])
+            self.refresh_labels(node.parent)
+
+    def refresh_labels(self, window_node: TreeNode | None=None) -> None:
+        """
+        Relabels window_node and its tabs, or every window with its materialized tabs.
+        """
+        window_nodes = [window_node] if window_node is not None else self.root.children
+        for node in window_nodes:
+            window_idx = node.data[1]
+            node.set_label(self._window_label(window_idx))
+            for child in node.children:
+                if child.data[0] == "tab":
+                    child.set_label(self._tab_label(window_idx, child.data[2]))
+
+class WindowPicker(App):
+    """
+    Picks the windows and tabs of a simplified session to keep. Exits with the Selection, or None when cancelled.
+
+    The input takes a regex on titles and urls or an @domain:
+    +pattern keeps the matching tabs, -pattern drops them and a bare pattern keeps only them.
+    """
+    BINDINGS = [
+        Binding("/", "focus_bulk_input", "Bulk Select"),
+        Binding("s", "save", "Save"),
+        Binding("q", "cancel", "Cancel"),
+        Binding("l", "expand_current_node", "Expand Node"),
+        Binding("h", "collapse_current_node", "Collapse Node"),
+        Binding("k", "move_up", "Move Up"),
+        Binding("j", "move_down", "Move Down"),
+    ]
+
+    def __init__(self, session_data: Sequence[Mapping]):
+        super().__init__()
+        self.selection = Selection(session_data)
+
+    def compose(self) -> ComposeResult:
+        self.picker_tree = WindowPickerTree(self.selection)
+        self.bulk_input = Input(placeholder="+regex keeps, -regex drops, regex keeps only matches, @domain for domains")
+        yield self.bulk_input
+        yield self.picker_tree
+        yield Footer()
+
+    def on_mount(self) -> None:
+        self.picker_tree.focus()
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        value = event.value.strip()
+        if not value:
+            return
+        try:
+            if value[0] in "+-":
+                count = self.selection.select_matching(value[1:], keep=value[0] == "+")
+            else:
+                count = self.selection.keep_only_matching(value)
+        except Exception as e:
+            self.notify(f"Invalid pattern: {e}", severity="error")
+            return
+        self.picker_tree.refresh_labels()
+        self.notify(f"{count} tabs matched")
+        self.bulk_input.clear()
+        self.picker_tree.focus()
+
+    def action_focus_bulk_input(self) -> None:
+        self.bulk_input.focus()
+
+    def action_save(self) -> None:
+        self.exit(self.selection)
+
+    def action_cancel(self) -> None:
+        self.exit(None)
+
+    def action_expand_current_node(self) -> None:
+        if self.picker_tree.cursor_node:
+            self.picker_tree.cursor_node.expand()
+
+    def action_collapse_current_node(self) -> None:
+        node = self.picker_tree.cursor_node
+        if node is None:
+            return
+        if node.is_expanded:
+            node.collapse()
+        elif node.parent and node.parent is not self.picker_tree.root:
+            self.picker_tree.select_node(node.parent)
+            node.parent.collapse()
+
+    def action_move_up(self) -> None:
+        self.picker_tree.action_cursor_up()
+
+    def action_move_down(self) -> None:
+        self.picker_tree.action_cursor_down()
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python -m tui.window_picker <simplified_session> <output_json>")
+        sys.exit(1)
+
+    manager = JsonDataManager(sys.argv[1])
+    selection = WindowPicker(manager.data).run()
+    if selection is None:
+        print("Nothing saved")
+        sys.exit(0)
+    with open(sys.argv[2], "x", encoding="utf-8") as f:
+        json.dump(selection.apply(), f, ensure_ascii=False, indent=2, default=json_default)
+    print(f"Session is saved to {sys.argv[2]}")